@@ -0,0 +1,383 @@
+import os
+import sys
+import json
+import tarfile
+import zipfile
+import tempfile
+from time import time
+from engine import *
+from ingestion import *
+from normalizer import TextNormalizer
+
+DIR = "dataset"
+
+bench = "ingestion"
+
+# Read throughput of each ingestion source, on the same pages of DIR
+if bench == "ingestion":
+
+    tmp = tempfile.mkdtemp()
+    files = [os.path.join(DIR, f) for f in os.listdir(DIR) if f.endswith(".txt")]
+    with tarfile.open(os.path.join(tmp, "dataset.tar"), "w") as tar:
+        for f in files: tar.add(f, os.path.basename(f))
+    with tarfile.open(os.path.join(tmp, "dataset.tar.gz"), "w:gz") as tar:
+        for f in files: tar.add(f, os.path.basename(f))
+    with zipfile.ZipFile(os.path.join(tmp, "dataset.zip"), "w", zipfile.ZIP_DEFLATED) as archive:
+        for f in files: archive.write(f, os.path.basename(f))
+    with open(os.path.join(tmp, "dataset.jsonl"), "w") as out:
+        for url, content in DirectorySource(DIR):
+            out.write(json.dumps({"url": url, "content": content}) + "\n")
+
+    for path in [DIR] + [os.path.join(tmp, name) for name in ("dataset.tar", "dataset.tar.gz", "dataset.zip", "dataset.jsonl")]:
+        source = openSource(path)
+        start = time()
+        SearchEngine(source)
+        end = time() - start
+        print(type(source).__name__, os.path.basename(path))
+        print("   read:", source.getBytesRead(), "bytes in", round(source.getElapsedTime(), 4), "s ->", round(source.getThroughput(), 2), "MB/s")
+        print("   total ingestion:", round(end, 4), "s")
+
+# Vocabulary size and ingestion time with and without the normalization of the words
+elif bench == "normalization":
+
+    normalizers = [("none", None),
+                   ("case + punctuation", TextNormalizer()),
+                   ("+ stopwords", TextNormalizer(stopwords=("it", "en"))),
+                   ("+ stemming", TextNormalizer(stopwords=("it", "en"), stem=("it", "en")))]
+    for name, normalizer in normalizers:
+        source = openSource(DIR)
+        start = time()
+        se = SearchEngine(source, normalizer=normalizer)
+        end = time() - start
+        print(name)
+        print("   vocabulary:", se._generation._invertedIndex.getVocabularySize(), "words")
+        print("   ingestion:", round(end, 4), "s ->", round(source.getBytesRead() / end / 2**20, 2), "MB/s")
+
+# Multi-keyword top-k retrieval with block-max pruning against the exhaustive scoring of the same postings
+elif bench == "pruning":
+
+    import random
+    PAGES, WORDS, VOCABULARY, QUERIES, K = 20000, 100, 5000, 100, 10
+    generator = random.Random(0)
+    vocabulary = ["w%d" % i for i in range(VOCABULARY)]
+    weights = [1 / (i + 1) for i in range(VOCABULARY)] # Zipf distribution of the words
+    path = os.path.join(tempfile.mkdtemp(), "zipf.jsonl")
+    with open(path, "w") as out:
+        for i in range(PAGES):
+            # each page repeats a few topic words, as real pages do
+            topics = generator.choices(vocabulary[10:2000], k=3)
+            words = generator.choices(vocabulary, weights, k=WORDS - 20) + generator.choices(topics, k=20)
+            out.write(json.dumps({"url": "www.host%d.it/page%d.html" % (i % 50, i), "content": " ".join(words)}) + "\n")
+    index = SearchEngine(path)._generation._invertedIndex
+    for name, first, last in (("frequent", 0, 10), ("common", 10, 200), ("rare", 50, 2000)):
+        queries = [" ".join(generator.choices(vocabulary[first:last], k=generator.randint(2, 4))) for _ in range(QUERIES)]
+        for query in queries: index.getTopPages(query, K) # compute the postings once
+        print(name, "keywords")
+        for method, exhaustive in (("exhaustive", True), ("block-max", False)):
+            start = time()
+            results = [index.getTopPages(query, K, exhaustive) for query in queries]
+            end = time() - start
+            print("  ", method, ":", round(end / QUERIES * 1000, 3), "ms per query")
+            if exhaustive: expected = results
+            else: print("   same results:", results == expected)
+
+# Ingestion time and peak of the traced memory, adding the postings directly or spilling them to disk
+elif bench == "spill":
+
+    import random
+    import tracemalloc
+    PAGES, WORDS, VOCABULARY = 5000, 200, 20000
+    generator = random.Random(0)
+    vocabulary = ["w%d" % i for i in range(VOCABULARY)]
+    weights = [1 / (i + 1) for i in range(VOCABULARY)] # Zipf distribution of the words
+    path = os.path.join(tempfile.mkdtemp(), "zipf.jsonl")
+    with open(path, "w") as out:
+        for i in range(PAGES):
+            content = " ".join(generator.choices(vocabulary, weights, k=WORDS))
+            out.write(json.dumps({"url": "www.host%d.it/page%d.html" % (i % 50, i), "content": content}) + "\n")
+    for budget in (None, 2**20, 2**23):
+        start = time()
+        SearchEngine(path, memoryBudget=budget)
+        end = time() - start
+        tracemalloc.start()
+        se = SearchEngine(path, memoryBudget=budget)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del se
+        print("budget:", budget)
+        print("   ingestion:", round(end, 4), "s")
+        print("   index:", current >> 20, "MB, peak:", peak >> 20, "MB")
+
+# Size and decoding speed of the compressed postings of the pages of DIR (replicated COPIES times)
+elif bench == "codec":
+
+    from postings_codec import CompressedPostings
+    COPIES = 200
+    path = os.path.join(tempfile.mkdtemp(), "copies.jsonl")
+    with open(path, "w") as out:
+        for copy in range(COPIES):
+            for url, content in DirectorySource(DIR):
+                host, _, rest = url.partition("/")
+                out.write(json.dumps({"url": host + "/copy%d/" % copy + rest, "content": content}) + "\n")
+    index = SearchEngine(path)._generation._invertedIndex
+    lists = [node._occurrenceList for _, node in index._trie.items()]
+    postings = len(lists) and sum(len(list) for list in lists)
+    start = time()
+    compressed = [CompressedPostings(list, index._pageIds, index._pageList) for list in lists]
+    encoding = time() - start
+    dictBytes = sum(sys.getsizeof(list) for list in lists)
+    arrayBytes = 8 * postings # identifiers and counts as 4-byte arrays
+    compressedBytes = sum(len(postings.toBytes()) for postings in compressed)
+    print("postings:", postings, "in", len(lists), "lists")
+    print("   dict:", dictBytes, "bytes ->", round(dictBytes / postings, 2), "bytes per posting")
+    print("   arrays:", arrayBytes, "bytes ->", round(arrayBytes / postings, 2), "bytes per posting")
+    print("   compressed:", compressedBytes, "bytes ->", round(compressedBytes / postings, 2), "bytes per posting")
+    print("   encoding:", round(encoding, 4), "s")
+    start = time()
+    for postings in compressed:
+        for _ in postings.items(): pass
+    print("   decoding of all the postings:", round(time() - start, 4), "s")
+    start = time()
+    for list in lists:
+        for _ in list.items(): pass
+    print("   iteration of all the dictionaries:", round(time() - start, 4), "s")
+    start = time()
+    lookups = 0
+    for list, postings in zip(lists, compressed):
+        for page in list:
+            postings.get(index._pageIds[page])
+            lookups += 1
+    print("   lookups with skip pointers:", round((time() - start) / lookups * 10**6, 3), "us each")
+
+# Rejection time and false positive rate of the Bloom filter of the vocabulary, for keywords absent from the index
+elif bench == "bloom":
+
+    import random
+    PAGES, WORDS, VOCABULARY, QUERIES = 5000, 100, 50000, 100000
+    generator = random.Random(0)
+    vocabulary = ["w%d" % i for i in range(VOCABULARY)]
+    weights = [1 / (i + 1) for i in range(VOCABULARY)] # Zipf distribution of the words
+    path = os.path.join(tempfile.mkdtemp(), "zipf.jsonl")
+    with open(path, "w") as out:
+        for i in range(PAGES):
+            content = " ".join(generator.choices(vocabulary, weights, k=WORDS))
+            out.write(json.dumps({"url": "www.host%d.it/page%d.html" % (i % 50, i), "content": content}) + "\n")
+    se = SearchEngine(path)
+    index = se._generation._invertedIndex
+    # absent keywords sharing a prefix with the words of the index, so that the trie is visited
+    absent = ["w%dx" % generator.randrange(VOCABULARY) for _ in range(QUERIES)]
+    print("words:", len(index._vocabulary), "capacity of the filter:", index._vocabulary.getCapacity())
+    start = time()
+    for word in absent: index._trie.searchNode(word)
+    print("   trie visit:", round((time() - start) / QUERIES * 10**6, 3), "us per keyword")
+    start = time()
+    for word in absent: index._findNode(word)
+    print("   filter, then trie visit:", round((time() - start) / QUERIES * 10**6, 3), "us per keyword")
+    start = time()
+    for word in absent:
+        try:
+            se.search(word, 10)
+        except NOOccurrenceListException:
+            pass
+    print("   search raising the exception:", round((time() - start) / QUERIES * 10**6, 3), "us per keyword")
+    start = time()
+    for word in absent: se.hasKeyword(word)
+    print("   hasKeyword:", round((time() - start) / QUERIES * 10**6, 3), "us per keyword")
+    positives = sum(1 for word in absent if index._vocabulary.mightContain(word))
+    print("   false positive rate:", round(positives / QUERIES, 4))
+
+# Ingestion time of a tree of directories with the pages of DIR (replicated COPIES times), with and without read-ahead
+elif bench == "readahead":
+
+    COPIES = 100
+    tmp = tempfile.mkdtemp()
+    records = list(DirectorySource(DIR))
+    for copy in range(COPIES):
+        directory = os.path.join(tmp, "part%d" % (copy % 10), "copy%d" % copy)
+        os.makedirs(directory)
+        for i, (url, content) in enumerate(records):
+            host, _, rest = url.partition("/")
+            with open(os.path.join(directory, "p%d.txt" % i), "w") as out:
+                out.write(host + "/copy%d/" % copy + rest + "\n" + content)
+    for workers, depth in ((0, 0), (1, 4), (4, 16), (8, 64)):
+        source = DirectorySource(tmp, workers, depth)
+        start = time()
+        SearchEngine(source)
+        end = time() - start
+        print("workers:", workers, "queue depth:", depth)
+        print("   read:", source.getBytesRead(), "bytes, waiting", round(source.getElapsedTime(), 4), "s")
+        print("   total ingestion:", round(end, 4), "s")
+
+# Host lookups in the database and removal of the duplicated sites of the results, at HOSTS hosts, for each map type
+elif bench == "maps":
+
+    import random
+    from map_factory import MAP_TYPES, mapFactory
+    HOSTS, LOOKUPS, QUERIES, K = 100000, 200000, 20000, 50
+    generator = random.Random(0)
+    hosts = ["www.host%d.it" % i for i in range(HOSTS)]
+    sites = [WebSite(host) for host in hosts]
+    lookups = generator.choices(hosts, k=LOOKUPS)
+    # each query has K hits, some of which are on the same site
+    queries = [generator.choices(sites[:generator.randint(K, HOSTS)], k=K) for _ in range(QUERIES)]
+    for mapType in MAP_TYPES:
+        newMap = mapFactory(mapType)
+        print(mapType)
+        start = time()
+        database = newMap(HOSTS) if mapType == "presized" else newMap()
+        for host, site in zip(hosts, sites): database[host] = site
+        print("   insertion of the hosts:", round((time() - start) / HOSTS * 10**6, 3), "us each")
+        start = time()
+        for host in lookups: database[host]
+        print("   host lookup:", round((time() - start) / LOOKUPS * 10**6, 3), "us each")
+        start = time()
+        for hits in queries:
+            map = newMap(K)
+            for site in hits:
+                try:
+                    map[site] += 1
+                except KeyError:
+                    map[site] = 1
+        print("   dedup of", K, "hits:", round((time() - start) / QUERIES * 10**6, 3), "us per query")
+
+# Time and peak of the traced memory to render a site of PAGES pages as a string or streaming it to a file
+elif bench == "sitewriter":
+
+    import tracemalloc
+    PAGES = 200000
+    site = WebSite("www.huge.it")
+    for i in range(PAGES):
+        site.insertPage("www.huge.it/d%d/e%d/page%d.html" % (i % 100, i % 1000, i), "")
+    site.getStructureId() # the structure is interned by both
+    with open(os.devnull, "w") as sink:
+        for name, render in (("getSiteString", lambda: site.getSiteString()), ("writeSiteString", lambda: site.writeSiteString(sink))):
+            site._subtrees._renderings.clear() # nothing cached
+            tracemalloc.start()
+            start = time()
+            render()
+            end = time() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(name, ":", round(end, 3), "s, peak", round(peak / 2**20, 1), "MB")
+
+# Time to render the site string again after each insertion of a page into a site of PAGES pages
+elif bench == "fragments":
+
+    PAGES, INSERTIONS = 100000, 200
+    site = WebSite("www.huge.it")
+    for i in range(PAGES):
+        site.insertPage("www.huge.it/d%d/e%d/page%d.html" % (i % 100, i % 1000, i), "")
+    site.getSiteString()
+    start = time()
+    for i in range(INSERTIONS):
+        site.insertPage("www.huge.it/d%d/e%d/new%d.html" % (i % 100, i % 1000, i), "")
+        site.getSiteString()
+    print("insertion and rendering:", round((time() - start) / INSERTIONS * 1000, 3), "ms each")
+    with open(os.devnull, "w") as sink:
+        start = time()
+        for i in range(INSERTIONS):
+            site.insertPage("www.huge.it/d%d/e%d/other%d.html" % (i % 100, i % 1000, i), "")
+            site.writeSiteString(sink)
+        print("insertion and streaming:", round((time() - start) / INSERTIONS * 1000, 3), "ms each")
+
+# Memory per page of the WebSites, for PAGES pages with long URLs sharing their directories
+elif bench == "elements":
+
+    import tracemalloc
+    PAGES, HOSTS = 100000, 20
+    URL = "www.host%d.example.com/departments/computer-science/courses/year%d/lecture-notes/page%d.html"
+    tracemalloc.start()
+    sites = {}
+    start = time()
+    for i in range(PAGES):
+        url = URL % (i % HOSTS, i % 5, i) # as read from a page file, only the page can keep it
+        host = url.split('/')[0]
+        try:
+            sites[host].insertPage(url, "")
+        except KeyError:
+            sites[host] = WebSite(host)
+            sites[host].insertPage(url, "")
+    end = time() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("WebSites of", PAGES, "pages:", round(size / 2**20, 1), "MB ->", round(size / PAGES), "bytes per page")
+    print("   insertion:", round(end / PAGES * 10**6, 3), "us per page")
+    pages = [sites["www.host%d.example.com" % (i % HOSTS)].insertPage(URL % (i % HOSTS, i % 5, i), "") for i in range(10000)]
+    for label in ("rebuilt", "cached"):
+        start = time()
+        for page in pages: page.getUrl()
+        print("   getUrl (" + label + "):", round((time() - start) / len(pages) * 10**6, 3), "us per page")
+
+# Overhead of the instrumentation of search, and its report on the queries of a workload
+elif bench == "instrumentation":
+
+    import random
+    from instrumentation import Instrumentation
+    QUERIES = 2000
+    plain = SearchEngine(DIR)
+    instrumentation = Instrumentation(slowQueryThreshold=0.0001, slowQueryLogSize=5)
+    measured = SearchEngine(DIR, instrumentation=instrumentation)
+    generator = random.Random(0)
+    words = ["algorithm", "the", "data", "of", "python", "structure", "tree", "and", "graph", "missing"]
+    queries = [(generator.choice(words), generator.choice((1, 5, 20))) for _ in range(QUERIES)]
+    for label, engine in (("plain", plain), ("instrumented", measured), ("plain", plain)):
+        start = time()
+        for keyword, k in queries:
+            try:
+                engine.search(keyword, k)
+            except NOOccurrenceListException:
+                pass
+        print(label + ":", round((time() - start) / QUERIES * 10**6, 3), "us per query")
+    print(instrumentation.report())
+    print(json.dumps(instrumentation.toDict()["latencyUs"]))
+
+# Size of the shared index compared with the memory of a SearchEngine, and the latency of their searches
+elif bench == "shared":
+
+    import tracemalloc
+    QUERIES = 2000
+    tracemalloc.start()
+    engine = SearchEngine(DIR)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("SearchEngine:", round(size / 2**20, 2), "MB per worker")
+    start = time()
+    shared = engine.share()
+    print("SharedIndex:", round(shared.getSize() / 2**20, 2), "MB shared by all the workers, built in", round(time() - start, 3), "s")
+    words = [word for word in ("algorithm", "the", "data", "of", "and", "tree", "graph") if engine.hasKeyword(word)]
+    for label, searcher in (("SearchEngine", engine), ("SharedIndex", shared)):
+        start = time()
+        for i in range(QUERIES): searcher.search(words[i % len(words)], 1 + i % 20)
+        print(label, "search:", round((time() - start) / QUERIES * 10**6, 3), "us per query")
+    shared.close()
+    shared.unlink()
+
+# Ordered traversal of the vocabulary and range queries, compared with sorting all the words of the trie
+elif bench == "vocabulary":
+
+    import random
+    from compressed_trie_4 import CompressedTrie4
+    WORDS, RANGES = 200000, 200
+    generator = random.Random(0)
+    trie = CompressedTrie4()
+    for _ in range(WORDS):
+        trie.insertWord(''.join(generator.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(generator.randint(3, 12))))
+    start = time()
+    words = sorted(word for word, _ in trie.items())
+    print("sorting all the words:", round(time() - start, 3), "s")
+    for label in ("first", "second"):
+        start = time()
+        ordered = [word for word, _ in trie.sortedItems()]
+        print("ordered traversal (" + label + "):", round(time() - start, 3), "s")
+    assert ordered == words
+    # narrow ranges, like the words from "des" to "dig"
+    ranges = []
+    for _ in range(RANGES):
+        low = ''.join(generator.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(3))
+        ranges.append((low, low[:2] + chr(ord(low[2]) + 3)))
+    start = time()
+    for low, high in ranges[:10]: [word for word in sorted(word for word, _ in trie.items()) if low <= word < high]
+    print("range by sorting all the words:", round((time() - start) / 10 * 10**3, 3), "ms per range")
+    start = time()
+    for low, high in ranges: [word for word, _ in trie.sortedItems(low, high)]
+    print("range query on the trie:", round((time() - start) / RANGES * 10**3, 3), "ms per range")
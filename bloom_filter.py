@@ -0,0 +1,130 @@
+from math import ceil, log
+
+class BloomFilter:
+    """
+    A class to model a Bloom filter of a set of words: a bit array in which each word sets HASHES bits,
+    chosen by double hashing of its (cached) hash. A word whose bits are not all set has never been added,
+    while a word whose bits are all set has been added with a probability which depends on the number of
+    words and on the size of the array: the filter can return false positives, never false negatives.
+    Since the hash of the strings is salted per process, the filter is not meant to be persisted.
+
+    Attributes
+    ----------
+    _bits : bytearray
+        Bit array.
+    _size : int
+        Number of bits of the array.
+    _hashes : int
+        Number of bits set by each word.
+    _capacity : int
+        Number of words for which the array has been sized.
+    _count : int
+        Number of words added.
+
+    Methods
+    -------
+    add
+        Adds a word to the filter.
+    mightContain
+        Returns False if the word has certainly not been added.
+    isFull
+        Returns True if the filter contains more words than its capacity.
+    """
+
+    __slots__ = ['_bits', '_size', '_hashes', '_capacity', '_count']
+
+    def __init__(self, capacity = 1024, errorRate = 0.01):
+        """
+        Creates a new empty BloomFilter.
+
+        Parameters
+        ----------
+        capacity : int
+            Number of words for which the false positive rate is at most errorRate.
+        errorRate : float
+            Expected false positive rate when the filter contains capacity words.
+
+        TIME COMPLEXITY
+        ---------------
+        O(capacity)
+        """
+        self._size = max(8, ceil(-capacity * log(errorRate) / log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._capacity = capacity
+        self._count = 0
+
+    def __len__(self):
+        """Returns the number of words added."""
+        return self._count
+
+    def add(self, word):
+        """
+        Adds a word to the filter.
+
+        Parameters
+        ----------
+        word : str
+            The word to be added.
+
+        TIME COMPLEXITY
+        ---------------
+        O(HASHES)
+        """
+        h = hash(word) & 0xFFFFFFFFFFFFFFFF
+        first, step = h & 0xFFFFFFFF, h >> 32 | 1
+        bits, size = self._bits, self._size
+        for i in range(self._hashes):
+            position = (first + i * step) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def mightContain(self, word):
+        """
+        Checks if a word may have been added to the filter.
+
+        Parameters
+        ----------
+        word : str
+            The word to be checked.
+
+        Returns
+        -------
+        bool
+            False if the word has certainly not been added, True if it has probably been added.
+
+        TIME COMPLEXITY
+        ---------------
+        O(HASHES)
+            Usually much less for the words not added, since the check stops at the first unset bit.
+        """
+        h = hash(word) & 0xFFFFFFFFFFFFFFFF
+        first, step = h & 0xFFFFFFFF, h >> 32 | 1
+        bits, size = self._bits, self._size
+        for i in range(self._hashes):
+            position = (first + i * step) % size
+            if not bits[position >> 3] & 1 << (position & 7): return False
+        return True
+
+    def isFull(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        bool
+            True if the filter contains more words than its capacity, so that its false positive rate is
+            higher than the one it has been sized for.
+        """
+        return self._count > self._capacity
+
+    def getCapacity(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The number of words for which the filter has been sized.
+        """
+        return self._capacity
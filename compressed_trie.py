@@ -1,6 +1,7 @@
 from TdP_collections.map.red_black_tree import RedBlackTreeMap
 from TdP_collections.hash_table.chain_hash_map import ChainHashMap
 from TdP_collections.hash_table.probe_hash_map import ProbeHashMap
+from map_factory import mapFactory
 
 class CompressedTrie:
     """Representation of a compressed trie structure.
@@ -9,9 +10,11 @@ class CompressedTrie:
         ----------
             _root : _Node
                 Root node of the compressed trie.
+            _newMap : callable | None
+                Factory of the maps of the nodes, None for the default ProbeHashMaps.
     """
 
-    __slots__ = '_root'
+    __slots__ = '_root', '_newMap'
 
     #-------------------------- nested _Node class --------------------------
     class _Node:
@@ -29,17 +32,19 @@ class CompressedTrie:
 
         __slots__ = '_children', '_endNode' ,'_occurrenceList' # streamline memory usage
 
-        def __init__(self, endNode = False):
+        def __init__(self, endNode = False, newMap = None):
             """Creates a new node.
 
                 Parameters
                 ----------
                     endNode : bool
                         Indicates if the node is an end node or not.
+                    newMap : callable | None
+                        Factory of the maps of the node, None for the default ProbeHashMaps.
             """
-            self._children = ProbeHashMap(57)
+            self._children = ProbeHashMap(57) if newMap is None else newMap(28)
             self._endNode = endNode
-            if self._endNode: self._occurrenceList = ProbeHashMap()
+            if self._endNode: self._occurrenceList = ProbeHashMap() if newMap is None else newMap()
 
     #-------------------------- utility methods --------------------------
     def _longestCommonPrefix(self, lable, word):
@@ -69,9 +74,16 @@ class CompressedTrie:
         # Total time complexity: O(n)
 
     #-------------------------- trie constructor --------------------------
-    def __init__(self):
-        """Create an initially empty trie."""
-        self._root = self._Node()
+    def __init__(self, mapType = None):
+        """Create an initially empty trie.
+
+            Parameters
+            ----------
+                mapType : str | None
+                    Implementation of the maps of the nodes (see map_factory.py), None for ProbeHashMaps.
+        """
+        self._newMap = None if mapType is None else mapFactory(mapType)
+        self._root = self._Node(False, self._newMap)
 
     #-------------------------- private accessors -------------------------
     def _searchFromNode(self, node, word):
@@ -141,7 +153,7 @@ class CompressedTrie:
         # let's check the index value!
         if index == -1: # O(1)
             # no match found -> create a new node and link it to node, then return
-            newNode = self._Node(True) # O(1)
+            newNode = self._Node(True, self._newMap) # O(1)
             node._children[word] = newNode # O(1)
         elif index == len(word) - 1: # O(1)
             # word completely matched in v_child, add terminator to it and then return 
@@ -151,12 +163,12 @@ class CompressedTrie:
             self._insertFromNode(v_child,word[index+1:]) # at most m, where m is the length of the word
         else:
             # partial match between lable and word until the computed index, restructure the node, add the new one and then return
-            newNode = self._Node(False) # create the newNode
+            newNode = self._Node(False, self._newMap) # create the newNode
             del node._children[k_child] # remove the oldNode from the parent
             node._children[k_child[:index+1]] = newNode # connect the oldParent to the newNode
             newNode._children[k_child[index+1:]] = v_child # connect the newNode to the oldNode
             v_child._endNode = True # add terminator to the oldNode
-            anotherNode = self._Node(True) # create the node with the remaining part of the searched word
+            anotherNode = self._Node(True, self._newMap) # create the node with the remaining part of the searched word
             newNode._children[word[index+1:]] = anotherNode # add the node to the newNode's children
         # Total time complexity: O(d•m) in the worst case
 
@@ -1,5 +1,6 @@
 from TdP_collections.hash_table.probe_hash_map import ProbeHashMap
 from TdP_collections.hash_table.chain_hash_map import ChainHashMap
+from map_factory import mapFactory
 
 class CompressedTrie2:
     """
@@ -9,9 +10,11 @@ class CompressedTrie2:
     ----------
     _root : _Node
         Root node of the Trie.
+    _newMap : callable | None
+        Factory of the maps of the nodes, None for dictionaries.
     """
 
-    __slots__ = '_root' # streamline memory usage
+    __slots__ = '_root', '_newMap' # streamline memory usage
 
     #-------------------------- nested _Node class --------------------------
     
@@ -31,16 +34,25 @@ class CompressedTrie2:
 
         __slots__ = '_children', '_endNode' ,'_occurrenceList' # streamline memory usage
 
-        def __init__(self, endNode = False):
-            self._children = {}
+        def __init__(self, endNode = False, newMap = None):
+            self._children = {} if newMap is None else newMap()
             self._endNode = endNode
-            if self._endNode: self._occurrenceList = {}
+            if self._endNode: self._occurrenceList = {} if newMap is None else newMap()
 
     #------------------------------------------------------------------------
 
-    def __init__(self):
-        """Initialize the Standard Trie, creating an empty trie with just the root."""
-        self._root = self._Node()
+    def __init__(self, mapType = None):
+        """
+        Initialize the Standard Trie, creating an empty trie with just the root.
+
+        Parameters
+        ----------
+        mapType : str | None
+            Implementation of the children and of the occurrence lists of the nodes (see map_factory.py), 
+            None for dictionaries.
+        """
+        self._newMap = None if mapType is None else mapFactory(mapType)
+        self._root = self._Node(False, self._newMap)
 
     def _lastCommonIndex(self, word, lable):
         minLength = min(len(lable), len(word)) 
@@ -130,17 +142,17 @@ class CompressedTrie2:
                 if index == wordLen - 1:
                     return 
                 elif index == len(k) -1:
-                    searchNode._children[word[index+1:]] = self._Node(True)
+                    searchNode._children[word[index+1:]] = self._Node(True, self._newMap)
                     return
                 elif index != -1:
                     # string partially matched in node v -> I have to restructure the node
-                    newNode = self._Node(False) # create the newNode
+                    newNode = self._Node(False, self._newMap) # create the newNode
                     del searchNode._children[k] # remove the oldNode from the parent
                     searchNode._children[k[:index+1]] = newNode # connect the oldParent to the newNode
                     newNode._children[k[index+1:]] = v # connect the newNode to the oldNode
-                    anotherNode = self._Node(True) # create the node with the remaining part of the searched word
+                    anotherNode = self._Node(True, self._newMap) # create the node with the remaining part of the searched word
                     newNode._children[word[index+1:]] = anotherNode # add the node to the newNode's children
                     return
         if index == -1:
-            searchNode._children[word] = self._Node(True)
+            searchNode._children[word] = self._Node(True, self._newMap)
             return
\ No newline at end of file
@@ -1,5 +1,6 @@
 from TdP_collections.hash_table.probe_hash_map import ProbeHashMap
 from TdP_collections.hash_table.chain_hash_map import ChainHashMap
+from map_factory import mapFactory
 
 class CompressedTrie3:
     """
@@ -9,6 +10,8 @@ class CompressedTrie3:
     ----------
     _root : _Node
         Root of the Compressed Trie.
+    _newMap : callable | None
+        Factory of the maps of the nodes, None for dictionaries.
 
     Methods
     -------
@@ -22,7 +25,7 @@ class CompressedTrie3:
         A public method to insert a given word into the Compressed Trie if it is not present.
     """
 
-    __slots__ = '_root' # streamline memory usage
+    __slots__ = '_root', '_newMap' # streamline memory usage
 
     #-------------------------- nested _Node class --------------------------
     
@@ -43,11 +46,11 @@ class CompressedTrie3:
 
         __slots__ = '_edges', '_endNode' ,'_occurrenceList' # streamline memory usage
 
-        def __init__(self, endNode = False):
+        def __init__(self, endNode = False, newMap = None):
             """Initialize the Node."""
-            self._edges = {}
+            self._edges = {} if newMap is None else newMap()
             self._endNode = endNode
-            if self._endNode: self._occurrenceList = {}
+            if self._endNode: self._occurrenceList = {} if newMap is None else newMap()
 
     #-------------------------- nested _Edge class --------------------------
 
@@ -72,9 +75,18 @@ class CompressedTrie3:
 
     #-------------------------------------------------------------------------
 
-    def __init__(self):
-        """Initialize the Compressed Trie, creating an empty trie with just the root."""
-        self._root = self._Node()
+    def __init__(self, mapType = None):
+        """
+        Initialize the Compressed Trie, creating an empty trie with just the root.
+
+        Parameters
+        ----------
+        mapType : str | None
+            Implementation of the edges and of the occurrence lists of the nodes (see map_factory.py), 
+            None for dictionaries.
+        """
+        self._newMap = None if mapType is None else mapFactory(mapType)
+        self._root = self._Node(False, self._newMap)
 
     def _searchNode(self, word):
         """
@@ -167,7 +179,7 @@ class CompressedTrie3:
                 edge = node._edges[word[index]]
             except KeyError:
                 # not existing key
-                node._edges[word[index]] = self._Edge(self._Node(True),word[index:])
+                node._edges[word[index]] = self._Edge(self._Node(True, self._newMap),word[index:])
                 return
             # already existing key, it is necessary to restructure!
             lable = edge._lable
@@ -175,12 +187,12 @@ class CompressedTrie3:
             for c in word[index:]:
                 if c != lable[i]: break
                 i += 1
-            newEdge = self._Edge(self._Node(),lable[:i]) # create the new edge leading to a new Node
+            newEdge = self._Edge(self._Node(False, self._newMap),lable[:i]) # create the new edge leading to a new Node
             node._edges[word[index]] = newEdge # connect the node to the new edge
             newEdge._targetNode._edges[lable[i]] = edge # connect the old edge to the new node
             edge._lable = lable[i:] # change the lable of the old edge
             if not edge._targetNode._endNode: # make the old node a terminator
                 edge._targetNode._endNode = True 
-                edge._targetNode._occurrenceList = {}
-            anotherEdge = self._Edge(self._Node(True), word[index+i:]) # create a new edge with the remaining part of the word
+                edge._targetNode._occurrenceList = {} if self._newMap is None else self._newMap()
+            anotherEdge = self._Edge(self._Node(True, self._newMap), word[index+i:]) # create a new edge with the remaining part of the word
             newEdge._targetNode._edges[word[index+i]] = anotherEdge # connect the new edge to the new node
@@ -1,3 +1,5 @@
+from map_factory import mapFactory
+
 class CompressedTrie4:
     """
     A class to model a Compressed Trie. 
@@ -6,6 +8,12 @@ class CompressedTrie4:
     ----------
     _root : _Node
         Root of the Compressed Trie.
+    _version : object | None
+        Token identifying the nodes owned by this trie. Nodes owned by another trie (shared
+        with it by fork) are copied before being modified. It is None for a trie which has
+        not been forked from another one.
+    _newMap : callable | None
+        Factory of the children of the nodes, None for dictionaries.
 
     Methods
     -------
@@ -13,13 +21,25 @@ class CompressedTrie4:
         A utility method used by the search and insert methods, to retrieve the last node of the 
         word containing the occurrence list if it is present, or the node in which the 
         insertion has to be done otherwise.
+    searchNode
+        A public method to retrieve the end node of a given word.
     searchWord
         A public method to search a given word into the Compressed Trie.
     insertWord
         A public method to insert a given word into the Compressed Trie, if it is not present.
+    deleteWord
+        A public method to delete a given word from the Compressed Trie, re-compressing its path.
+    fork
+        A public method which returns a copy-on-write copy of the Compressed Trie.
+    items
+        A public generator of all the words of the Compressed Trie with their end nodes.
+    fuzzyItems
+        A public generator of the words of the Compressed Trie within a given edit distance from a word.
+    sortedItems
+        A public generator of the words of the Compressed Trie in lexicographic order, optionally in a range.
     """
 
-    __slots__ = '_root' # streamline memory usage
+    __slots__ = '_root', '_version', '_newMap' # streamline memory usage
 
     #-------------------------- nested _Node class --------------------------
     
@@ -40,24 +60,123 @@ class CompressedTrie4:
             word (values).
         _lable : str
             Content of the node, which is a substring of a word.
+        _positionList : dictionary | None
+            Collection of all the pages (keys) and the sorted positions of the
+            given word inside them (values). It is None until a positional
+            index asks for it.
+        _owner : object | None
+            Version token of the trie which owns the node and can modify it.
+        _champions : tuple | None
+            The first (occurrences, page) pairs of the occurrence list in ranking order, None if they 
+            have not been computed or the occurrence list has been modified since.
+        _postings : Postings | None
+            The occurrence list sorted by page identifier, used by the multi-term ranked retrieval, None 
+            if it has not been computed or the occurrence list has been modified since.
+        _scoped : ScopedPostings | None
+            The occurrence list sorted by URL, used by the scoped searches, None if it has not been 
+            computed or the occurrence list has been modified since.
+        _order : tuple | None
+            The keys of the children in lexicographic order (the terminator first), None if they have 
+            not been sorted or a child has been added since.
         """
 
-        __slots__ = '_children', '_endNode' ,'_occurrenceList', '_lable' # streamline memory usage
+        __slots__ = '_children', '_endNode' ,'_occurrenceList', '_lable', '_positionList', '_owner', '_champions', '_postings', '_scoped', '_order' # streamline memory usage
 
-        def __init__(self, lable, endNode = False):
+        def __init__(self, lable, endNode = False, owner = None, newMap = None):
             """Initialize the Node."""
-            self._children = {}
+            self._children = {} if newMap is None else newMap()
             self._endNode = endNode
             self._lable = lable
-            if self._endNode: self._occurrenceList = {}
+            self._owner = owner
+            self._order = None
+            if self._endNode: 
+                self._occurrenceList = {}
+                self._positionList = None
+                self._champions = None
+                self._postings = None
+                self._scoped = None
+
+        def _copy(self, owner, newMap = None):
+            """
+            Returns a copy of the node owned by owner: the children are shared, while the occurrence
+            and position lists are copied, since the owner will modify them.
+
+            TIME COMPLEXITY
+            ---------------
+            O(c + p)
+                Where c is the number of children and p the size of the occurrence and position lists.
+            """
+            node = type(self)(self._lable, self._endNode, owner, newMap)
+            if newMap is None:
+                node._children = dict(self._children)
+            else:
+                for key, child in self._children.items():
+                    node._children[key] = child
+            node._order = self._order # the keys of the children are the same
+            if self._endNode:
+                node._occurrenceList = dict(self._occurrenceList)
+                node._champions = self._champions # never modified, only replaced
+                node._postings = self._postings
+                node._scoped = self._scoped
+                if self._positionList is not None:
+                    node._positionList = {page: positions[:] for page, positions in self._positionList.items()}
+            return node
 
     #-------------------------------------------------------------------------
 
-    def __init__(self):
-        """Initialize the Compressed Trie, creating an empty trie with just the root."""
-        self._root = self._Node("")
+    def __init__(self, mapType = None):
+        """
+        Initialize the Compressed Trie, creating an empty trie with just the root.
 
-    def _searchNode(self, word: str):
+        Parameters
+        ----------
+        mapType : str | None
+            Implementation of the children of the nodes (see map_factory.py), None for dictionaries. The 
+            occurrence lists are always dictionaries.
+        """
+        self._version = None
+        self._newMap = None if mapType is None else mapFactory(mapType)
+        self._root = self._Node("", False, None, self._newMap)
+
+    def fork(self):
+        """
+        A public method which returns a copy-on-write copy of the Compressed Trie: the two tries share 
+        all their nodes, and the new one copies each node (and the path from the root to it) the first 
+        time it modifies it. The current trie must not be modified anymore, so that it can be read 
+        while the new one is being modified.
+
+        Returns
+        -------
+        CompressedTrie4
+            The new trie.
+
+        TIME COMPLEXITY
+        ---------------
+        O(c)
+            Where c is the number of children of the root, which is the only node copied.
+        """
+        other = type(self)()
+        other._version = object()
+        other._newMap = self._newMap
+        other._root = self._root._copy(other._version, self._newMap)
+        return other
+
+    def _ownChild(self, parent, key):
+        """
+        A utility method which returns the child of the owned node parent having the given key, 
+        replacing it with an owned copy if it is not owned by the current trie.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1) if the child is owned, the time of its copy otherwise.
+        """
+        child = parent._children[key]
+        if child._owner is not self._version:
+            child = child._copy(self._version, self._newMap)
+            parent._children[key] = child
+        return child
+
+    def _searchNode(self, word: str, update = False):
         """
         A utility method used by the search and insert methods, to retrieve the last node of the 
         word containing the occurrence list if it is present, or the node in which the 
@@ -67,6 +186,9 @@ class CompressedTrie4:
         ----------
         word : str
             The word to be searched into the trie.
+        update : bool
+            If True, the visited nodes are made owned by the current trie, since they will
+            be modified.
 
         Returns
         -------
@@ -93,6 +215,7 @@ class CompressedTrie4:
             except KeyError:
                 # not existing key
                 return prev, i
+            if update and node._owner is not self._version: node = self._ownChild(prev, word[i])
             # existing key
             lableLen = len(node._lable)
             if node._lable != word[i:i+lableLen]:
@@ -101,6 +224,30 @@ class CompressedTrie4:
             i += lableLen # update the counter
         return node, i 
 
+    def searchNode(self, word: str):
+        """
+        A public method to retrieve the end node of a given word, which holds all the 
+        information stored for it (occurrence list, position list).
+
+        Parameters
+        ----------
+        word : str
+            The word to be searched into the trie.
+
+        Returns
+        -------
+        _Node | None
+            The end node of the word if it is present, None otherwise.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(word)) expected and amortized
+            It is the same of the _searchNode method which is called inside.
+        """
+        word += '$'
+        node = self._searchNode(word)[0]
+        return node if node._endNode else None
+
     def searchWord(self, word: str):
         """
         A public method to search a given word into the Compressed Trie.
@@ -120,9 +267,8 @@ class CompressedTrie4:
         O(len(word)) expected and amortized
             It is the same of the _searchNode method which is called inside.
         """
-        word += '$'
-        node = self._searchNode(word)[0]
-        return node._occurrenceList if node._endNode else None
+        node = self.searchNode(word)
+        return node._occurrenceList if node is not None else None
 
     def insertWord(self, word: str):
         """
@@ -133,6 +279,12 @@ class CompressedTrie4:
         word : str
             The word to be searched into the trie.
 
+        Returns
+        -------
+        _Node
+            The end node of the word, both if it has just been created and if it was 
+            already present.
+
         TIME COMPLEXITY
         ---------------
         O(len(word)) expected and amortized
@@ -141,17 +293,20 @@ class CompressedTrie4:
             in the worst case the remaining part of the word is iterated, so that it reaches 
             the complexity of O(len(word)). It is expected and amortized due to the O(1) 
             expected and amortixed operations in the _children dictionary.
+            In a forked trie, the first insertion along a path also pays the copy of the nodes 
+            of the path which are still shared.
         """
         word += '$'
-        node, index = self._searchNode(word)
+        node, index = self._searchNode(word, True)
         if index < len(word) :
             prev = node # previous node
             try:
-                node = node._children[word[index]]
+                node = self._ownChild(node, word[index])
             except KeyError:
                 # not existing key
-                node._children[word[index]] = self._Node(word[index:],True)
-                return
+                node._children[word[index]] = self._Node(word[index:],True,self._version,self._newMap)
+                node._order = None # a new key has been added
+                return node._children[word[index]]
             # already existing key, it is necessary to restructure!
             lable = node._lable
             i = 0
@@ -160,9 +315,214 @@ class CompressedTrie4:
                 if c != lable[i]: break
                 i += 1
             # RESTRUCTURE
-            newNode = self._Node(lable[:i]) # create the new node with the substring common to both the lable and the word
+            newNode = self._Node(lable[:i],False,self._version,self._newMap) # create the new node with the substring common to both the lable and the word
             prev._children[word[index]] = newNode # replace node with newNode in the children of node's parent
             newNode._children[lable[i]] = node # insert node in newNode's children
             node._lable = lable[i:] # change the lable of node
-            anotherNode = self._Node(word[index+i:],True) # create another node with the remaining part of the word
+            anotherNode = self._Node(word[index+i:],True,self._version,self._newMap) # create another node with the remaining part of the word
             newNode._children[word[index+i]] = anotherNode # insert the last created node in newNode's children
+            return anotherNode
+        return node
+
+    def deleteWord(self, word: str):
+        """
+        A public method to delete a given word from the Compressed Trie, together with its end node. The 
+        trie is kept compressed: a node left without children is removed too (unless it is the root), and 
+        a node which is not an end node and is left with a single child is merged with it, concatenating 
+        their lables, so that after any sequence of insertions and deletions the trie has the same shape 
+        it would have if only the remaining words had been inserted.
+
+        Parameters
+        ----------
+        word : str
+            The word to be deleted from the trie.
+
+        Returns
+        -------
+        bool
+            True if the word has been deleted, False if it was not present.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(word)) expected and amortized
+            The path of the word is visited once to find it and once to modify it. In a forked trie, the 
+            nodes of the path which are still shared are copied, as for insertWord.
+        """
+        word += '$'
+        keys = [] # keys of the nodes of the path, from the child of the root to the end node
+        node = self._root
+        i = 0
+        while i < len(word):
+            try:
+                node = node._children[word[i]]
+            except KeyError:
+                return False
+            if node._lable != word[i:i+len(node._lable)]: return False
+            keys.append(word[i])
+            i += len(node._lable)
+        if not node._endNode: return False
+        # the path is made owned only now, so that the deletion of an absent word copies nothing
+        path = [self._root]
+        for key in keys:
+            path.append(self._ownChild(path[-1], key))
+        node = path.pop()
+        if node._children:
+            # only possible if the word is a prefix of a word containing the terminator
+            node._endNode = False
+            node._occurrenceList = node._positionList = node._champions = node._postings = node._scoped = None
+            path.append(node)
+        else:
+            parent = path[-1]
+            del parent._children[keys.pop()]
+            parent._order = None
+        # re-compression of the deepest node of the path which has lost a child
+        while len(path) > 1:
+            node = path.pop()
+            if node._endNode: break
+            parent = path[-1]
+            key = keys.pop()
+            if not node._children:
+                del parent._children[key]
+                parent._order = None
+                continue
+            if len(node._children) == 1:
+                childKey = next(iter(node._children))
+                child = self._ownChild(node, childKey)
+                child._lable = node._lable + child._lable
+                parent._children[key] = child # the key is the first character of both the lables
+            break
+        return True
+
+    def items(self):
+        """
+        A public generator of all the words of the Compressed Trie, with their end nodes, in no 
+        particular order.
+
+        Yields
+        ------
+        (str, _Node)
+            A word (without the terminator) and its end node.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            Where n is the total length of the lables, since each node is visited once with an
+            explicit stack.
+        """
+        stack = [(self._root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            prefix += node._lable
+            if node._endNode: yield prefix[:-1], node
+            for child in node._children.values():
+                stack.append((child, prefix))
+
+    @staticmethod
+    def _orderKey(key):
+        """Utility method which returns the sort key of a child key: the terminator comes before any character."""
+        return (key != '$', key)
+
+    def _sortedKeys(self, node):
+        """
+        A utility method which returns the keys of the children of a node in lexicographic order, sorting 
+        them only the first time they are needed after a child has been added.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1) if the keys are already sorted, O(c•log(c)) otherwise
+            Where c is the number of children of the node.
+        """
+        order = node._order
+        if order is None:
+            order = node._order = tuple(sorted(node._children, key = self._orderKey))
+        return order
+
+    def sortedItems(self, low: str = None, high: str = None):
+        """
+        A public generator of the words of the Compressed Trie in lexicographic order, with their end 
+        nodes, restricted to the words w such that low <= w < high. The trie is visited depth-first, 
+        visiting the children of each node in the order of their keys, and the subtrees whose words are 
+        all outside the range are skipped: since all the words of a subtree start with the same prefix, 
+        they are all smaller than low if the prefix is smaller than low and is not a prefix of it, and 
+        the visit ends as soon as a prefix is not smaller than high.
+
+        Parameters
+        ----------
+        low : str | None
+            Smallest word of the range (included), None for no lower bound.
+        high : str | None
+            Bound of the range (excluded), None for no upper bound.
+
+        Yields
+        ------
+        (str, _Node)
+            A word (without the terminator) and its end node.
+
+        TIME COMPLEXITY
+        ---------------
+        O(h•c + m)
+            Where h is the height of the trie, c the largest number of children of a node and m the total 
+            length of the lables of the subtrees in the range. The children of each visited node are sorted 
+            the first time they are visited after a change.
+        """
+        stack = [(self._root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            prefix += node._lable
+            if node._endNode:
+                word = prefix[:-1]
+                if high is not None and word >= high: return
+                if low is None or word >= low: yield word, node
+            else:
+                if high is not None and prefix >= high: return
+                if low is not None and prefix < low and not low.startswith(prefix): continue
+            children = node._children
+            for key in reversed(self._sortedKeys(node)):
+                stack.append((children[key], prefix))
+
+    def fuzzyItems(self, word: str, maxEdits: int):
+        """
+        A public generator of all the words of the Compressed Trie whose Levenshtein distance from the 
+        given word is at most maxEdits, with their end nodes. The trie is visited depth-first and each 
+        character of a lable extends the row of the edit distances of the current prefix from all the 
+        prefixes of the word; a branch is pruned as soon as the minimum of the row exceeds maxEdits, since 
+        the distance can not decrease anymore along it.
+
+        Parameters
+        ----------
+        word : str
+            The (possibly misspelled) word.
+        maxEdits : int
+            Maximum number of insertions, deletions and substitutions.
+
+        Yields
+        ------
+        (str, _Node, int)
+            A word (without the terminator), its end node and its distance from the given word.
+
+        TIME COMPLEXITY
+        ---------------
+        O(v•len(word))
+            Where v is the number of characters of the lables visited before the pruning, which depends 
+            on maxEdits and not on the size of the vocabulary.
+        """
+        length = len(word)
+        stack = [(self._root, "", list(range(length + 1)))]
+        while stack:
+            node, prefix, row = stack.pop()
+            for child in node._children.values():
+                lable = child._lable
+                last = len(lable) - 1
+                current = row
+                for i, c in enumerate(lable):
+                    if i == last and child._endNode:
+                        # terminator of the word
+                        if current[length] <= maxEdits: yield prefix + lable[:-1], child, current[length]
+                        break
+                    previous = current
+                    current = [previous[0] + 1]
+                    for j in range(1, length + 1):
+                        current.append(min(current[j-1] + 1, previous[j] + 1, previous[j-1] + (word[j-1] != c)))
+                    if min(current) > maxEdits: break
+                else:
+                    stack.append((child, prefix + lable, current))
@@ -0,0 +1,77 @@
+import os
+import json
+import tempfile
+from threading import Thread
+from engine import SearchEngine, NOOccurrenceListException
+from ingestion import DirectorySource
+
+DIR = "dataset"
+BATCHES = 8
+READERS = 8
+KEYWORDS = ["algorithm", "design", "data", "structure", "ingegneria", "soppressa"]
+
+# split the pages of DIR in batches, each written in a JSONL file
+tmp = tempfile.mkdtemp()
+records = list(DirectorySource(DIR))
+paths = []
+for b in range(BATCHES):
+    path = os.path.join(tmp, "batch%d.jsonl" % b)
+    with open(path, "w") as out:
+        for url, content in records[b::BATCHES]:
+            out.write(json.dumps({"url": url, "content": content}) + "\n")
+    paths.append(path)
+
+se = SearchEngine(paths[0], snapshots=True)
+base = se.getGeneration()
+observed = [] # (generation, keyword, k, output) seen by the readers
+errors = []
+done = False
+
+def writer():
+    global done
+    for path in paths[1:]:
+        se.ingest(path)
+    done = True
+
+def reader(n):
+    i = n
+    while not done:
+        keyword = KEYWORDS[i % len(KEYWORDS)]
+        k = 1 + i % 10
+        try:
+            before = se.getGeneration()
+            try:
+                out = se.search(keyword, k)
+            except NOOccurrenceListException:
+                out = None
+            after = se.getGeneration()
+            # if no generation has been published meanwhile, the output must be the one of that generation
+            if before == after: observed.append((before - base, keyword, k, out))
+        except Exception as e:
+            errors.append(repr(e))
+        i += 1
+
+threads = [Thread(target=writer)] + [Thread(target=reader, args=(n,)) for n in range(READERS)]
+for t in threads: t.start()
+for t in threads: t.join()
+
+# replay the batches with a single thread and compare each observed output with the expected one
+expected = {}
+replay = SearchEngine(paths[0])
+for generation, path in enumerate(paths):
+    if generation > 0: replay.ingest(path)
+    for keyword in KEYWORDS:
+        for k in range(1, 11):
+            try:
+                expected[generation, keyword, k] = replay.search(keyword, k)
+            except NOOccurrenceListException:
+                expected[generation, keyword, k] = None
+
+wrong = [o for o in observed if expected[o[0], o[1], o[2]] != o[3]]
+if errors or wrong:
+    print("FAIL")
+    print(errors[:5])
+    print(len(wrong), "wrong outputs out of", len(observed))
+else:
+    print("True")
+    print(len(observed), "consistent reads across", se.getGeneration() + 1, "generations")
@@ -1,23 +1,55 @@
-import os
+import heapq
+from array import array
+from sys import intern
+from hashlib import blake2b
+from collections import namedtuple, OrderedDict
+from threading import Lock
 from TdP_collections.map.red_black_tree import RedBlackTreeMap
 from max_oriented_heap import MaxOrientedPriorityQueue
 from TdP_collections.hash_table.probe_hash_map import ProbeHashMap
 from compressed_trie_4 import CompressedTrie4
+from ingestion import IngestionSource, ContentReference, openSource
+from minhash import NearDuplicateDetector
+from pruning import Postings, blockMaxTopK, exhaustiveTopK
+from scoped_postings import ScopedPostings
+from external_merge import SpillingIndexBuilder
+from bloom_filter import BloomFilter
+from map_factory import mapFactory
 
 class Element:
     """ 
     A class used to model both directories and webpages. 
 
+    The representation is compact, since a WebSite can contain millions of Elements whose URLs share long 
+    prefixes: the name is stored only once, as the key of the Element in the content of its parent directory 
+    (the swapcase of the name, interned, so that the same names of different directories share it), and 
+    the URL of a page is not stored but rebuilt on demand from the names of its ancestors, which are reached 
+    through the parent pointers. The last rebuilt URLs are cached by the WebSite of the pages, and the hash of 
+    the URL is kept, so that the pages can be used as keys of the occurrence lists without rebuilding their URLs.
+
     Attributes
     ----------
-    _name : str
-        Name of the Element.
-    _content : str | RedBlackTreeMap
-        Content of the Element.
-    _website : WebSite
-        Website to which the Element belongs.
-    _url : str | None
-        URL of the Element.
+    _key : str
+        Key of the Element in its parent directory: the interned swapcase of its name.
+    _name : str | None
+        Name of the Element, None if it is the swapcase of the key (it is stored only for the few names, 
+        like 'ß', which swapcase can not restore).
+    _content : str | ContentReference | RedBlackTreeMap
+        Content of the Element. The content of a page can be a reference to its text
+        in a file, which is loaded on demand. The content of a directory is the map of its Elements.
+    _parent : Element | WebSite | None
+        Directory containing the Element, or the WebSite to which the Element belongs if it has not 
+        been inserted in a directory (e.g. the root directory).
+    _url : str | bool | None
+        URL of the Element: True if it is rebuilt from the names of the ancestors, None if the 
+        Element has no URL.
+    _hash : int
+        Hash of the URL of the Element.
+    _isPage : bool
+        True if the Element is a page, False if it is a directory.
+    _fingerprint : int | None
+        Identifier of the structure of the directory in its WebSite's SubtreeTable, None 
+        if it has not been computed yet or the directory has changed since then.
 
     Methods
     -------
@@ -29,6 +61,8 @@ class Element:
         Returns the url of the Element, if present.
     getContent()
         Returns the content of the Element.
+    isPage()
+        Returns True if the Element is a page, False if it is a directory.
     insertElementIntoDir()
         Inserts a given element into the current directory (if the Element is a directory).
     setPageContent()
@@ -37,7 +71,7 @@ class Element:
         Sets the url of the current element.
     """
 
-    __slots__ = ['_name','_content','_website','_url']
+    __slots__ = ['_key', '_name', '_content', '_parent', '_url', '_hash', '_isPage', '_fingerprint']
 
     def __init__(self, website, name, content = None, url = None):
         """
@@ -49,24 +83,27 @@ class Element:
             The WebSite which the Element belongs to.
         name : str
             Name of the Element.
-        content : str | None
+        content : str | ContentReference | None
             Content of the page, if passed as parameter.
         url : str | None
             URL of the page, if passed as parameter.
         """
-
-        self._name = name
+        key = name.swapcase()
+        self._key = intern(key)
+        self._name = None if key.swapcase() == name else name
+        self._parent = website
         self._url = url
+        self._hash = hash(url)
+        self._fingerprint = None
+        self._isPage = content is not None
 
-        if content is not None : 
+        if self._isPage: 
             # page
             self._content = content 
         else:
             # directory
             self._content = RedBlackTreeMap()
 
-        self._website = website
-
     def getWebSite(self):
         """ 
         Public accessor method.
@@ -78,9 +115,13 @@ class Element:
 
         TIME COMPLEXITY
         ---------------
-        O(1)
+        O(l)
+            Where l is the number of ancestors of the Element, which are visited up to the root.
         """
-        return self._website
+        elem = self
+        while elem._parent.__class__ is Element:
+            elem = elem._parent
+        return elem._parent
 
     def getName(self):
         """
@@ -93,9 +134,25 @@ class Element:
         
         TIME COMPLEXITY
         ---------------
-        O(1)
+        O(len(name))
+            The name is restored from the key.
+        """
+        return self._key.swapcase() if self._name is None else self._name
+
+    def __pathUrl(self):
+        """
+        Utility method which returns the URL made of the names of the Element and of its ancestors, 
+        None if the Element is not inside a directory.
         """
-        return self._name
+        names = []
+        elem = self
+        while elem._parent.__class__ is Element:
+            names.append(elem.getName())
+            elem = elem._parent
+        if not names: return None
+        names.append(elem.getName()) # the root directory is named after the host
+        names.reverse()
+        return '/'.join(names)
 
     def getUrl(self):
         """
@@ -113,11 +170,17 @@ class Element:
 
         TIME COMPLEXITY
         ---------------
-        O(1)
+        O(l) expected if the URL is cached, O(len(url)) otherwise
+            Where l is the number of ancestors of the Element, which are visited to reach the cache of 
+            its WebSite. Otherwise the URL is rebuilt from the names of the ancestors.
         """
-        if self._url is None: 
+        url = self._url
+        if url is None: 
             raise URLNotFoundException("There's no URL in the current Element")
-        return self._url 
+        if url is not True: return url
+        website = self.getWebSite()
+        if website is None: return self.__pathUrl()
+        return website._cachedUrl(self, self.__pathUrl)
 
     def getContent(self):
         """
@@ -126,14 +189,32 @@ class Element:
         Returns 
         -------
         str | RedBlackTreeMap
-            The content of the Element.
+            The content of the Element. If the content of a page is a reference to
+            its text, the text is loaded.
 
         TIME COMPLEXITY
         ---------------
         O(1)
+            O(len(content)) if the text has to be loaded.
         """
+        if self._isPage and type(self._content) == ContentReference: return self._content.load()
         return self._content
 
+    def isPage(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        bool
+            True if the current Element is a page, False if it is a directory.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1)
+        """
+        return self._isPage
+
     def insertElementIntoDir(self, elem):
         """
         Public mutator method.
@@ -155,17 +236,18 @@ class Element:
             Since it is necessary to insert in a RedBlackTreeMap and its insertion is in
             the O(log(k)) order, if k is the number of Elements contained in the directory.
         """
-        if type(self.getContent()) == RedBlackTreeMap: self._content[elem._name.swapcase()] = elem
-        else: raise NotADirectoryException(self._name + " is not a directory.")
+        if self.isPage(): raise NotADirectoryException(self.getName() + " is not a directory.")
+        self._content[elem._key] = elem
+        elem._parent = self
 
-    def setPageContent(self, content: str):
+    def setPageContent(self, content):
         """
         Public mutator method.
         If the current Element is a page, this method updates its text content field.
 
         Parameters
         ----------
-        content : str
+        content : str | ContentReference
             Sets the content of the current Element if it is a page.
 
         Raises
@@ -177,8 +259,8 @@ class Element:
         ---------------
         O(1)
         """
-        if type(self.getContent()) == str: self._content = content
-        else: raise NotAPageException(self._name + " is not a page.")
+        if self.isPage(): self._content = content
+        else: raise NotAPageException(self.getName() + " is not a page.")
 
     def setUrl(self, url: str):
         """
@@ -187,37 +269,52 @@ class Element:
         Parameters
         ----------
         url : str
-            Sets the url of the current Element.
+            Sets the url of the current Element. If it is the one made of the names of the Element 
+            and of its ancestors, as for the pages inserted by WebSite.insertPage, it is not stored.
 
         TIME COMPLEXITY
         ---------------
-        O(1)
+        O(len(url))
         """
-        self._url = url
+        website = self.getWebSite()
+        if website is not None: website._urls.pop(self, None) # before rehashing, since it is found by its old hash
+        self._hash = hash(url)
+        self._url = True if url is not None and url == self.__pathUrl() else url
+
+    def __urlOrNone(self):
+        """Utility method which returns the URL of the Element, None if it has not one."""
+        return None if self._url is None else self.getUrl()
+
+    def __uncachedUrl(self):
+        """
+        Utility method which returns the URL of the Element, None if it has not one, without looking it 
+        up in the cache of the WebSite, whose lookups compare the pages with the same hash.
+        """
+        return self.__pathUrl() if self._url is True else self._url
 
     # ----------------- Elements comparison methods -----------------
 
     def __eq__(self,other):
-        return self._url == other._url
+        return self is other or self.__uncachedUrl() == other.__uncachedUrl()
 
     def __ne__(self,other):
         return not (self == other)
 
     def __lt__(self,other):
-        return self._url < other._url
+        return self.__urlOrNone() < other.__urlOrNone()
 
     def __le__(self,other):
-        return self._url <= other._url
+        return self.__urlOrNone() <= other.__urlOrNone()
 
     def __gt__(self,other):
-        return self._url > other._url
+        return self.__urlOrNone() > other.__urlOrNone()
 
     def __ge__(self,other):
-        return self._url >= other._url
+        return self.__urlOrNone() >= other.__urlOrNone()
 
     # --------------------------- hash -------------------------------
     def __hash__(self) -> int:
-        return hash(self._url)
+        return self._hash
 
 # ---------------------- Exception classes ---------------------------
 
@@ -245,6 +342,221 @@ class URLNotFoundException(Exception):
 class NOOccurrenceListException(Exception):
     pass
 
+class NOPositionListException(Exception):
+    pass
+
+# --------------------------------------------------------------------
+
+class SubtreeTable:
+    """
+    A hash-consing table of directory structures, which can be shared by many WebSites. The structure 
+    of a directory is the tuple of the (key, structure identifier) pairs of its Elements in order, where 
+    the key is the one of the Element in the directory (followed by the name, in the rare case that it 
+    can not be restored by swapcase) and the identifier is None for pages: structurally identical 
+    subtrees, even of different WebSites, get the same identifier, so that their rendering is built and 
+    stored only once.
+
+    The rendering of a structure is kept as a fragment, a rope whose pieces are either the lines of 
+    consecutive pages or references to the fragments of the subdirectories. Since the structures are 
+    immutable, a fragment is never invalidated: after the insertion of a page, only the directories 
+    along its path get a new structure, and so a new fragment, while the fragments of all the other 
+    subdirectories are reused. The whole string is joined from the rope only when it is requested.
+
+    Attributes
+    ----------
+    _ids : dictionary
+        Collection of the identifiers (values) of each structure (keys).
+    _structures : list
+        Collection of the structures, by identifier.
+    _fragments : dictionary
+        Collection of the fragments (values) of each (identifier, number of dashes) pair (keys): tuples 
+        of strings and of the (identifier, number of dashes) keys of the fragments of the subdirectories.
+    _renderings : dictionary
+        Collection of the rendered strings (values) of the (identifier, number of dashes) pairs (keys) 
+        which have been requested as a whole.
+
+    Methods
+    -------
+    intern
+        Returns the identifier of a structure.
+    getFragment
+        Returns the fragment of a structure.
+    getRendering
+        Returns the string describing a structure.
+    iterRendering
+        Generator of the pieces of the string describing a structure.
+    """
+
+    __slots__ = ['_ids', '_structures', '_fragments', '_renderings']
+
+    def __init__(self):
+        """Creates a new empty SubtreeTable."""
+        self._ids = {}
+        self._structures = []
+        self._fragments = {}
+        self._renderings = {}
+
+    def intern(self, structure):
+        """
+        Returns the identifier of the given structure, adding it to the table if it is not present.
+
+        Parameters
+        ----------
+        structure : tuple
+            The (key, structure identifier | None) pairs of the Elements of a directory.
+
+        Returns
+        -------
+        int
+            The identifier of the structure.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(structure)) expected
+            The time to hash the structure.
+        """
+        try:
+            return self._ids[structure]
+        except KeyError:
+            id = len(self._structures)
+            self._ids[structure] = id
+            self._structures.append(structure)
+            return id
+
+    def getFragment(self, id, n):
+        """
+        Returns the fragment of the structure with the given identifier, where the Elements of the first 
+        level are preceded by n dashes: the lines of consecutive pages are joined in a single string, and 
+        each subdirectory is referenced by the (identifier, n+3) key of its own fragment.
+
+        Parameters
+        ----------
+        id : int
+            Identifier of the structure.
+        n : int
+            Number of dashes of the first level.
+
+        Returns
+        -------
+        tuple
+            The pieces of the fragment.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1) expected if the fragment is cached, O(f) otherwise
+            Where f is the number of Elements of the directory (its fan-out): the fragments of the 
+            subdirectories are only referenced.
+        """
+        try:
+            return self._fragments[id, n]
+        except KeyError:
+            pass
+        pieces = []
+        lines = []
+        fragments = self._fragments
+        for entry in self._structures[id]:
+            key, child = entry[0], entry[1]
+            lines.append('-' * n + ' ' + (key.swapcase() if len(entry) == 2 else entry[2]) + '\n')
+            if child is not None:
+                pieces.append(''.join(lines))
+                lines = []
+                fragment = fragments.get((child, n+3))
+                if fragment is not None and len(fragment) == 1 and fragment[0].__class__ is str:
+                    pieces.append(fragment[0]) # a directory of pages only is referenced by its string
+                else:
+                    pieces.append((child, n+3))
+        if lines: pieces.append(''.join(lines))
+        fragment = self._fragments[id, n] = tuple(pieces)
+        return fragment
+
+    def getRendering(self, id, n):
+        """
+        Returns the string describing the structure with the given identifier, in the format of 
+        WebSite.getSiteString, where the Elements of the first level are preceded by n dashes.
+
+        Parameters
+        ----------
+        id : int
+            Identifier of the structure.
+        n : int
+            Number of dashes of the first level.
+
+        Returns
+        -------
+        str
+            The rendering of the structure.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1) expected if the rendering is cached, O(d•f + n) otherwise
+            Only the d directories whose structure is new need a new fragment, each built in time 
+            proportional to its fan-out f; then the string is joined once from the rope, copying 
+            each of its n characters once.
+        """
+        try:
+            return self._renderings[id, n]
+        except KeyError:
+            pass
+        parts = []
+        fragments = self._fragments
+        stack = [iter(self.getFragment(id, n))]
+        while stack:
+            for piece in stack[-1]:
+                if piece.__class__ is str:
+                    parts.append(piece)
+                    continue
+                fragment = fragments.get(piece)
+                if fragment is None: fragment = self.getFragment(*piece)
+                stack.append(iter(fragment))
+                break # continue from the subdirectory
+            else:
+                stack.pop()
+        rendering = self._renderings[id, n] = ''.join(parts)
+        return rendering
+
+    def iterRendering(self, id, n):
+        """
+        Generator of the pieces of the same string returned by getRendering, visiting the rope of the 
+        fragments, so that the rendering of a huge structure is never held in memory as a whole. The 
+        renderings which are already cached are yielded at once.
+
+        Parameters
+        ----------
+        id : int
+            Identifier of the structure.
+        n : int
+            Number of dashes of the first level.
+
+        Returns
+        -------
+        generator
+            The pieces of the rendering, each made of whole lines.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            The fragments are visited with an explicit stack, which holds at most one iterator per level, 
+            so the depth of the structure is not limited by the recursion limit.
+        """
+        try:
+            yield self._renderings[id, n]
+            return
+        except KeyError:
+            pass
+        stack = [iter(self.getFragment(id, n))]
+        while stack:
+            for piece in stack[-1]:
+                if piece.__class__ is str:
+                    yield piece
+                    continue
+                try:
+                    yield self._renderings[piece]
+                except KeyError:
+                    stack.append(iter(self.getFragment(*piece)))
+                    break # continue from the subdirectory
+            else:
+                stack.pop()
+
 # --------------------------------------------------------------------
 
 class WebSite:
@@ -257,6 +569,10 @@ class WebSite:
         Element representing the root directory of the WebSite.
     _index : Element
         Element representing the home page of the WebSite.
+    _subtrees : SubtreeTable
+        Table in which the structures of the directories are interned, possibly shared with other WebSites.
+    _urls : dict
+        Cache of the URLs (values) rebuilt for the last pages of the WebSite (keys), emptied when it is full.
 
     Methods
     -------
@@ -272,21 +588,33 @@ class WebSite:
         Inserts a new directory in the current directory.
     __newPage
         Inserts a new page into the current directory.
-    __composeSiteString
-        Utility recursive method to build the site description string.
+    __fingerprint
+        Utility method which interns the structure of a directory.
     getHomePage
         Returns the home page (Element) of the WebSite.
     getSiteString
         Returns a string showing the structure of the website.
+    iterSiteString
+        Generator of the pieces of the string showing the structure of the website.
+    writeSiteString
+        Writes the string showing the structure of the website to a file-like object.
+    getHost
+        Returns the host of the website.
+    getStructureId
+        Returns the identifier of the current structure of the website in its SubtreeTable.
     insertPage
         Saves and returns a new page Element of the WebSite.
     getSiteFromPage
         Returns the WebSite which a given page Element belongs to.
+    _cachedUrl
+        Returns the cached URL of a page of the WebSite, rebuilding it if it is not cached.
     """
 
-    __slots__ = ['_root', '_index']
+    __slots__ = ['_root', '_index', '_subtrees', '_urls']
+
+    _URL_CACHE_SIZE = 65536
 
-    def __init__(self, host):
+    def __init__(self, host, subtrees = None):
         """
         Creates a new WebSite object for saving the website hosted at host, where host is a string.
     
@@ -294,6 +622,8 @@ class WebSite:
         ----------
         host : str
             Represents the host of the current WebSite.
+        subtrees : SubtreeTable | None
+            Table of the directory structures to share with other WebSites. If None, a new one is created.
 
         TIME COMPLEXITY 
         ---------------
@@ -301,6 +631,27 @@ class WebSite:
         """
         self._root = Element(self, host) 
         self._index = None 
+        self._subtrees = subtrees if subtrees is not None else SubtreeTable()
+        self._urls = {}
+
+    def _cachedUrl(self, page, rebuild):
+        """
+        Utility method which returns the URL of a page of the WebSite from the cache, or the one 
+        returned by rebuild, which is then cached. The cache is emptied when it is full.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1) expected if the URL is cached, O(rebuild) otherwise
+        """
+        urls = self._urls
+        try:
+            return urls[page]
+        except KeyError:
+            pass
+        url = rebuild()
+        if len(urls) >= WebSite._URL_CACHE_SIZE: urls.clear()
+        urls[page] = url
+        return url
 
     def __isDir(self, elem): 
         """
@@ -321,7 +672,7 @@ class WebSite:
         ---------------
         O(1)
         """
-        return type(elem.getContent()) == RedBlackTreeMap
+        return not elem.isPage()
 
     def __isPage(self, elem):
         """
@@ -342,7 +693,7 @@ class WebSite:
         ---------------
         O(1)
         """
-        return type(elem.getContent()) == str
+        return elem.isPage()
 
     def __hasDir(self, ndir, cdir):
         """
@@ -522,38 +873,42 @@ class WebSite:
             cdir.insertElementIntoDir(pag)
         return pag
 
-    def __composeSiteString(self, cdir: Element, n: int):
+    def __fingerprint(self, cdir: Element):
         """
-        Recursive utility method whose aim is to build the string which describes the 
-        structure of the site.
+        Utility method which returns the identifier of the structure of the directory cdir in the 
+        SubtreeTable, interning it if it has changed since the last call. The changed subdirectories 
+        are interned first, in order, visiting them with an explicit stack instead of recursion, so 
+        that the depth of the WebSite is not limited by the recursion limit.
 
         Parameters
         ----------
-        cdir : Elem
-            Directory of which describing the content.
-        n : int
-            Number of dashes to be inserted in a level.
+        cdir : Element
+            Directory of which computing the identifier.
 
         Returns
         -------
-        str 
-            String describing the structure of the WebSite.
+        int
+            The identifier of the structure of cdir.
 
         TIME COMPLEXITY 
         ---------------
-        O(n)
-            Each node of each directory's content is only visited once, so the total amount 
-            of time spent is proportional to the number of nodes.
-        """
-        s = ""
-        iter = cdir.getContent().inorder()
-        for p in iter:
-            s += '-' * n
-            el = p.value()
-            s += ' ' + el.getName() + '\n'
-            if self.__isDir(el): 
-                s += self.__composeSiteString(el, n+3)
-        return s
+        O(1) if the directory has not changed, O(n) otherwise
+            Only the directories changed since the last call (the ones along the paths of the inserted 
+            pages) are visited again, each taking time proportional to the number of its Elements.
+        """
+        stack = [cdir] if cdir._fingerprint is None else []
+        while stack:
+            dir = stack[-1]
+            elements = [p.value() for p in dir.getContent().inorder()]
+            changed = [el for el in elements if self.__isDir(el) and el._fingerprint is None]
+            if changed:
+                stack.extend(reversed(changed)) # the first one is interned first
+                continue
+            structure = tuple((el._key, el._fingerprint if self.__isDir(el) else None) if el._name is None
+                              else (el._key, el._fingerprint if self.__isDir(el) else None, el._name) for el in elements)
+            dir._fingerprint = self._subtrees.intern(structure)
+            stack.pop()
+        return cdir._fingerprint
 
     def getHomePage(self):
         """
@@ -590,11 +945,83 @@ class WebSite:
         TIME COMPLEXITY 
         ---------------
         O(n)
-            It calls the __composeSiteString utility method, which takes time O(n) and
-            then appends the resulting string to the hostname O(1). So the total amount of time 
-            spent is in the O(n) order.
+            It calls the __fingerprint utility method, which only visits again the directories 
+            changed since the last call, and then appends the rendering of the root structure, 
+            which is built only once for all the WebSites sharing it, to the hostname. After an 
+            insertion only the fragments of the directories along the path of the page are rebuilt, 
+            in O(depth•fan-out), and the string is joined once from them. So the total amount of time 
+            spent is in the O(n) order, and only the final concatenation is paid when the structure 
+            has not changed.
         """ 
-        return self._root.getName() + '\n' + self.__composeSiteString(self._root, 3)
+        return self._root.getName() + '\n' + self._subtrees.getRendering(self.__fingerprint(self._root), 3)
+
+    def iterSiteString(self):
+        """
+        Generator of the string returned by getSiteString, in pieces made of whole lines (the fragments 
+        of the directories), which never builds the whole string: it is meant for the WebSites with a huge 
+        number of pages.
+
+        Returns
+        -------
+        generator
+            The pieces of the site string, each ending with a newline.
+
+        TIME COMPLEXITY 
+        ---------------
+        O(n)
+            The structure is interned as in getSiteString, then it is visited with an explicit stack.
+        """
+        yield self._root.getName() + '\n'
+        yield from self._subtrees.iterRendering(self.__fingerprint(self._root), 3)
+
+    def writeSiteString(self, output):
+        """
+        Writes the string returned by getSiteString to a file-like object, one piece at a time.
+
+        Parameters
+        ----------
+        output : file-like object
+            Object with a write(str) method, e.g. an open text file or socket.makefile('w').
+
+        TIME COMPLEXITY 
+        ---------------
+        O(n)
+        """
+        for line in self.iterSiteString():
+            output.write(line)
+
+    def getHost(self):
+        """
+        Returns the host of the website.
+
+        Returns
+        -------
+        str
+            The hostname, which is the name of the root directory.
+
+        TIME COMPLEXITY 
+        ---------------
+        O(1)
+        """
+        return self._root.getName()
+
+    def getStructureId(self):
+        """
+        Returns the identifier, in the SubtreeTable of the website, of its current structure. Since the 
+        structures in the table are immutable, the identifier can be used to render the website as it is 
+        now even after new pages have been inserted.
+
+        Returns
+        -------
+        int
+            The identifier of the structure of the root directory.
+
+        TIME COMPLEXITY 
+        ---------------
+        O(n) 
+            Only the directories changed since the last call are visited again.
+        """
+        return self.__fingerprint(self._root)
 
     def insertPage(self, url, content):
         """
@@ -605,8 +1032,8 @@ class WebSite:
         ----------
         url : str
             The url of the page to save in the WebSite.
-        content : str
-            The content of the page to save in the WebSite.
+        content : str | ContentReference
+            The content of the page to save in the WebSite, or a reference to it.
 
         Returns
         -------
@@ -632,8 +1059,9 @@ class WebSite:
         length = len(path) - 1
         if path[0] != self._root.getName(): 
             raise NotValidURLException(url + " is not valid for this host.")
+        self._root._fingerprint = None # the structure of the directories along the path may change
         # the page to be inserted is the homepage
-        elif path[1] == 'index.html' and length == 1:
+        if path[1] == 'index.html' and length == 1:
             page = self.__newPage('index.html',self._root)
             page.setUrl(url)
             page.setPageContent(content)
@@ -643,6 +1071,7 @@ class WebSite:
             searchDir = self._root 
             for p in path[1:length]:
                 searchDir = self.__newDir(p, searchDir)
+                searchDir._fingerprint = None
             page = self.__newPage(path[length],searchDir)
             page.setUrl(url)
             page.setPageContent(content)
@@ -660,8 +1089,8 @@ class WebSite:
 
         TIME COMPLEXITY
         ---------------
-        O(1)
-            Only accesses the WebSite Element's attribute.
+        O(l)
+            Where l is the number of ancestors of the page, which are visited up to the root directory.
         """
         return page.getWebSite()
 
@@ -676,6 +1105,28 @@ class InvertedIndex:
     ----------
     _trie : Trie
         Trie storing all the words.
+    _positional : bool
+        If True, the positions of each word inside each page are stored too.
+    _contents : dictionary | None
+        Collection of the postings (values) already computed for each distinct page content, 
+        by hash of the content (keys), used to index duplicated pages without tokenizing them.
+    _nearDuplicates : NearDuplicateDetector | None
+        Detector of the near-duplicate pages.
+    _normalizer : TextNormalizer | None
+        Normalizer applied to the words of the pages and of the queries, None if the words are 
+        just split on whitespaces.
+    _championSize : int
+        Number R of pages of the champion list of each word, 0 if the champion lists are disabled.
+    _stale : set
+        End nodes whose occurrence list has been modified since the last update of the champion lists.
+    _pageIds : dictionary
+        Collection of the progressive identifiers (values) of the added pages (keys), in order of insertion. 
+        It is shared by the forks, since the identifiers are never modified.
+    _pageList : list
+        Added pages, in order of identifier. It is shared by the forks too.
+    _vocabulary : BloomFilter
+        Bloom filter of the words of the trie, checked before searching a word in the trie so that most of 
+        the absent words are rejected without visiting it.
 
     Methods
     -------
@@ -683,69 +1134,365 @@ class InvertedIndex:
         Adds a word to the inverted index.
     addPage
         Adds the words of a given page's content to the Inverted Index.
+    removePage
+        Removes a page from the occurrence lists of its words, deleting the words left without pages.
     getList
         Returns the occurrence list associated to a given word.
+    findList
+        Returns the occurrence list associated to a given word, or None if there is not.
+    getPositionList
+        Returns the position list associated to a given word.
+    getPhraseList
+        Returns the pages containing a given phrase and the number of its occurrences.
+    getNearList
+        Returns the pages in which two words appear within a given distance.
+    getFuzzyList
+        Returns the merged occurrence list of the words within a given edit distance from a keyword.
+    getRangeList
+        Returns the merged occurrence list of the words in a lexicographic range.
+    getVocabulary
+        Generator of the words of the InvertedIndex in lexicographic order, optionally in a range.
+    getScopedList
+        Returns the occurrence list of a word restricted to the pages of a host or directory.
+    getPostings
+        Returns the postings of a word sorted by page identifier.
+    getTopPages
+        Returns the pages with the highest total occurrences of several keywords.
+    getChampions
+        Returns the top pages of a keyword, if its champion list can answer the query.
+    updateChampions
+        Recomputes the champion lists of the words modified since the last update.
+    getNearDuplicates
+        Returns the near-duplicates of a given page.
+    getVocabularySize
+        Returns the number of distinct words of the InvertedIndex.
+    fork
+        Returns a copy-on-write copy of the InvertedIndex.
     """
 
-    __slots__ = ['_trie']
+    __slots__ = ['_trie', '_positional', '_contents', '_nearDuplicates', '_normalizer', '_championSize', '_stale', '_pageIds', '_pageList', '_vocabulary']
 
-    def __init__(self):
+    def __init__(self, positional = False, dedup = False, nearDuplicates = False, normalizer = None, champions = 0, mapType = None):
         """
         Creates a new empty InvertedIndex.
 
+        Parameters
+        ----------
+        positional : bool
+            If True, the InvertedIndex also keeps, for each word and page, the sorted 
+            array of the positions of the word inside the page.
+        dedup : bool
+            If True, the content of each page is hashed and the pages with the same content 
+            of an already added page reuse its postings instead of being tokenized again.
+        nearDuplicates : bool
+            If True, the near-duplicate pages are detected with MinHash signatures.
+        normalizer : TextNormalizer | None
+            Normalizer of the words of the pages and of the queries. If None, the content of 
+            the pages is just split on whitespaces.
+        champions : int
+            If greater than 0, each word occurring in more than champions pages also keeps its champion 
+            list: its first champions pages in ranking order, which answer the searches of at most 
+            champions pages without ranking the whole occurrence list.
+        mapType : str | None
+            Implementation of the maps of the children of the nodes of the trie (see map_factory.py), 
+            None for built-in dictionaries.
+
         TIME COMPLEXITY
         ---------------
         O(1)
         """
-        self._trie = CompressedTrie4()
+        self._trie = CompressedTrie4(mapType)
+        self._positional = positional
+        self._contents = {} if dedup else None
+        self._nearDuplicates = NearDuplicateDetector() if nearDuplicates else None
+        self._normalizer = normalizer
+        self._championSize = champions
+        self._stale = set()
+        self._pageIds = {}
+        self._pageList = []
+        self._vocabulary = BloomFilter()
 
     def addWord(self, keyword):
         """
-        Adds the string keyword into the InvertedIndex.
+        Adds the string keyword into the InvertedIndex. If the keyword is new, it is added to the 
+        Bloom filter of the vocabulary too, which is rebuilt with twice its capacity when it is full.
 
         Parameters
         ----------
         keyword : str
             String to be inserted into the InvertedIndex.
 
+        Returns
+        -------
+        _Node
+            The end node of the keyword in the trie, holding its occurrence list.
+
         TIME COMPLEXITY
         ---------------
         O(len(keyword))
             The insertion in the Trie, takes an expected and amortized time 
-            proportional to the length of the word to be inserted.
+            proportional to the length of the word to be inserted. The rebuilds of the Bloom filter 
+            take O(1) amortized time for each word, since the capacity is doubled each time.
+        """
+        node = self._trie.insertWord(keyword)
+        if not node._occurrenceList:
+            # new word (or word without pages yet)
+            vocabulary = self._vocabulary
+            vocabulary.add(keyword)
+            if vocabulary.isFull(): self.__rebuildVocabulary(2 * vocabulary.getCapacity())
+        return node
+
+    def __rebuildVocabulary(self, capacity):
+        """Utility method which replaces the Bloom filter of the vocabulary with a new one of the given capacity."""
+        vocabulary = BloomFilter(capacity)
+        for word, _ in self._trie.items():
+            vocabulary.add(word)
+        self._vocabulary = vocabulary # the previous one may still be read by the generations sharing it
+
+    def _findNode(self, word):
         """
-        self._trie.insertWord(keyword)
+        Utility method which returns the end node of an already normalized word, or None if it is not in the 
+        trie. The trie is visited only if the word passes the Bloom filter of the vocabulary.
+        """
+        if not self._vocabulary.mightContain(word): return None
+        return self._trie.searchNode(word)
 
-    def addPage(self, page):
+    def addPage(self, page, text = None):
         """
         It processes the Element page, and for each word in its content, this word is inserted 
         in the inverted index if it is not present, and the page is inserted in the occurrence 
         list of this word. The occurrence list also saves the number of occurrences of the 
-        word in the page.
+        word in the page. If the InvertedIndex is positional, the positions of each word are 
+        collected in the same pass, and then merged with the ones of the page in the position 
+        list of the word (if the page is added again), so that they stay sorted.
 
         Parameters
         ----------
         page : Element
             Page of which processing the words.
+        text : str | None
+            Content of the page, if it has already been loaded (so that a page whose content 
+            is a reference is not read twice). If None, the content of the page is used.
+            If the InvertedIndex has a normalizer, the content is normalized before being 
+            split, and the positions are the ones of the normalized words.
 
         TIME COMPLEXITY
         ---------------
         O(len(word))
-            Since the expected time to add a word to the InvertedIndex is O(len(word)) and so it
-            is the expected time to get the occurrence list of the given word, and the time to insert
+            Since the expected time to add a word to the InvertedIndex is O(len(word)) and it
+            directly returns the node holding the occurrence list of the given word, and the time to insert
             something in the occurrence list (implemented as a hash table) is expected and amortized  
             O(1), the total amount of required time is in the order of O(len(word)).
+            If the content of the page has already been indexed (dedup), the time is O(len(content)) 
+            to hash it plus O(1) for each distinct word of the page.
         """
-        text = page.getContent().split()
-        for word in text:
-            self.addWord(word) 
-            list = self.getList(word) 
+        if text is None: text = page.getContent()
+        self._registerPage(page)
+        if self._contents is not None:
+            digest = blake2b(text.encode('utf-8'), digest_size = 16).digest()
+            try:
+                postings, signature = self._contents[digest]
+            except KeyError:
+                pass
+            else:
+                # duplicated content: reuse its postings
+                self.__addPostings(page, postings)
+                if self._nearDuplicates is not None: self._nearDuplicates.add(page, signature)
+                return
+        text = self._tokenize(text)
+        touched = {} if self._contents is not None else None
+        stale = self._stale if self._championSize else None
+        changed = set() # distinct nodes whose occurrence list has been changed by the page
+        added = {} if self._positional else None # positions of the words of the page, by node
+        for position, word in enumerate(text):
+            node = self.addWord(word) 
+            list = node._occurrenceList
             try:
                 # already exists
                 list[page] += 1
             except KeyError:
                 # not existing yet
                 list[page] = 1
+            if node not in changed:
+                # any change of the counts (even of a page added again) invalidates the champion list 
+                # and the postings sorted by page identifier and by URL
+                changed.add(node)
+                node._postings = node._scoped = None
+                if stale is not None:
+                    node._champions = None
+                    stale.add(node)
+            if added is not None:
+                try:
+                    added[node].append(position)
+                except KeyError:
+                    added[node] = array('I', (position,))
+            if touched is not None:
+                try:
+                    touched[node][1] += 1
+                except KeyError:
+                    touched[node] = [word, 1]
+        if added is not None:
+            for node, positions in added.items():
+                if node._positionList is None: node._positionList = {}
+                self._mergePositions(node._positionList, page, positions)
+        signature = None
+        if self._nearDuplicates is not None:
+            signature = self._nearDuplicates.signature(text)
+            self._nearDuplicates.add(page, signature)
+        if touched is not None:
+            postings = [[word, node, count, array('I', added[node]) if self._positional else None] 
+                        for node, (word, count) in touched.items()]
+            self._contents[digest] = (postings, signature)
+
+    def removePage(self, page, text = None):
+        """
+        Removes the page from the occurrence (and position) lists of the words of its content, so that 
+        a page can be removed or, by adding it again, updated. The words left without pages are deleted 
+        from the trie, which is re-compressed, so that the vocabulary does not grow with the churn of 
+        the pages. The Bloom filter of the vocabulary is not updated, since it can not forget a word: 
+        the deleted words are false positives until it is rebuilt. The page keeps its identifier.
+
+        Parameters
+        ----------
+        page : Element
+            Page to be removed.
+        text : str | None
+            Content of the page as it has been added (so that a page whose content has been replaced 
+            can still be removed). If None, the content of the page is used.
+
+        Returns
+        -------
+        int
+            The number of words deleted from the vocabulary.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(content))
+            Each distinct word of the content costs O(len(word)) to find its end node, and its deletion 
+            from the trie costs O(len(word)) too.
+        """
+        if text is None: text = page.getContent()
+        if self._contents is not None:
+            # the cached postings of the content may refer to the words being deleted
+            self._contents.pop(blake2b(text.encode('utf-8'), digest_size = 16).digest(), None)
+        if self._nearDuplicates is not None: self._nearDuplicates.remove(page)
+        deleted = 0
+        for word in set(self._tokenize(text)):
+            if self._findNode(word) is None: continue
+            node, _ = self._trie._searchNode(word + '$', True) # the end node, owned by the trie
+            list = node._occurrenceList
+            if list.pop(page, None) is None: continue
+            if node._positionList is not None: node._positionList.pop(page, None)
+            if not list:
+                self._stale.discard(node)
+                self._trie.deleteWord(word)
+                deleted += 1
+                continue
+            node._postings = node._scoped = None
+            if self._championSize:
+                node._champions = None
+                self._stale.add(node)
+        return deleted
+
+    def _tokenize(self, text):
+        """Utility method which returns the words of a text, normalized if the InvertedIndex has a normalizer."""
+        return text.split() if self._normalizer is None else self._normalizer.tokenize(text)
+
+    def _registerPage(self, page):
+        """Utility method which assigns the next identifier to a page, if it has not one yet."""
+        if page not in self._pageIds:
+            self._pageIds[page] = len(self._pageIds)
+            self._pageList.append(page)
+
+    def addPostings(self, word, postings):
+        """
+        Adds a word to the InvertedIndex together with some of its postings, which have been computed 
+        elsewhere (e.g. merged from runs spilled to disk), so that the trie is visited once per word 
+        instead of once per occurrence.
+
+        Parameters
+        ----------
+        word : str
+            The word, already normalized.
+        postings : iterable
+            (page, count, positions) triples, in order of insertion of the pages, where positions is the 
+            sorted array of the positions of the word in the page, or None if the index is not positional.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(word) + p)
+            Where p is the number of postings (and positions) added.
+        """
+        node = self.addWord(word)
+        list = node._occurrenceList
+        for page, count, positions in postings:
+            try:
+                list[page] += count
+            except KeyError:
+                list[page] = count
+            if positions is not None and self._positional:
+                if node._positionList is None: node._positionList = {}
+                self._mergePositions(node._positionList, page, positions)
+        node._postings = node._scoped = None
+        if self._championSize:
+            node._champions = None
+            self._stale.add(node)
+
+    def __addPostings(self, page, postings):
+        """
+        Utility method which adds the page to the occurrence (and position) lists of the given postings, 
+        which have been computed for another page with the same content.
+
+        Parameters
+        ----------
+        page : Element
+            Page to be added.
+        postings : list
+            [word, node, count, positions] lists, one for each distinct word of the content.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(postings))
+            Expected and amortized, since only dictionaries are accessed. The end node of a word 
+            is searched again only if the cached one is not owned by the trie anymore (after a fork).
+        """
+        version = self._trie._version
+        stale = self._stale if self._championSize else None
+        for posting in postings:
+            word, node, count, positions = posting
+            if node._owner is not version:
+                node = posting[1] = self.addWord(word)
+            list = node._occurrenceList
+            try:
+                list[page] += count
+            except KeyError:
+                list[page] = count
+            node._postings = node._scoped = None
+            if stale is not None:
+                node._champions = None
+                stale.add(node)
+            if positions is not None:
+                if node._positionList is None: node._positionList = {}
+                self._mergePositions(node._positionList, page, array('I', positions))
+
+    @staticmethod
+    def _mergePositions(positionList, page, positions):
+        """
+        Utility method which adds the sorted array of positions to the ones of the page in a position list. 
+        The positions of a page added again restart from 0, so the two arrays are merged, instead of 
+        being concatenated, to keep them sorted.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(positions))
+            O(len(positions) + m) if the page already has m positions.
+        """
+        try:
+            old = positionList[page]
+        except KeyError:
+            positionList[page] = positions
+            return
+        positionList[page] = array('I', heapq.merge(old, positions))
 
     def getList(self, keyword):
         """
@@ -760,7 +1507,9 @@ class InvertedIndex:
         Returns
         -------
         list : dictionary
-            The occurrence list
+            The occurrence list. If the normalizer splits the keyword in more words (e.g. 'e-mail'), 
+            as it splits the same text in the pages, it is the occurrence list of their phrase if the 
+            InvertedIndex is positional, of their conjunction otherwise (see _getWordsList).
 
         Raises
         ------
@@ -772,105 +1521,1413 @@ class InvertedIndex:
         O(len(keyword))
             The expected and amortized to return the occurrence list associated to a given keyword, 
             which is the time spent by the search method in the trie, is proportional to 
-            the length of the keyword.
+            the length of the keyword. The normalization of the keyword is linear in its length too.
+            The list of more words is computed in the time of getPhraseList.
         """
-        list = self._trie.searchWord(keyword) 
-        if list is None : raise NOOccurrenceListException("Occurrence list not found!")
-        return list
-
-# --------------------------------------------------------------------
-
-class SearchEngine:
-    """
-    A class to model a search engine, which allows users to retrieve relevant information from
-    the collected webpages.
-
-    Attributes
-    ----------
-    _invertedIndex : InvertedIndex
-        Inverted Index of the search engine.
-    _database : ProbeHashMap
-        Collection of the WebSites where the key is the hostname and the value is the WebSite object.
+        words = self._queryWords(keyword)
+        if len(words) == 1: return self._getList(words[0])
+        return self._getWordsList(words)
 
-    Methods
-    -------
-    search
-        searches the k web pages with the maximum number of occurrences of a keyword, and resturns
-        the concatenation of the string description of all the possible sites.
-    """
-
-    __slots__ = ['_invertedIndex', '_database']
-
-    def __init__(self, namedir):
+    def findList(self, keyword):
         """
-        Initializes the SearchEngine, by taking in input a directory in which there are multiple files each representing a different webpage. 
-        Each file contains in the first line the URL (including the hostname) and in the next lines the content of the webpage. This function 
-        populates the database of the search engine, by initializing and inserting values in all the necessary data structures.
+        It takes in input the string keyword, and it returns the corresponding occurrence list, like getList, 
+        but without raising an exception if the keyword is not in the InvertedIndex, so that the absent 
+        keywords cost only the check of the Bloom filter of the vocabulary (unless it is a false positive).
 
         Parameters
         ----------
-        namedir : str
-            Name of the directory from which read all the files.
-        """
-        self._invertedIndex = InvertedIndex()
-        self._database = ProbeHashMap()
+        keyword : str
+            The word of which return the occurrence list.
 
-        currDir = os.getcwd()
-        os.chdir(namedir)
+        Returns
+        -------
+        dictionary | None
+            The occurrence list, or None if there's no occurrence list associated to the given keyword 
+            (or no page contains all the words into which the normalizer splits it).
 
-        # read from files
-        for file in os.listdir():
-            if file.endswith(".txt"):
-                with open (file, 'r') as f:
-                    firstLine = f.readline()
-                    content = f.read()
-                    hostname = firstLine.split('/')[0]
-                    # populate the database and the inverted index
-                    try:
-                        page = self._database[hostname].insertPage(firstLine[:-1], content)
-                    except KeyError:
-                        self._database[hostname] = WebSite(hostname)
-                        page = self._database[hostname].insertPage(firstLine[:-1], content)
-                    self._invertedIndex.addPage(page)
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword))
+            O(1) after the hash of the keyword for most of the absent keywords.
+        """
+        words = self._queryWords(keyword)
+        if len(words) == 1: return self._findList(words[0])
+        try:
+            return self._getWordsList(words) or None
+        except NOOccurrenceListException:
+            return None
 
-        os.chdir(currDir)
+    def _queryWords(self, keyword):
+        """
+        Utility method which returns the words of a keyword as they are stored in the InvertedIndex: the keyword 
+        itself without a normalizer, otherwise the words into which the normalizer splits it, as it splits the 
+        content of the pages. They can be none (e.g. a stopword) or more than one (e.g. 'e-mail' or "algorithm's").
+        """
+        if self._normalizer is None: return [keyword]
+        return self._normalizer.tokenize(keyword)
 
-    def search(self, keyword, k):
+    def _getWordsList(self, words):
         """
-        Searches the k web pages with the maximum number of occurrences of the searched keyword. It returns a string s built as follows: for 
-        each of these k pages sorted in descending order of occurrences, the site strings (as defined above) of the site hosting that page is 
-        added to s, unless this site has been already inserted.
+        Utility method which returns the occurrence list of the query made of more already normalized words: 
+        the list of their phrase if the InvertedIndex is positional, otherwise the pages containing all of 
+        them, each associated to the smallest number of occurrences of the words in it (which bounds the 
+        number of occurrences of the phrase).
 
-        Parameters
-        ----------
-        keyword : str
-            word to be searched in the different pages
-        k : int
+        Raises
+        ------
+        NOOccurrenceListException
+            if there are no words, or one of them has no occurrence list.
+        """
+        if not words: raise NOOccurrenceListException("Occurrence list not found!")
+        if self._positional: return self._phraseList(words)
+        lists = [self._getList(word) for word in words]
+        rarest = min(lists, key=len)
+        result = {}
+        for page, _ in rarest.items():
+            try:
+                result[page] = min(list[page] for list in lists)
+            except KeyError:
+                # the page does not contain one of the words
+                continue
+        return result
+
+    def _normalize(self, keyword):
+        """
+        Utility method which returns the keyword as it is stored in the InvertedIndex, raising a 
+        NOOccurrenceListException if nothing remains of it after the normalization (e.g. a stopword).
+        """
+        if self._normalizer is None: return keyword
+        word = self._normalizer.normalizeWord(keyword)
+        if word is None: raise NOOccurrenceListException("Occurrence list not found!")
+        return word
+
+    def _getList(self, word):
+        """Utility method which returns the occurrence list of an already normalized word."""
+        list = self._findList(word)
+        if list is None : raise NOOccurrenceListException("Occurrence list not found!")
+        return list
+
+    def _findList(self, word):
+        """Utility method which returns the occurrence list of an already normalized word, None if it is absent."""
+        node = self._findNode(word)
+        return node._occurrenceList if node is not None else None
+
+    def getPositionList(self, keyword):
+        """
+        It takes in input the string keyword, and it returns the corresponding position list, 
+        which maps each page containing the keyword to the sorted array of its positions.
+
+        Parameters
+        ----------
+        keyword : str
+            The word of which return the position list.
+
+        Returns
+        -------
+        dictionary
+            The position list.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+        NOPositionListException
+            if the InvertedIndex is not positional.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword))
+            The same of the search of the keyword in the trie.
+        """
+        return self._getPositionList(self._normalize(keyword))
+
+    def getFuzzyList(self, keyword, maxEdits):
+        """
+        It takes in input a (possibly misspelled) keyword and returns the occurrence list obtained by merging 
+        the ones of all the words whose Levenshtein distance from the keyword is at most maxEdits: each page 
+        is associated to the total number of occurrences of these words in it.
+
+        Parameters
+        ----------
+        keyword : str
+            The word to be searched.
+        maxEdits : int
+            Maximum number of insertions, deletions and substitutions.
+
+        Returns
+        -------
+        dictionary
+            The merged occurrence list.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if no word is within maxEdits from the keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(v•len(keyword) + p)
+            Where v is the number of characters of the trie visited before the pruning of the branches 
+            too far from the keyword, and p the total number of postings of the matching words.
+        """
+        words = sorted(self._fuzzyWords(self._normalize(keyword), maxEdits)) # the same order for every kind of index
+        if not words: raise NOOccurrenceListException("Occurrence list not found!")
+        result = dict(self._getList(words[0]))
+        for word in words[1:]:
+            for page, count in self._getList(word).items():
+                try:
+                    result[page] += count
+                except KeyError:
+                    result[page] = count
+        return result
+
+    def _fuzzyWords(self, word, maxEdits):
+        """Utility method which returns the words of the trie within maxEdits from an already normalized word."""
+        return [match for match, _, _ in self._trie.fuzzyItems(word, maxEdits)]
+
+    def getVocabulary(self, low = None, high = None):
+        """
+        Generator of the words of the InvertedIndex in lexicographic order, restricted to the words w such that 
+        low <= w < high, e.g. to export the vocabulary or to expand a query to a range of words. The bounds 
+        are compared with the words as they are stored, so they are not normalized.
+
+        Parameters
+        ----------
+        low : str | None
+            Smallest word of the range (included), None for no lower bound.
+        high : str | None
+            Bound of the range (excluded), None for no upper bound.
+
+        Yields
+        ------
+        str
+            The words in the range, in lexicographic order.
+
+        TIME COMPLEXITY
+        ---------------
+        O(h•c + m)
+            Where h is the height of the trie, c the largest number of children of a node and m the total length 
+            of the words in the range: the subtrees outside the range are not visited.
+        """
+        return self._rangeWords(low, high)
+
+    def _rangeWords(self, low, high):
+        """Utility generator of the words of the trie w such that low <= w < high, in lexicographic order."""
+        for word, _ in self._trie.sortedItems(low, high):
+            yield word
+
+    def getRangeList(self, low, high):
+        """
+        Returns the merged occurrence list of all the words w of the InvertedIndex such that low <= w < high 
+        (e.g. from 'des' to 'dig'), in which each page is associated to the total number of occurrences of 
+        these words in it. The bounds are compared with the words as they are stored, so they are not normalized.
+
+        Parameters
+        ----------
+        low : str
+            Smallest word of the range (included).
+        high : str
+            Bound of the range (excluded).
+
+        Returns
+        -------
+        dictionary
+            The merged occurrence list.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if no word is in the range.
+
+        TIME COMPLEXITY
+        ---------------
+        O(h•c + m + p)
+            Where m is the total length of the words in the range and p the total number of their postings.
+        """
+        result = None
+        for word in self._rangeWords(low, high):
+            if result is None:
+                result = dict(self._getList(word))
+                continue
+            for page, count in self._getList(word).items():
+                try:
+                    result[page] += count
+                except KeyError:
+                    result[page] = count
+        if result is None: raise NOOccurrenceListException("Occurrence list not found!")
+        return result
+
+    def _getPositionList(self, word):
+        """Utility method which returns the position list of an already normalized word."""
+        if not self._positional: raise NOPositionListException("The InvertedIndex is not positional!")
+        node = self._findNode(word)
+        if node is None : raise NOOccurrenceListException("Occurrence list not found!")
+        return node._positionList
+
+    def fork(self):
+        """
+        Returns a copy-on-write copy of the InvertedIndex, which shares the trie nodes, and so the occurrence 
+        lists, with the current one until it modifies them. The current InvertedIndex must not be modified 
+        anymore, so that it can be read while the new one is being populated.
+
+        Returns
+        -------
+        InvertedIndex
+            The new InvertedIndex.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1)
+            Only the root of the trie is copied.
+        """
+        other = InvertedIndex.__new__(InvertedIndex)
+        other._trie = self._trie.fork()
+        other._positional = self._positional
+        other._contents = self._contents
+        other._nearDuplicates = self._nearDuplicates
+        other._normalizer = self._normalizer
+        other._championSize = self._championSize
+        other._stale = set()
+        other._pageIds = self._pageIds
+        other._pageList = self._pageList
+        other._vocabulary = self._vocabulary # its new words only add false positives to the current one
+        return other
+
+    def getScopedList(self, keyword, scope):
+        """
+        It takes in input the string keyword and a scope, and it returns the occurrence list of the keyword 
+        restricted to the pages in the scope: a hostname (e.g. www.unisa.it), a directory (e.g. www.unisa.it/diem/) 
+        or the URL of a page. The occurrence list is sorted by URL the first time it is asked for, and it is kept 
+        sorted until it is modified, so that the pages in the scope are found with a binary search.
+
+        Parameters
+        ----------
+        keyword : str
+            The word of which return the occurrence list.
+        scope : str
+            Hostname or URL prefix.
+
+        Returns
+        -------
+        dictionary
+            The occurrence list of the pages in the scope, in order of URL, empty if no page of the scope 
+            contains the keyword.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword) + log(n) + m) if the occurrence list is already sorted, O(len(keyword) + n•log(n)) otherwise
+            Where n is the number of pages containing the keyword and m the number of them in the scope.
+        """
+        return self._getScopedList(self._normalize(keyword), scope)
+
+    def _getScopedList(self, word, scope):
+        """Utility method which returns the occurrence list of an already normalized word in the given scope."""
+        node = self._findNode(word)
+        if node is None: raise NOOccurrenceListException("Occurrence list not found!")
+        scoped = node._scoped
+        if scoped is None:
+            scoped = node._scoped = ScopedPostings(node._occurrenceList)
+        return scoped.getScope(scope)
+
+    def getPostings(self, keyword):
+        """
+        It takes in input the string keyword, and it returns its postings: the identifiers of the pages 
+        containing it in ascending order, with the occurrences of the keyword and their upper bound. The 
+        postings are computed from the occurrence list the first time they are asked for, and are kept 
+        until the occurrence list is modified.
+
+        Parameters
+        ----------
+        keyword : str
+            The word of which return the postings.
+
+        Returns
+        -------
+        Postings
+            The postings of the keyword.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword)) if the postings are up to date, O(len(keyword) + n) otherwise
+            Where n is the number of pages containing the keyword.
+        """
+        return self._getPostings(self._normalize(keyword))
+
+    def _getPostings(self, word):
+        """Utility method which returns the (cached) postings of an already normalized word."""
+        node = self._findNode(word)
+        if node is None: raise NOOccurrenceListException("Occurrence list not found!")
+        postings = node._postings
+        if postings is None:
+            postings = node._postings = Postings(node._occurrenceList, self._pageIds)
+        return postings
+
+    def getTopPages(self, query, k, exhaustive = False):
+        """
+        It takes in input a query made of several keywords separated by whitespaces, and it returns the k pages 
+        with the highest score, where the score of a page is the total number of occurrences of the keywords in 
+        it. The pages which can not enter the top k are skipped with the block-max dynamic pruning, using the upper 
+        bound of the occurrences of each keyword in each block of pages (see pruning.blockMaxTopK). The keywords 
+        without occurrence list are ignored.
+
+        Parameters
+        ----------
+        query : str
+            The keywords.
+        k : int
+            Number of pages to return.
+        exhaustive : bool
+            If True, every page of every occurrence list is scored, without pruning.
+
+        Returns
+        -------
+        list
+            (score, page) pairs in descending order of score and, for equal scores, in order of insertion of 
+            the pages.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if no keyword has an occurrence list.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(query) + b•log(b) + e•log(k))
+            Where b is the number of blocks of the postings of the keywords and e the number of postings of the 
+            visited blocks, plus the time to compute the outdated postings.
+        """
+        words = self._tokenize(query)
+        postingsLists = []
+        for word in dict.fromkeys(words):
+            try:
+                postingsLists.append(self._getPostings(word))
+            except NOOccurrenceListException:
+                continue
+        if not postingsLists: raise NOOccurrenceListException("Occurrence list not found!")
+        return (exhaustiveTopK if exhaustive else blockMaxTopK)(postingsLists, k)
+
+    def getChampions(self, keyword, k):
+        """
+        Returns the first k (occurrences, page) pairs of the keyword in ranking order, read from its champion 
+        list, which are exactly the first k pairs extracted from the heap of its whole occurrence list.
+
+        Parameters
+        ----------
+        keyword : str
+            The word to be searched.
+        k : int
+            Number of pages.
+
+        Returns
+        -------
+        tuple | None
+            The first k pairs, or None if the champion list of the keyword can not answer the query: k is 
+            not positive or greater than the size of the champion lists (0 if they are disabled), or the keyword 
+            occurs in few pages (for which the whole occurrence list is cheap to rank), or its champion list 
+            is outdated.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword) + k)
+        """
+        if k <= 0 or k > self._championSize: return None # also without champion lists (size 0)
+        node = self._findNode(self._normalize(keyword))
+        if node is None: raise NOOccurrenceListException("Occurrence list not found!")
+        if node._champions is None: return None
+        return node._champions[:k]
+
+    def updateChampions(self):
+        """
+        Recomputes the champion lists of the words whose occurrence list has been modified since the last 
+        update, extracting from the heap of each occurrence list its first R pages, so that they are ranked 
+        exactly as the search of the whole list would rank them (ties included). It is called at the end of 
+        each ingestion.
+
+        TIME COMPLEXITY
+        ---------------
+        O(sum(n + R•log(n)))
+            Where the sum is over the modified words and n is the number of pages of each of them: only the 
+            words occurring in more than R pages are ranked.
+        """
+        size = self._championSize
+        for node in self._stale:
+            list = node._occurrenceList
+            if len(list) <= size: continue
+            heap = MaxOrientedPriorityQueue(list)
+            node._champions = tuple(heap.remove_max() for _ in range(size))
+        self._stale = set()
+
+    def _words(self):
+        """Utility generator of all the words of the InvertedIndex, in no particular order."""
+        for word, _ in self._trie.items():
+            yield word
+
+    def getVocabularySize(self):
+        """
+        Returns the number of distinct words stored in the InvertedIndex.
+
+        Returns
+        -------
+        int
+            The number of words of the trie.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            Where n is the total length of the lables of the trie.
+        """
+        return sum(1 for _ in self._trie.items())
+
+    def getNearDuplicates(self, page):
+        """
+        Returns the pages whose content is a near-duplicate of the content of the given page, 
+        according to the estimated Jaccard similarity of their shingles.
+
+        Parameters
+        ----------
+        page : Element
+            An already added page.
+
+        Returns
+        -------
+        list
+            The near-duplicates of the page.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            If the near-duplicates detection is not enabled or the page has not been added.
+        """
+        if self._nearDuplicates is None: raise NOOccurrenceListException("Near-duplicates detection is not enabled!")
+        try:
+            return self._nearDuplicates.getNearDuplicates(page)
+        except KeyError:
+            raise NOOccurrenceListException("The page has not been added!")
+
+    @staticmethod
+    def _followedBy(starts, positions, offset):
+        """
+        Utility method which intersects two sorted position arrays, keeping the positions p 
+        of starts such that p + offset is in positions.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(starts) + len(positions))
+            Both the arrays are scanned only once, like in the merge of merge-sort.
+        """
+        result = []
+        j = 0
+        length = len(positions)
+        for p in starts:
+            target = p + offset
+            while j < length and positions[j] < target: j += 1
+            if j == length: break
+            if positions[j] == target: result.append(p)
+        return result
+
+    @staticmethod
+    def _near(first, second, distance, same = False):
+        """
+        Utility method which counts the positions of the sorted array first having at least 
+        one position of the sorted array second at most distance words far from them. If same 
+        is True, the arrays are the positions of the same word, and a position is not near to 
+        itself: it is counted only if one of the adjacent positions is near to it.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(first) + len(second))
+            Both the arrays are scanned only once, like in the merge of merge-sort.
+        """
+        if same:
+            last = len(first) - 1
+            return sum(1 for i, p in enumerate(first) 
+                       if (i > 0 and p - first[i - 1] <= distance) or (i < last and first[i + 1] - p <= distance))
+        count = 0
+        j = 0
+        length = len(second)
+        for p in first:
+            while j < length and second[j] < p - distance: j += 1
+            if j == length: break
+            if second[j] <= p + distance: count += 1
+        return count
+
+    def getPhraseList(self, phrase):
+        """
+        It takes in input a phrase (a string made of words separated by whitespaces) and returns 
+        an occurrence list in which each page containing the whole phrase is associated to the 
+        number of occurrences of the phrase in it. Only the position lists are used, the content 
+        of the pages is never read again.
+
+        Parameters
+        ----------
+        phrase : str
+            The phrase to be searched.
+
+        Returns
+        -------
+        dictionary
+            The occurrence list of the phrase.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if one of the words of the phrase has no occurrence list.
+        NOPositionListException
+            if the InvertedIndex is not positional.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(phrase) + p•m)
+            Where p is the number of pages of the rarest word of the phrase and m is the total number of 
+            positions of the words of the phrase in each of these pages: the candidate pages are the ones 
+            of the rarest word and each position array is merged once with the current candidates.
+        """
+        return self._phraseList(self._tokenize(phrase))
+
+    def _phraseList(self, words):
+        """Utility method which returns the occurrence list of the phrase made of the given already normalized words."""
+        if not words: raise NOOccurrenceListException("Occurrence list not found!")
+        lists = [self._getPositionList(word) for word in words]
+        rarest = min(lists, key=len)
+        result = {}
+        for page in rarest:
+            try:
+                starts = lists[0][page]
+                for offset in range(1, len(words)):
+                    starts = self._followedBy(starts, lists[offset][page], offset)
+                    if not starts: break
+            except KeyError:
+                # the page does not contain one of the words
+                continue
+            if starts: result[page] = len(starts)
+        return result
+
+    def getNearList(self, keyword1, keyword2, distance):
+        """
+        NEAR/distance operator. It returns an occurrence list in which each page containing the 
+        keyword1 at most distance words far from the keyword2 is associated to the number of 
+        occurrences of keyword1 which satisfy this constraint. If the two keywords are the same 
+        word, an occurrence is not near to itself.
+
+        Parameters
+        ----------
+        keyword1 : str
+            The first word.
+        keyword2 : str
+            The second word.
+        distance : int
+            Maximum number of positions between the two words.
+
+        Returns
+        -------
+        dictionary
+            The occurrence list of the NEAR query.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if one of the two words has no occurrence list.
+        NOPositionListException
+            if the InvertedIndex is not positional.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword1) + len(keyword2) + p•m)
+            Where p is the number of pages of the rarest word and m the number of positions of the 
+            two words in each of these pages.
+        """
+        word1, word2 = self._normalize(keyword1), self._normalize(keyword2)
+        same = word1 == word2
+        first = self._getPositionList(word1)
+        second = first if same else self._getPositionList(word2)
+        result = {}
+        for page in (first if len(first) <= len(second) else second):
+            try:
+                count = self._near(first[page], second[page], distance, same)
+            except KeyError:
+                continue
+            if count: result[page] = count
+        return result
+
+# --------------------------------------------------------------------
+
+SearchHit = namedtuple('SearchHit', ['url', 'score', 'site'])
+SearchHit.__doc__ = """A hit of a search: the url of a page, its score (number of occurrences) and its WebSite."""
+
+class SearchResults:
+    """
+    A class to model the ranked results of a query. The hits are extracted lazily from a max-oriented 
+    heap built on the occurrence list, and the extracted ones are kept, so that they can be iterated or 
+    paginated many times without extracting them again.
+
+    Attributes
+    ----------
+    _heap : MaxOrientedPriorityQueue
+        Heap of the pages not extracted yet.
+    _hits : list
+        SearchHit objects already extracted, in descending order of score.
+    _lock : Lock
+        Lock protecting the extraction, since the results can be shared by many threads.
+
+    Methods
+    -------
+    getHits
+        Returns the hits in a given range of positions.
+    """
+
+    __slots__ = ['_heap', '_hits', '_lock']
+
+    def __init__(self, list):
+        """
+        Creates the results of the given occurrence list.
+
+        Parameters
+        ----------
+        list : dictionary
+            occurrence list, which maps pages to their number of occurrences
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            The heap is built bottom-up.
+        """
+        self._heap = MaxOrientedPriorityQueue(list)
+        # I want to use a max-oriented heap, built from the _occurrenceList dictionary in order to be 
+        # able to extract the max at each iteration
+        self._hits = []
+        self._lock = Lock()
+
+    def __len__(self):
+        """Returns the total number of hits."""
+        return len(self._hits) + len(self._heap)
+
+    def _extract(self, n):
+        """
+        Utility method which extracts hits from the heap until n hits (or all of them) have been extracted.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n•log(len(heap)))
+        """
+        hits = self._hits
+        heap = self._heap
+        if len(hits) >= n or len(heap) == 0: return
+        with self._lock:
+            while len(hits) < n and len(heap) > 0:
+                score, page = heap.remove_max()
+                hits.append(SearchHit(page.getUrl(), score, WebSite.getSiteFromPage(page)))
+
+    def getHits(self, offset, count):
+        """
+        Returns the hits from position offset (included) to position offset + count (excluded).
+
+        Parameters
+        ----------
+        offset : int
+            position of the first hit
+        count : int
+            maximum number of hits
+
+        Returns
+        -------
+        list
+            the requested SearchHit objects.
+
+        TIME COMPLEXITY
+        ---------------
+        O(count) if the hits have already been extracted, O((offset + count)•log(n)) otherwise.
+        """
+        self._extract(offset + count)
+        return self._hits[offset:offset + count]
+
+    def __iter__(self):
+        """Lazily yields all the hits, in descending order of score."""
+        i = 0
+        while True:
+            self._extract(i + 1)
+            if i >= len(self._hits): return
+            yield self._hits[i]
+            i += 1
+
+# --------------------------------------------------------------------
+
+class SearchEngine:
+    """
+    A class to model a search engine, which allows users to retrieve relevant information from
+    the collected webpages.
+
+    Attributes
+    ----------
+    _database : ProbeHashMap | dict
+        Collection of the WebSites where the key is the hostname and the value is the WebSite object.
+    _lazyContent : str | None
+        Storage mode of the content of the pages ('file', 'mmap' or None for in memory).
+    _subtrees : SubtreeTable
+        Table of the directory structures shared by all the WebSites.
+    _generation : _Generation
+        Current generation, holding the Inverted Index of the search engine.
+    _snapshots : bool
+        If True, each ingestion builds a new generation which is published atomically at its end.
+    _writerLock : Lock
+        Lock which serializes the ingestions.
+    _memoryBudget : int | None
+        Maximum estimated size in bytes of the postings built in memory by an ingestion before spilling 
+        them to disk, None if the postings are added directly to the Inverted Index.
+    _newMap : callable
+        Factory of the maps of the search engine (the database and the map removing the duplicated 
+        sites from the results of each query).
+    _instrumentation : Instrumentation | None
+        Collector of the measures of the searches, None if they are not measured.
+
+    Methods
+    -------
+    ingest
+        reads all the pages of a source and adds them to the search engine.
+    getGeneration
+        returns the number of the current generation.
+    getInstrumentation
+        returns the collector of the measures of the searches.
+    share
+        lays out the current generation in a SharedIndex, which worker processes can search.
+    search
+        searches the k web pages with the maximum number of occurrences of a keyword, and resturns
+        the concatenation of the string description of all the possible sites.
+    searchResults
+        returns the ranked results of a keyword, from which the hits are extracted lazily.
+    searchHits
+        returns a page of the ranked hits of a keyword.
+    searchPhrase
+        the same of search, but for a phrase made of several consecutive words.
+    searchNear
+        the same of search, but for two words appearing within a given distance.
+    searchFuzzy
+        the same of search, but for all the words within a given edit distance from the keyword.
+    searchKeywords
+        the same of search, but for the total occurrences of several keywords.
+    hasKeyword
+        returns True if a keyword occurs in some page, without raising exceptions.
+    """
+
+    __slots__ = ['_database', '_lazyContent', '_subtrees', '_generation', '_snapshots', '_writerLock', '_memoryBudget', '_newMap', '_instrumentation']
+
+    _RESULTS_CACHE_SIZE = 32 # number of keywords whose results are cached
+
+    #-------------------------- nested _Generation class --------------------------
+
+    class _Generation:
+        """
+        A class to model a state of the search engine: a query reads the generation which is current when 
+        it starts until its end, even if in the meanwhile a new one is published.
+
+        Attributes
+        ----------
+        _invertedIndex : InvertedIndex
+            Inverted Index of the generation.
+        _siteIds : dictionary | None
+            Collection of the identifiers in the SubtreeTable (values) of the structure of each WebSite at 
+            the moment of the publication (keys are the hostnames). It is None if the snapshots are disabled, 
+            in which case the WebSites are rendered directly.
+        _results : OrderedDict
+            Cache of the SearchResults of the most recently searched keywords.
+        _lock : Lock
+            Lock protecting the cache of the results.
+        _number : int
+            Progressive number of the generation.
+        """
+
+        __slots__ = '_invertedIndex', '_siteIds', '_results', '_lock', '_number'
+
+        def __init__(self, invertedIndex, siteIds, number):
+            """Initialize the generation."""
+            self._invertedIndex = invertedIndex
+            self._siteIds = siteIds
+            self._results = OrderedDict()
+            self._lock = Lock()
+            self._number = number
+
+    #-------------------------------------------------------------------------------
+
+    def __init__(self, namedir, positional = False, lazyContent = None, dedup = False, nearDuplicates = False, snapshots = False, segmentSize = None, normalizer = None, champions = 0, memoryBudget = None, compressPostings = False, mapType = None, instrumentation = None):
+        """
+        Initializes the SearchEngine, by taking in input a directory in which there are multiple files each representing a different webpage. 
+        Each file contains in the first line the URL (including the hostname) and in the next lines the content of the webpage. This function 
+        populates the database of the search engine, by initializing and inserting values in all the necessary data structures.
+        Instead of a directory, it is possible to pass a tar or zip archive of such files, a newline-delimited JSON file of 
+        {"url", "content"} records or directly an IngestionSource.
+
+        Parameters
+        ----------
+        namedir : str | IngestionSource
+            Name of the directory (or archive, or JSONL file) from which read all the pages.
+        positional : bool
+            If True, a positional InvertedIndex is built, allowing searchPhrase and searchNear.
+        lazyContent : str | None
+            If 'file' or 'mmap', the pages only keep a reference (file, offset, length) to their text, which 
+            is loaded on demand with a normal read or from a memory mapping of the file respectively. The 
+            pages whose text is not addressable in a file (e.g. in compressed archives) keep it in memory.
+        dedup : bool
+            If True, the pages with the same content of an already indexed page reuse its postings.
+        nearDuplicates : bool
+            If True, the near-duplicate pages are detected while indexing.
+        snapshots : bool
+            If True, the searches can be executed by many threads while another one ingests new pages: each 
+            ingestion builds a copy-on-write generation of the index, which is published atomically at its end.
+        segmentSize : int | None
+            If not None, the index is a SegmentedIndex whose active segment is frozen every segmentSize pages, 
+            and whose frozen segments are merged in background.
+        normalizer : TextNormalizer | None
+            If not None, the words of the pages and of the queries are normalized by it (case folding, 
+            punctuation stripping, stopwords removal, stemming) instead of being just split on whitespaces.
+        champions : int
+            If greater than 0, the champion list of the first champions pages of each frequent word is updated at 
+            the end of each ingestion, and the searches of at most champions pages read it instead of ranking the 
+            whole occurrence list. It is ignored by the SegmentedIndex.
+        memoryBudget : int | None
+            If not None, each ingestion accumulates the postings of the pages in a buffer of at most about memoryBudget 
+            bytes, which is spilled to a sorted run in a temporary file when it is full; at the end of the ingestion the 
+            runs are merged into the Inverted Index. It is ignored by the SegmentedIndex, whose active segment already 
+            bounds the postings being built. The content of the duplicated pages is not reused in this mode.
+        compressPostings : bool
+            If True, the occurrence lists of the frozen segments of the SegmentedIndex, which are shared by all the 
+            generations, are compressed (see postings_codec.py). It requires segmentSize.
+        mapType : str | None
+            Implementation of the maps of the search engine and of the children of the nodes of its tries: 'probe' 
+            (ProbeHashMap), 'presized' (ProbeHashMap sized for the expected number of items) or 'dict' (built-in 
+            dictionary), see map_factory.py. If None, the maps of the search engine are ProbeHashMaps and the 
+            ones of the tries are built-in dictionaries.
+        instrumentation : Instrumentation | None
+            If not None, the latency, the timing breakdown and the work of each call to search are recorded 
+            in it (see instrumentation.py).
+        """
+        self._newMap = mapFactory('probe' if mapType is None else mapType)
+        self._instrumentation = instrumentation
+        self._database = self._newMap()
+        self._lazyContent = lazyContent
+        self._subtrees = SubtreeTable()
+        self._snapshots = snapshots
+        self._writerLock = Lock()
+        self._memoryBudget = memoryBudget if segmentSize is None else None
+        if segmentSize is None:
+            invertedIndex = InvertedIndex(positional, dedup, nearDuplicates, normalizer, champions, mapType)
+        else:
+            from segmented_index import SegmentedIndex # it depends on this module
+            invertedIndex = SegmentedIndex(segmentSize, positional = positional, dedup = dedup, nearDuplicates = nearDuplicates, normalizer = normalizer, 
+                                           compress = compressPostings, mapType = mapType)
+        self._generation = self._Generation(invertedIndex, {} if snapshots else None, 0)
+        self.ingest(namedir)
+
+    def ingest(self, source):
+        """
+        Reads all the pages of the given source, one record at a time, and populates the database and the 
+        inverted index with them. If the snapshots are enabled, the pages are added to a copy-on-write fork 
+        of the current Inverted Index, which is published as a new generation only at the end, so that the 
+        searches running in the meanwhile keep reading the previous one.
+
+        Parameters
+        ----------
+        source : str | IngestionSource
+            The source of the pages, or its path.
+
+        Returns
+        -------
+        IngestionSource
+            The source which has been read, which reports its read throughput.
+        """
+        if not isinstance(source, IngestionSource): source = openSource(source)
+        with self._writerLock:
+            generation = self._generation
+            if not self._snapshots:
+                target = self.__target(generation._invertedIndex)
+                for url, content, reference in source.records(self._lazyContent):
+                    self.__insertPage(target, url, content, reference)
+                if target is not generation._invertedIndex: target.build()
+                generation._invertedIndex.updateChampions()
+                with generation._lock:
+                    generation._results.clear() # the cached results may be outdated
+                return source
+            invertedIndex = generation._invertedIndex.fork()
+            target = self.__target(invertedIndex)
+            touched = set()
+            for url, content, reference in source.records(self._lazyContent):
+                touched.add(self.__insertPage(target, url, content, reference).getWebSite())
+            if target is not invertedIndex: target.build()
+            invertedIndex.updateChampions()
+            siteIds = dict(generation._siteIds)
+            for site in touched:
+                siteIds[site.getHost()] = site.getStructureId()
+            # publish the new generation
+            self._generation = self._Generation(invertedIndex, siteIds, generation._number + 1)
+        return source
+
+    def __target(self, invertedIndex):
+        """
+        Utility method which returns the object to which an ingestion adds the pages: the given inverted index, 
+        or a SpillingIndexBuilder of it if the memory budget is set.
+        """
+        if self._memoryBudget is None: return invertedIndex
+        return SpillingIndexBuilder(invertedIndex, self._memoryBudget)
+
+    def getGeneration(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The number of the current generation, which is incremented by each ingestion if the 
+            snapshots are enabled.
+        """
+        return self._generation._number
+
+    def share(self, name = None, path = None):
+        """
+        Lays out the current generation of the search engine in a SharedIndex (see shared_index.py): a flat, 
+        read-only buffer in a shared memory segment or in a file, to which many worker processes can attach 
+        to serve the searches without building or copying the index. The postings of each word are ranked 
+        once, in the order in which search extracts them from the heap, and the site strings are rendered 
+        once, so that the searches of the workers give the same results of search, without a scope.
+
+        Parameters
+        ----------
+        name : str | None
+            Name of the shared memory segment, None for a random one.
+        path : str | None
+            Path of the file in which the index is laid out, None to use a shared memory segment.
+
+        Returns
+        -------
+        SharedIndex
+            The shared index, owned by this process, which has to close and unlink it.
+
+        TIME COMPLEXITY
+        ---------------
+        O(sum(n•log(n)) + s)
+            Where the sum is over the words, n is the number of pages of each of them, and s is the total 
+            size of the site strings.
+        """
+        from shared_index import SharedIndex # it depends on this module
+        generation = self._generation
+        invertedIndex = generation._invertedIndex
+        words = sorted(invertedIndex._words()) # the order of the code points is the one of their UTF-8 encoding
+        pageNumbers = self._newMap()
+        siteNumbers = self._newMap()
+        urls, pageSites, siteStrings, lists = [], [], [], []
+        for word in words:
+            heap = MaxOrientedPriorityQueue(invertedIndex._findList(word))
+            ranked = []
+            while len(heap) > 0:
+                count, page = heap.remove_max()
+                try:
+                    number = pageNumbers[page]
+                except KeyError:
+                    number = pageNumbers[page] = len(urls)
+                    urls.append(page.getUrl())
+                    site = WebSite.getSiteFromPage(page)
+                    try:
+                        pageSites.append(siteNumbers[site])
+                    except KeyError:
+                        pageSites.append(len(siteStrings))
+                        siteNumbers[site] = len(siteStrings)
+                        siteStrings.append(self.__siteString(site, generation))
+                ranked.append((number, count))
+            lists.append(ranked)
+        return SharedIndex.create(words, lists, urls, pageSites, siteStrings, invertedIndex._normalizer, name, path)
+
+    def getInstrumentation(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        Instrumentation | None
+            The collector of the latencies, counters and slow queries of the searches, None if they are not measured.
+        """
+        return self._instrumentation
+
+    def __insertPage(self, invertedIndex, url, content, reference = None):
+        """
+        Utility method which inserts a page in the WebSite of its host, creating it if it does not exist yet, 
+        and adds the page to the given inverted index.
+
+        Parameters
+        ----------
+        invertedIndex : InvertedIndex | SpillingIndexBuilder
+            The inverted index to which adding the page.
+        url : str
+            URL of the page, including the hostname.
+        content : str
+            Content of the page.
+        reference : ContentReference | None
+            Reference to the content of the page, which is saved in the page instead of the content if present.
+
+        Returns
+        -------
+        Element
+            The inserted page.
+        """
+        hostname = url.split('/')[0]
+        stored = content if reference is None else reference
+        # populate the database and the inverted index
+        try:
+            page = self._database[hostname].insertPage(url, stored)
+        except KeyError:
+            self._database[hostname] = WebSite(hostname, self._subtrees)
+            page = self._database[hostname].insertPage(url, stored)
+        invertedIndex.addPage(page, content)
+        return page
+
+    def __siteString(self, site, generation):
+        """
+        Utility method which returns the site string of the given WebSite as it was when the given generation 
+        has been published.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            The time to concatenate the hostname and the cached rendering of the structure of the site.
+        """
+        if generation._siteIds is None: return site.getSiteString()
+        host = site.getHost()
+        return host + '\n' + self._subtrees.getRendering(generation._siteIds[host], 3)
+
+    def search(self, keyword, k, scope = None, output = None):
+        """
+        Searches the k web pages with the maximum number of occurrences of the searched keyword. It returns a string s built as follows: for 
+        each of these k pages sorted in descending order of occurrences, the site strings (as defined above) of the site hosting that page is 
+        added to s, unless this site has been already inserted. If the keyword has an up-to-date champion list of at least k pages, 
+        the pages are read from it instead of ranking the whole occurrence list.
+        If a scope (a hostname or a URL prefix, e.g. www.unisa.it/diem/) is given, only the pages inside it are 
+        ranked, and they are found without visiting the other pages of the occurrence list.
+        If an output is given, the string is written to it piece by piece instead of being returned, so 
+        that the response for huge sites can be streamed to a file or socket without being held in memory.
+
+        Parameters
+        ----------
+        keyword : str
+            word to be searched in the different pages
+        k : int
             number of pages to search
+        scope : str | None
+            hostname or URL prefix of the pages to search, None to search all the pages
+        output : file-like object | None
+            object with a write(str) method to which the string is written, None to return it
 
         Returns
         -------
-        str
+        str | None
             concatenation of the string description of the structure of all the websites with the higher number of occurrences of the given word
-            in order of number of occurrences and without duplicates.
+            in order of number of occurrences and without duplicates, None if it has been written to output.
         """                  
-        s = ""
-        list = self._invertedIndex.getList(keyword) # occurrence list of the given keyword
-        maxHeap = MaxOrientedPriorityQueue(list)  
-        # I want to use a max-oriented heap, built from the _occurrenceList dictionary in order to be 
-        # able to extract the max at each iteration
-        length = min(len(maxHeap),k)
-        map = ProbeHashMap(length)
-        # the ProbeHashMap is a utility structure used to deal with the problem of duplicates 
+        generation = self._generation
+        stats = self._instrumentation
+        trace = None if stats is None else stats.startQuery(keyword, k, scope)
+        try:
+            if scope is not None:
+                list = generation._invertedIndex.getScopedList(keyword, scope)
+                hits = SearchResults(list).getHits(0, k)
+                if trace is not None: trace.listSize = trace.postingsScanned = len(list)
+            else:
+                champions = generation._invertedIndex.getChampions(keyword, k)
+                if champions is not None:
+                    # the champion list of the keyword already contains the first k pages
+                    hits = [SearchHit(page.getUrl(), score, WebSite.getSiteFromPage(page)) for score, page in champions]
+                    if trace is not None: trace.listSize = trace.postingsScanned = len(champions)
+                else:
+                    results = self.__searchResults(generation, keyword, trace)
+                    hits = results.getHits(0, k)
+                    if trace is not None: trace.listSize = len(results)
+            if trace is not None: trace.mark('ranking')
+            if output is not None:
+                rendered = self.__writeResult(output, hits, generation)
+                result = None
+            else:
+                result = self.__composeResult(hits, generation)
+                rendered = len(result)
+        except Exception as error:
+            if trace is not None: stats.finishQuery(trace, error)
+            raise
+        if trace is not None:
+            trace.charactersRendered = rendered
+            trace.mark('rendering')
+            stats.finishQuery(trace)
+        return result
+
+    def hasKeyword(self, keyword):
+        """
+        Checks if the keyword occurs in some page, so that the callers expecting many absent keywords can 
+        avoid the NOOccurrenceListException raised by the search methods. Most of the absent keywords are 
+        rejected by the Bloom filter of the vocabulary, without visiting the trie.
+
+        Parameters
+        ----------
+        keyword : str
+            word to be searched
+
+        Returns
+        -------
+        bool
+            True if the keyword has an occurrence list, False otherwise.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword))
+            O(1) after the hash of the keyword for most of the absent keywords.
+        """
+        return self._generation._invertedIndex.findList(keyword) is not None
+
+    def searchResults(self, keyword):
+        """
+        Returns the ranked results of the searched keyword, as a SearchResults object from which the hits 
+        (page url, number of occurrences, site) are extracted lazily, in descending order of occurrences. 
+        The results of the most recent keywords are cached, so that asking for the following pages of hits 
+        continues from the hits already extracted instead of recomputing them.
+
+        Parameters
+        ----------
+        keyword : str
+            word to be searched in the different pages
+
+        Returns
+        -------
+        SearchResults
+            the ranked results of the keyword.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword)) if the results are cached, O(len(keyword) + n) otherwise
+            Where n is the number of pages containing the keyword, which are heapified.
+        """
+        return self.__searchResults(self._generation, keyword)
+
+    def __searchResults(self, generation, keyword, trace = None):
+        """
+        Utility method which returns the (cached) ranked results of the keyword in the given generation, 
+        counting the postings scanned in the trace of the query, if any, when they are not cached.
+        """
+        cache = generation._results
+        with generation._lock:
+            try:
+                results = cache[keyword]
+                cache.move_to_end(keyword)
+                return results
+            except KeyError:
+                pass
+        results = SearchResults(generation._invertedIndex.getList(keyword)) # occurrence list of the given keyword
+        if trace is not None: trace.postingsScanned = len(results)
+        with generation._lock:
+            results = cache.setdefault(keyword, results)
+            if len(cache) > self._RESULTS_CACHE_SIZE: cache.popitem(last = False)
+        return results
+
+    def searchHits(self, keyword, offset = 0, count = 10):
+        """
+        Returns a page of the ranked hits of the searched keyword: the hits from position offset (included) 
+        to position offset + count (excluded). The next page starts from offset + count.
+
+        Parameters
+        ----------
+        keyword : str
+            word to be searched in the different pages
+        offset : int
+            position of the first hit to return
+        count : int
+            maximum number of hits to return
+
+        Returns
+        -------
+        list
+            the SearchHit objects of the requested page, empty if offset is beyond the last hit.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword) + (offset + count)•log(n))
+            Only the hits not extracted yet by previous calls are extracted from the heap.
+        """
+        return self.searchResults(keyword).getHits(offset, count)
+
+    def searchPhrase(self, phrase, k):
+        """
+        Searches the k web pages with the maximum number of occurrences of the given phrase, and returns 
+        the same string of the search method. It requires a positional InvertedIndex.
+
+        Parameters
+        ----------
+        phrase : str
+            consecutive words to be searched in the different pages
+        k : int
+            number of pages to search
+
+        Returns
+        -------
+        str
+            concatenation of the string description of the structure of all the websites with the higher number of occurrences of the given phrase
+            in order of number of occurrences and without duplicates.
+        """
+        generation = self._generation
+        list = generation._invertedIndex.getPhraseList(phrase)
+        return self.__composeResult(SearchResults(list).getHits(0, k), generation)
+
+    def searchKeywords(self, query, k):
+        """
+        Searches the k web pages with the maximum total number of occurrences of the keywords of the query, 
+        skipping the pages which can not enter the top k (block-max pruning), and returns the same string of the search 
+        method. For equal occurrences, the pages added first come first.
+
+        Parameters
+        ----------
+        query : str
+            keywords separated by whitespaces
+        k : int
+            number of pages to search
+
+        Returns
+        -------
+        str
+            concatenation of the string description of the structure of all the websites with the higher number of occurrences of the 
+            keywords, in order of number of occurrences and without duplicates.
+        """
+        generation = self._generation
+        pages = generation._invertedIndex.getTopPages(query, k)
+        hits = [SearchHit(page.getUrl(), score, WebSite.getSiteFromPage(page)) for score, page in pages]
+        return self.__composeResult(hits, generation)
+
+    def searchFuzzy(self, keyword, k, maxEdits = 1):
+        """
+        Searches the k web pages with the maximum number of occurrences of the words within maxEdits insertions, 
+        deletions and substitutions from the keyword, so that a misspelled keyword still finds the pages of the 
+        intended word, and returns the same string of the search method.
+
+        Parameters
+        ----------
+        keyword : str
+            (possibly misspelled) word to be searched in the different pages
+        k : int
+            number of pages to search
+        maxEdits : int
+            maximum edit distance between the keyword and the words of the pages
+
+        Returns
+        -------
+        str
+            concatenation of the string description of the structure of all the websites with the higher number of occurrences of the 
+            matching words, in order of number of occurrences and without duplicates.
+        """
+        generation = self._generation
+        list = generation._invertedIndex.getFuzzyList(keyword, maxEdits)
+        return self.__composeResult(SearchResults(list).getHits(0, k), generation)
+
+    def searchNear(self, keyword1, keyword2, distance, k):
+        """
+        Searches the k web pages with the maximum number of occurrences of keyword1 at most distance words far 
+        from keyword2 (NEAR/distance operator), and returns the same string of the search method. It requires a 
+        positional InvertedIndex.
+
+        Parameters
+        ----------
+        keyword1 : str
+            first word to be searched
+        keyword2 : str
+            second word to be searched
+        distance : int
+            maximum distance between the two words
+        k : int
+            number of pages to search
+
+        Returns
+        -------
+        str
+            concatenation of the string description of the structure of all the websites with the higher number of matches,
+            in order of number of matches and without duplicates.
+        """
+        generation = self._generation
+        list = generation._invertedIndex.getNearList(keyword1, keyword2, distance)
+        return self.__composeResult(SearchResults(list).getHits(0, k), generation)
+
+    def __composeResult(self, hits, generation):
+        """
+        Utility method which concatenates the site strings of the sites hosting the given hits, without 
+        duplicates.
+
+        Parameters
+        ----------
+        hits : list
+            first k SearchHit objects of a query, in ranking order
+        generation : _Generation
+            generation from which the results have been computed
+
+        Returns
+        -------
+        str
+            concatenation of the string description of the structure of the websites.
+        """
+        parts = []
+        map = self._newMap(max(len(hits), 1))
+        # the map is a utility structure used to deal with the problem of duplicates 
         # in the construction of the output string
-        while length > 0:       
-            k,v = maxHeap.remove_max()              
-            site = WebSite.getSiteFromPage(v)
+        for hit in hits:
+            try:
+                map[hit.site] += 1
+            except KeyError:
+                map[hit.site] = 1
+                parts.append(self.__siteString(hit.site, generation))
+        return ''.join(parts)[:-1]
+
+    def __writeResult(self, output, hits, generation):
+        """
+        Utility method which writes the same string of __composeResult to output, one piece at a time, 
+        holding back the last piece to remove its final newline, and returns the number of characters written.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            Where n is the total size of the structures of the sites, which are visited with an explicit stack.
+        """
+        map = self._newMap(max(len(hits), 1))
+        pending = None
+        written = 0
+        for hit in hits:
             try:
-                if map[site] > 1: 
-                    map[site] += 1
+                map[hit.site] += 1
             except KeyError:
-                map[site] = 1
-                s += site.getSiteString()
-            length -= 1
-        return s[:-1]   
\ No newline at end of file
+                map[hit.site] = 1
+                for piece in self.__sitePieces(hit.site, generation):
+                    if pending is not None: 
+                        output.write(pending)
+                        written += len(pending)
+                    pending = piece
+        if pending is not None: 
+            output.write(pending[:-1])
+            written += len(pending) - 1
+        return written
+
+    def __sitePieces(self, site, generation):
+        """
+        Utility generator of the pieces of the site string of the given WebSite as it was when the given 
+        generation has been published.
+        """
+        if generation._siteIds is None:
+            yield from site.iterSiteString()
+            return
+        host = site.getHost()
+        yield host + '\n'
+        yield from self._subtrees.iterRendering(generation._siteIds[host], 3)   
\ No newline at end of file
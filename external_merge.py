@@ -0,0 +1,178 @@
+import os
+import heapq
+import pickle
+import tempfile
+from array import array
+
+class SpillingIndexBuilder:
+    """
+    A class to build the postings of many pages with a bounded amount of memory, with an external merge sort.
+    The postings of the pages are accumulated in a buffer, grouped by word; when the estimated size of the
+    buffer exceeds the memory budget, the buffer is sorted by word and written to a temporary file (a run)
+    and emptied. At the end, the runs are merged with a k-way merge, which reads one word of each run at a
+    time, and the postings of each word are added to the InvertedIndex at once.
+
+    Since the runs are written in order of ingestion and the merge is stable, the pages of each occurrence
+    list are added in the same order in which they would have been added by InvertedIndex.addPage.
+
+    Attributes
+    ----------
+    _index : InvertedIndex
+        Inverted Index to which the postings are added.
+    _budget : int
+        Maximum estimated size in bytes of the buffer.
+    _directory : str | None
+        Directory of the temporary files, None for the default one.
+    _buffer : dictionary
+        Collection of the postings (values) of each word (keys) since the last spill, as lists of
+        (page number, count, positions) triples.
+    _size : int
+        Estimated size in bytes of the buffer.
+    _pages : list
+        Pages added to the builder, whose position is their page number.
+    _runs : list
+        Paths of the runs written so far.
+
+    Methods
+    -------
+    addPage
+        Adds the postings of a page to the buffer, spilling it if it exceeds the budget.
+    build
+        Merges the runs and the buffer into the InvertedIndex.
+    getRunsCount
+        Returns the number of runs written so far.
+    """
+
+    __slots__ = ['_index', '_budget', '_directory', '_buffer', '_size', '_pages', '_runs']
+
+    _WORD_COST = 120    # estimated bytes of a word of the buffer (key and list)
+    _POSTING_COST = 80  # estimated bytes of a posting of the buffer (tuple and its items)
+
+    def __init__(self, index, memoryBudget, directory = None):
+        """
+        Creates a new builder.
+
+        Parameters
+        ----------
+        index : InvertedIndex
+            Inverted Index to which the postings are added by build.
+        memoryBudget : int
+            Maximum estimated size in bytes of the postings kept in memory before spilling them.
+        directory : str | None
+            Directory of the temporary files, None for the default one.
+        """
+        self._index = index
+        self._budget = memoryBudget
+        self._directory = directory
+        self._buffer = {}
+        self._size = 0
+        self._pages = []
+        self._runs = []
+
+    def addPage(self, page, text = None):
+        """
+        Adds the postings of the words of a page to the buffer, with the same tokenization of the InvertedIndex,
+        and spills the buffer to a new run if its estimated size exceeds the budget.
+
+        Parameters
+        ----------
+        page : Element
+            Page of which processing the words.
+        text : str | None
+            Content of the page, if it has already been loaded.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(content)) amortized
+            Each spill costs O(b•log(b)) for a buffer of b postings, which have been added by the previous pages.
+        """
+        index = self._index
+        if text is None: text = page.getContent()
+        index._registerPage(page)
+        number = len(self._pages)
+        self._pages.append(page)
+        words = index._tokenize(text)
+        positional = index._positional
+        counts = {}
+        for position, word in enumerate(words):
+            try:
+                entry = counts[word]
+                entry[0] += 1
+            except KeyError:
+                entry = counts[word] = [1, array('I') if positional else None]
+            if positional: entry[1].append(position)
+        if index._nearDuplicates is not None:
+            index._nearDuplicates.add(page, index._nearDuplicates.signature(words))
+        buffer = self._buffer
+        for word, (count, positions) in counts.items():
+            try:
+                buffer[word].append((number, count, positions))
+            except KeyError:
+                buffer[word] = [(number, count, positions)]
+                self._size += self._WORD_COST + len(word)
+            self._size += self._POSTING_COST + (4 * len(positions) if positional else 0)
+        if self._size > self._budget: self.__spill()
+
+    def __spill(self):
+        """Utility method which writes the buffer, sorted by word, to a new run and empties it."""
+        descriptor, path = tempfile.mkstemp(suffix = '.run', dir = self._directory)
+        with os.fdopen(descriptor, 'wb') as run:
+            for word in sorted(self._buffer):
+                pickle.dump((word, self._buffer[word]), run, pickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+        self._buffer = {}
+        self._size = 0
+
+    @staticmethod
+    def _read(path, order):
+        """Utility generator of the (word, run order, postings) records of a run, one at a time."""
+        with open(path, 'rb') as run:
+            while True:
+                try:
+                    word, postings = pickle.load(run)
+                except EOFError:
+                    return
+                yield word, order, postings
+
+    def getRunsCount(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The number of runs spilled to disk so far.
+        """
+        return len(self._runs)
+
+    def build(self):
+        """
+        Merges all the runs and the postings still in the buffer, word by word, and adds them to the InvertedIndex.
+        The runs are deleted.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n•log(r))
+            Where n is the total number of postings and r the number of runs: each record is read once and
+            the k-way merge keeps a heap of one record per run.
+        """
+        sources = [self._read(path, order) for order, path in enumerate(self._runs)]
+        last = [(word, len(self._runs), self._buffer[word]) for word in sorted(self._buffer)]
+        self._buffer = {}
+        pages = self._pages
+        current = None
+        merged = []
+        try:
+            # the records of the same word are merged in order of run, which is the order of ingestion
+            for word, _, postings in heapq.merge(*sources, iter(last), key = lambda record: record[:2]):
+                if word != current:
+                    if current is not None: self._index.addPostings(current, merged)
+                    current = word
+                    merged = []
+                merged.extend((pages[number], count, positions) for number, count, positions in postings)
+            if current is not None: self._index.addPostings(current, merged)
+        finally:
+            for source in sources: source.close()
+            for path in self._runs: os.remove(path)
+            self._runs = []
+            self._pages = []
@@ -0,0 +1,49 @@
+import random
+from engine import SearchEngine, NOOccurrenceListException, WebSite, InvertedIndex
+from segmented_index import SegmentedIndex
+
+DIR = "dataset"
+KEYWORDS = ["algoritm", "dta", "structur", "ingegnera"]
+
+# the matches are merged in the same order by every kind of index, so that the ties are broken in the same way
+plain = SearchEngine(DIR)
+segmented = SearchEngine(DIR, segmentSize=10)
+for keyword in KEYWORDS:
+    for maxEdits in (1, 2):
+        assert plain.searchFuzzy(keyword, 20, maxEdits) == segmented.searchFuzzy(keyword, 20, maxEdits), (keyword, maxEdits)
+print("order of the fuzzy matches: ok")
+
+def levenshtein(a, b):
+    """Returns the edit distance between a and b, with the full dynamic programming table."""
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (x != y))
+    return row[-1]
+
+# a large vocabulary of random words, many of which are within few edits from each other
+generator = random.Random(0)
+randomWord = lambda: ''.join(generator.choice("abcde") for _ in range(generator.randint(1, 7)))
+site = WebSite("www.fuzzy.it")
+indexes = [InvertedIndex(), SegmentedIndex(segmentSize = 20, tierFactor = 2, background = False)]
+for i in range(300):
+    page = site.insertPage("www.fuzzy.it/page%d.html" % i, ' '.join(randomWord() for _ in range(generator.randint(1, 15))))
+    for index in indexes: index.addPage(page)
+randomKeywords = [randomWord() for _ in range(40)]
+
+# the fuzzy list is the merge of the lists of the words found by a brute-force scan of the vocabulary
+for index, keywords in [(engine._generation._invertedIndex, KEYWORDS + ["a", "xyz"]) for engine in (plain, segmented)] + \
+                       [(index, randomKeywords) for index in indexes]:
+    vocabulary = list(index.getVocabulary())
+    for keyword in keywords:
+        for maxEdits in (0, 1, 2):
+            expected = {}
+            for word in vocabulary:
+                if levenshtein(keyword, word) <= maxEdits:
+                    for page, count in index.getList(word).items(): expected[page] = expected.get(page, 0) + count
+            try:
+                assert index.getFuzzyList(keyword, maxEdits) == expected, (keyword, maxEdits)
+            except NOOccurrenceListException:
+                assert not expected, (keyword, maxEdits)
+print("fuzzy matches against a brute-force scan: ok")
@@ -0,0 +1,411 @@
+import os
+import json
+import mmap
+import tarfile
+import zipfile
+from abc import ABC, abstractmethod
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+
+class ContentReference:
+    """
+    A class used to reference the content of a page inside a file, instead of holding its text in memory.
+    The text is loaded on demand, reading length bytes from offset, either with a normal read or from a
+    memory mapping of the file shared by all the references to it. The mappings of the last files read 
+    are kept open, up to _MAPPINGS_SIZE: the least recently used one is closed when a new file is mapped.
+
+    Attributes
+    ----------
+    _path : str
+        Absolute path of the file containing the content.
+    _offset : int
+        Position of the first byte of the content in the file.
+    _length : int
+        Number of bytes of the content.
+    _json : bool
+        If True, the bytes are a JSON record whose "content" field is the content.
+    _mapped : bool
+        If True, the content is read from a memory mapping of the file.
+
+    Methods
+    -------
+    load
+        Reads and returns the referenced text.
+    closeMappings
+        Closes all the memory mappings of the files.
+    """
+
+    __slots__ = ['_path', '_offset', '_length', '_json', '_mapped']
+
+    _mappings = OrderedDict() # memory mappings shared by all the references, by path, from the least recently used
+
+    _mappingsLock = Lock()
+
+    _MAPPINGS_SIZE = 64
+
+    def __init__(self, path, offset, length, isJson = False, mapped = False):
+        self._path = path
+        self._offset = offset
+        self._length = length
+        self._json = isJson
+        self._mapped = mapped
+
+    def _read(self):
+        """Utility method which returns the referenced bytes."""
+        if self._mapped:
+            mappings = ContentReference._mappings
+            with ContentReference._mappingsLock: # a mapping can not be closed while it is read
+                try:
+                    buffer = mappings[self._path]
+                    mappings.move_to_end(self._path)
+                except KeyError:
+                    with open(self._path, 'rb') as f:
+                        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    mappings[self._path] = buffer
+                    if len(mappings) > ContentReference._MAPPINGS_SIZE: mappings.popitem(last = False)[1].close()
+                return buffer[self._offset:self._offset + self._length] # a copy, which outlives the mapping
+        with open(self._path, 'rb') as f:
+            f.seek(self._offset)
+            return f.read(self._length)
+
+    def load(self):
+        """
+        Reads the referenced text.
+
+        Returns
+        -------
+        str
+            The content referenced by the current object.
+
+        TIME COMPLEXITY
+        ---------------
+        O(length)
+        """
+        data = self._read()
+        if self._json: return json.loads(data)["content"]
+        return data.decode('utf-8')
+
+    @staticmethod
+    def closeMappings():
+        """
+        Closes all the memory mappings of the files, e.g. before the files are deleted or replaced. 
+        They are mapped again by the next loads.
+
+        TIME COMPLEXITY
+        ---------------
+        O(m)
+            Where m is the number of open mappings.
+        """
+        with ContentReference._mappingsLock:
+            while ContentReference._mappings:
+                ContentReference._mappings.popitem()[1].close()
+
+class IngestionSource(ABC):
+    """
+    An abstract class used to model a source of webpages to be ingested by the SearchEngine. Each 
+    source is streamed record by record, where a record is a (url, content) pair, without unpacking
+    anything to disk. The time spent reading and the number of bytes read are measured, so that
+    the read throughput of each source is available. The subclasses implement _records.
+
+    Attributes
+    ----------
+    _path : str
+        Path of the source.
+    _bytesRead : int
+        Number of bytes read from the source.
+    _elapsed : float
+        Seconds spent reading from the source.
+
+    Methods
+    -------
+    _records
+        Generator of the (url, content, size, location) records of the source, to be implemented by 
+        subclasses. The location is a (path, offset, length, json) tuple, or None if the content cannot 
+        be addressed inside a file of the source.
+    records
+        Streams the (url, content, reference) records of the source.
+    getBytesRead
+        Returns the number of bytes read from the source.
+    getElapsedTime
+        Returns the number of seconds spent reading from the source.
+    getThroughput
+        Returns the read throughput of the source, in MB/s.
+    """
+
+    __slots__ = ['_path', '_bytesRead', '_elapsed']
+
+    def __init__(self, path):
+        """
+        Creates a new source reading from the given path.
+
+        Parameters
+        ----------
+        path : str
+            Path of the source.
+        """
+        self._path = path
+        self._bytesRead = 0
+        self._elapsed = 0.0
+
+    @abstractmethod
+    def _records(self):
+        """
+        Generator of the records of the source, in the order in which they are read.
+
+        Yields
+        ------
+        (str, str, int, tuple | None)
+            The URL and the content of a page, the number of bytes read for it and the location of its 
+            content: a (path, offset, length, json) tuple, or None if the content cannot be addressed 
+            inside a file of the source.
+        """
+
+    @staticmethod
+    def _splitRecord(data):
+        """
+        Utility method which splits the bytes of a page file into its URL, which is written in the
+        first line, and its content, which is written in the next lines.
+
+        Returns
+        -------
+        str
+            The URL of the page.
+        str
+            The content of the page.
+        int
+            Offset of the content from the beginning of data.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(data))
+        """
+        newline = data.find(b'\n')
+        if newline == -1: newline = len(data)
+        url = data[:newline].decode('utf-8').rstrip('\r')
+        return url, data[newline+1:].decode('utf-8'), newline + 1
+
+    def records(self, lazy = None):
+        """
+        Streams the (url, content, reference) records of the source, measuring only the time spent
+        reading them and not the time spent by the consumer to process them.
+
+        Parameters
+        ----------
+        lazy : str | None
+            If 'file' or 'mmap', a ContentReference to the content is built for each record whose 
+            content is addressable in a file (read with a normal read or with a memory mapping 
+            respectively). Otherwise, and for the not addressable records, the reference is None.
+        """
+        records = self._records()
+        while True:
+            start = perf_counter()
+            try:
+                url, content, size, location = next(records)
+            except StopIteration:
+                self._elapsed += perf_counter() - start
+                return
+            self._elapsed += perf_counter() - start
+            self._bytesRead += size
+            if lazy is None or location is None: reference = None
+            else: reference = ContentReference(*location, mapped = lazy == 'mmap')
+            yield url, content, reference
+
+    def __iter__(self):
+        """Streams the (url, content) records of the source."""
+        for url, content, _ in self.records():
+            yield url, content
+
+    def getBytesRead(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The number of bytes read from the source.
+        """
+        return self._bytesRead
+
+    def getElapsedTime(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        float
+            The number of seconds spent reading from the source.
+        """
+        return self._elapsed
+
+    def getThroughput(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        float
+            The read throughput of the source in MB/s, 0 if nothing has been read yet.
+        """
+        if self._elapsed == 0: return 0.0
+        return self._bytesRead / (1024 * 1024) / self._elapsed
+
+# --------------------------------------------------------------------
+
+class DirectorySource(IngestionSource):
+    """
+    A source reading the .txt files of a directory and of all its subdirectories, each containing in the
+    first line the URL of a webpage and in the next lines its content. The directories are visited with
+    os.scandir, depth first, without changing the working directory. The files are read ahead by a bounded
+    pool of threads, so that the reads overlap with the processing of the previous records, which are still
+    returned in the order in which the files are visited.
+
+    Attributes
+    ----------
+    _workers : int
+        Number of threads reading the files.
+    _queueDepth : int
+        Maximum number of files being read ahead of the consumer, 0 to read each file only when it is
+        requested.
+    """
+
+    __slots__ = ['_workers', '_queueDepth']
+
+    def __init__(self, path, workers = 4, queueDepth = 16):
+        """
+        Creates a new source reading from the given directory.
+
+        Parameters
+        ----------
+        path : str
+            Path of the directory.
+        workers : int
+            Number of threads reading the files.
+        queueDepth : int
+            Maximum number of files being read ahead of the consumer, 0 to read them synchronously.
+        """
+        super().__init__(path)
+        self._workers = workers
+        self._queueDepth = queueDepth
+
+    def _paths(self):
+        """
+        Utility generator of the absolute paths of the .txt files of the directory and of its subdirectories,
+        depth first. The symbolic links to directories are not followed, so that no cycle can be visited.
+        """
+        stack = [os.scandir(self._path)]
+        try:
+            while stack:
+                entry = next(stack[-1], None)
+                if entry is None:
+                    stack.pop().close()
+                elif entry.is_dir(follow_symlinks=False):
+                    stack.append(os.scandir(entry.path))
+                elif entry.name.endswith(".txt") and entry.is_file():
+                    yield os.path.abspath(entry.path)
+        finally:
+            for iterator in stack: iterator.close()
+
+    @staticmethod
+    def _read(path):
+        """Utility method which returns the bytes of a file (the read releases the GIL)."""
+        with open(path, 'rb') as f:
+            return path, f.read()
+
+    def _record(self, path, data):
+        """Utility method which returns the (url, content, size, location) record of the bytes of a file."""
+        url, content, offset = self._splitRecord(data)
+        return url, content, len(data), (path, offset, len(data) - offset, False)
+
+    def _records(self):
+        if self._queueDepth <= 0 or self._workers <= 0:
+            for path in self._paths():
+                yield self._record(*self._read(path))
+            return
+        with ThreadPoolExecutor(self._workers) as executor:
+            pending = deque()
+            try:
+                for path in self._paths():
+                    pending.append(executor.submit(self._read, path))
+                    if len(pending) > self._queueDepth: yield self._record(*pending.popleft().result())
+                while pending:
+                    yield self._record(*pending.popleft().result())
+            finally:
+                for future in pending: future.cancel() # the consumer stopped early
+
+class TarSource(IngestionSource):
+    """
+    A source reading the .txt members of a tar archive, also compressed (tar.gz, tar.bz2, tar.xz),
+    each with the same format of the files of a DirectorySource. The archive is read as a stream.
+    Only the contents of an uncompressed archive can be referenced.
+    """
+
+    __slots__ = []
+
+    def _records(self):
+        path = os.path.abspath(self._path)
+        addressable = path.lower().endswith(".tar")
+        with tarfile.open(path, 'r|*') as tar:
+            for member in tar:
+                if member.isfile() and member.name.endswith(".txt"):
+                    url, content, offset = self._splitRecord(tar.extractfile(member).read())
+                    location = (path, member.offset_data + offset, member.size - offset, False) if addressable else None
+                    yield url, content, member.size, location
+
+class ZipSource(IngestionSource):
+    """
+    A source reading the .txt members of a zip archive, each with the same format of the files
+    of a DirectorySource. Each member is decompressed in memory, so its content cannot be referenced.
+    """
+
+    __slots__ = []
+
+    def _records(self):
+        with zipfile.ZipFile(self._path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(".txt"):
+                    url, content, _ = self._splitRecord(archive.read(info))
+                    yield url, content, info.file_size, None
+
+class JsonlSource(IngestionSource):
+    """
+    A source reading a newline-delimited JSON file, in which each line is a record of the
+    form {"url": ..., "content": ...}.
+    """
+
+    __slots__ = []
+
+    def _records(self):
+        path = os.path.abspath(self._path)
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["url"], record["content"], len(line), (path, offset, len(line), True)
+                offset += len(line)
+
+# --------------------------------------------------------------------
+
+def openSource(path):
+    """
+    Returns the IngestionSource suited for the given path, which is chosen by its extension:
+    tar archives (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz), zip archives (.zip), newline-delimited
+    JSON files (.jsonl, .ndjson) and directories otherwise.
+
+    Parameters
+    ----------
+    path : str
+        Path of the source.
+
+    Returns
+    -------
+    IngestionSource
+        The source reading from path.
+    """
+    name = path.lower()
+    if name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")): return TarSource(path)
+    if name.endswith(".zip"): return ZipSource(path)
+    if name.endswith((".jsonl", ".ndjson")): return JsonlSource(path)
+    return DirectorySource(path)
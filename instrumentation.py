@@ -0,0 +1,456 @@
+import json
+from collections import deque
+from math import ceil, log2
+from threading import Lock
+from time import perf_counter, time, strftime, localtime
+
+class LatencyHistogram:
+    """
+    A class to model an HDR-style histogram of non-negative integer values (e.g. latencies in microseconds),
+    which records each value in constant time and memory logarithmic in the largest value, with a bounded
+    relative error. The values are grouped in buckets, one for each power of two, each split in the same
+    number of linear sub-buckets: the values smaller than the number of sub-buckets are recorded exactly,
+    while the larger ones are rounded down to a multiple of their bucket's unit, so that every value is
+    known with the given number of significant decimal digits.
+
+    Attributes
+    ----------
+    _subBits : int
+        Number of bits of the sub-bucket index, so that 2**_subBits sub-buckets give the precision.
+    _counts : list
+        Number of values recorded in each sub-bucket, grown when a larger value is recorded.
+    _count : int
+        Number of values recorded.
+    _total : int
+        Sum of the values recorded.
+    _min : int | None
+        Smallest value recorded, None if the histogram is empty.
+    _max : int | None
+        Largest value recorded, None if the histogram is empty.
+
+    Methods
+    -------
+    record
+        Records a value.
+    getCount
+        Returns the number of values recorded.
+    getMean
+        Returns the mean of the values recorded.
+    getMin / getMax
+        Return the smallest and the largest value recorded.
+    getValueAtPercentile
+        Returns the value below which a given percentage of the values falls.
+    toDict
+        Returns a summary of the histogram.
+    """
+
+    __slots__ = ['_subBits', '_counts', '_count', '_total', '_min', '_max']
+
+    PERCENTILES = (50, 90, 99, 99.9) # percentiles of the summaries
+
+    def __init__(self, significantDigits = 2):
+        """
+        Creates a new empty histogram.
+
+        Parameters
+        ----------
+        significantDigits : int
+            Number of significant decimal digits kept for each value (from 1 to 5).
+        """
+        if not 1 <= significantDigits <= 5: raise ValueError("significantDigits must be between 1 and 5")
+        self._subBits = ceil(log2(2 * 10 ** significantDigits))
+        self._counts = []
+        self._count = 0
+        self._total = 0
+        self._min = None
+        self._max = None
+
+    def __index(self, value):
+        """Utility method which returns the index of the sub-bucket of the value."""
+        bucket = max(0, value.bit_length() - self._subBits)
+        return (bucket << (self._subBits - 1)) + (value >> bucket)
+
+    def __highestEquivalent(self, index):
+        """Utility method which returns the largest value recorded in the sub-bucket of the given index."""
+        half = 1 << (self._subBits - 1)
+        bucket = max(0, (index >> (self._subBits - 1)) - 1)
+        return ((index - bucket * half) << bucket) + (1 << bucket) - 1
+
+    def record(self, value):
+        """
+        Records a value.
+
+        Parameters
+        ----------
+        value : int
+            Value to be recorded, negative values are recorded as 0.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1) amortized
+        """
+        value = max(0, int(value))
+        index = self.__index(value)
+        counts = self._counts
+        if index >= len(counts): counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self._count += 1
+        self._total += value
+        if self._min is None or value < self._min: self._min = value
+        if self._max is None or value > self._max: self._max = value
+
+    def getCount(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The number of values recorded.
+        """
+        return self._count
+
+    def getMean(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        float | None
+            The exact mean of the values recorded, None if the histogram is empty.
+        """
+        return self._total / self._count if self._count else None
+
+    def getMin(self):
+        """Returns the smallest value recorded, None if the histogram is empty."""
+        return self._min
+
+    def getMax(self):
+        """Returns the largest value recorded, None if the histogram is empty."""
+        return self._max
+
+    def getValueAtPercentile(self, percentile):
+        """
+        Returns the value at the given percentile: the largest value of the sub-bucket in which the values
+        recorded, in ascending order, reach the given percentage of their number.
+
+        Parameters
+        ----------
+        percentile : float
+            Percentage between 0 and 100.
+
+        Returns
+        -------
+        int | None
+            The value at the percentile, None if the histogram is empty.
+
+        TIME COMPLEXITY
+        ---------------
+        O(b)
+            Where b is the number of sub-buckets, which is logarithmic in the largest value.
+        """
+        if not self._count: return None
+        target = max(1, ceil(min(max(percentile, 0), 100) / 100 * self._count))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= target: return min(self.__highestEquivalent(index), self._max)
+        return self._max
+
+    def toDict(self):
+        """
+        Returns a summary of the histogram.
+
+        Returns
+        -------
+        dictionary
+            The count, minimum, mean, maximum and the values at PERCENTILES (keys 'p50', 'p90', ...).
+
+        TIME COMPLEXITY
+        ---------------
+        O(b)
+        """
+        summary = {'count': self._count, 'min': self._min, 'mean': self.getMean(), 'max': self._max}
+        for percentile in self.PERCENTILES:
+            summary['p%g' % percentile] = self.getValueAtPercentile(percentile)
+        return summary
+
+
+class QueryTrace:
+    """
+    A class to model the measures of a single query while it runs: the time of each of its phases and the
+    amount of work it has done.
+
+    Attributes
+    ----------
+    keyword : str
+        Searched keyword.
+    k : int
+        Number of pages requested.
+    scope : str | None
+        Scope of the query.
+    phases : list
+        (phase name, seconds) pairs, in order.
+    listSize : int
+        Number of postings of the list read by the query (the occurrence list, the champion list or the
+        scoped list of the keyword).
+    postingsScanned : int
+        Number of postings visited by the query, 0 if its ranked results were cached.
+    charactersRendered : int
+        Number of characters of the response.
+    error : str | None
+        Name of the exception raised by the query, if any.
+    """
+
+    __slots__ = ['keyword', 'k', 'scope', 'phases', 'listSize', 'postingsScanned', 'charactersRendered', 'error',
+                 '_start', '_last', '_timestamp']
+
+    def __init__(self, keyword, k, scope = None):
+        """Starts the trace of a query."""
+        self.keyword = keyword
+        self.k = k
+        self.scope = scope
+        self.phases = []
+        self.listSize = 0
+        self.postingsScanned = 0
+        self.charactersRendered = 0
+        self.error = None
+        self._timestamp = time()
+        self._start = self._last = perf_counter()
+
+    def mark(self, phase):
+        """
+        Ends a phase of the query, which started at the end of the previous one.
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase.
+        """
+        now = perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def getElapsed(self):
+        """Returns the seconds elapsed from the start of the query to the end of its last phase."""
+        return self._last - self._start
+
+    def toDict(self):
+        """Returns the measures of the query, with the times in milliseconds."""
+        return {'timestamp': self._timestamp, 'keyword': self.keyword, 'k': self.k, 'scope': self.scope,
+                'totalMs': self.getElapsed() * 1000, 'phasesMs': {name: seconds * 1000 for name, seconds in self.phases},
+                'listSize': self.listSize, 'postingsScanned': self.postingsScanned,
+                'charactersRendered': self.charactersRendered, 'error': self.error}
+
+
+class Instrumentation:
+    """
+    A class to collect the measures of the queries of a SearchEngine: an HDR-style histogram of the latency
+    of the queries and one of each of their phases, counters of the work done, and a log of the slowest
+    queries, which records the keyword, the timing breakdown and the size of the list read. The queries
+    can be executed by many threads, so the measures are collected under a lock, once per query.
+
+    Attributes
+    ----------
+    _latency : LatencyHistogram
+        Latency of the queries, in microseconds.
+    _phases : dictionary
+        Collection of the latency histograms (values) of each phase (keys).
+    _counters : dictionary
+        Collection of the counters (values) by name (keys).
+    _slowQueries : deque
+        Measures of the last slow queries, as dictionaries.
+    _threshold : float
+        Latency in seconds above which a query is slow.
+    _significantDigits : int
+        Precision of the histograms.
+    _lock : Lock
+        Lock protecting the measures.
+
+    Methods
+    -------
+    startQuery
+        Returns the trace of a new query.
+    finishQuery
+        Records the measures of a query.
+    getLatency
+        Returns the latency histogram of the queries.
+    getCounters
+        Returns the counters.
+    getSlowQueries
+        Returns the log of the slow queries.
+    toDict / toJson
+        Export the measures.
+    report
+        Returns the measures as a text report.
+    reset
+        Discards all the measures.
+    """
+
+    __slots__ = ['_latency', '_phases', '_counters', '_slowQueries', '_threshold', '_significantDigits', '_lock']
+
+    COUNTERS = ('queries', 'errors', 'slowQueries', 'postingsScanned', 'charactersRendered')
+
+    def __init__(self, slowQueryThreshold = 0.1, slowQueryLogSize = 100, significantDigits = 2):
+        """
+        Creates a new Instrumentation without measures.
+
+        Parameters
+        ----------
+        slowQueryThreshold : float
+            Latency in seconds above which a query is recorded in the slow-query log.
+        slowQueryLogSize : int
+            Number of the most recent slow queries which are kept.
+        significantDigits : int
+            Number of significant decimal digits of the latencies in the histograms.
+        """
+        self._threshold = slowQueryThreshold
+        self._significantDigits = significantDigits
+        self._slowQueries = deque(maxlen = slowQueryLogSize)
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """Discards all the measures collected so far."""
+        with self._lock:
+            self._latency = LatencyHistogram(self._significantDigits)
+            self._phases = {}
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+            self._slowQueries.clear()
+
+    def startQuery(self, keyword, k, scope = None):
+        """
+        Returns the trace of a new query, which starts now.
+
+        Returns
+        -------
+        QueryTrace
+            The trace, whose phases are marked by the query and which is passed to finishQuery at its end.
+        """
+        return QueryTrace(keyword, k, scope)
+
+    def finishQuery(self, trace, error = None):
+        """
+        Records the measures of an ended query.
+
+        Parameters
+        ----------
+        trace : QueryTrace
+            Trace of the query.
+        error : Exception | None
+            Exception raised by the query, if any.
+
+        TIME COMPLEXITY
+        ---------------
+        O(p)
+            Where p is the number of phases of the query.
+        """
+        if error is not None:
+            trace.mark('failed') # the time from the last phase to the exception
+            trace.error = type(error).__name__
+        elapsed = trace.getElapsed()
+        with self._lock:
+            self._latency.record(elapsed * 1e6)
+            for name, seconds in trace.phases:
+                try:
+                    histogram = self._phases[name]
+                except KeyError:
+                    histogram = self._phases[name] = LatencyHistogram(self._significantDigits)
+                histogram.record(seconds * 1e6)
+            counters = self._counters
+            counters['queries'] += 1
+            if error is not None: counters['errors'] += 1
+            counters['postingsScanned'] += trace.postingsScanned
+            counters['charactersRendered'] += trace.charactersRendered
+            if elapsed >= self._threshold:
+                counters['slowQueries'] += 1
+                self._slowQueries.append(trace.toDict())
+
+    def getLatency(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        LatencyHistogram
+            The histogram of the latencies of the queries, in microseconds.
+        """
+        return self._latency
+
+    def getCounters(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        dictionary
+            A copy of the counters.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def getSlowQueries(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        list
+            The measures of the most recent slow queries, from the oldest, as dictionaries.
+        """
+        with self._lock:
+            return list(self._slowQueries)
+
+    def toDict(self):
+        """
+        Returns all the measures, with the latencies of the histograms in microseconds.
+
+        Returns
+        -------
+        dictionary
+            The 'latencyUs' and 'phasesUs' summaries, the 'counters' and the 'slowQueries' log.
+        """
+        with self._lock:
+            return {'latencyUs': self._latency.toDict(),
+                    'phasesUs': {name: histogram.toDict() for name, histogram in self._phases.items()},
+                    'counters': dict(self._counters),
+                    'slowQueryThresholdMs': self._threshold * 1000,
+                    'slowQueries': list(self._slowQueries)}
+
+    def toJson(self, indent = None):
+        """Returns the measures of toDict as a JSON string."""
+        return json.dumps(self.toDict(), indent = indent)
+
+    @staticmethod
+    def __summaryLine(label, summary):
+        """Utility method which formats the summary of a histogram on a line."""
+        if not summary['count']: return label + ": no queries"
+        values = ' '.join('%s %s' % (key, summary[key]) for key in summary if key.startswith('p'))
+        return "%s: min %s %s max %s mean %.1f" % (label, summary['min'], values, summary['max'], summary['mean'])
+
+    def report(self):
+        """
+        Returns the measures as a human readable text report.
+
+        Returns
+        -------
+        str
+            The report, one measure per line.
+        """
+        measures = self.toDict()
+        counters = measures['counters']
+        lines = ["queries: %d (%d errors, %d slow)" % (counters['queries'], counters['errors'], counters['slowQueries']),
+                 self.__summaryLine("latency (us)", measures['latencyUs'])]
+        for name, summary in measures['phasesUs'].items():
+            lines.append(self.__summaryLine("  " + name + " (us)", summary))
+        lines.append("postings scanned: %d" % counters['postingsScanned'])
+        lines.append("characters rendered: %d" % counters['charactersRendered'])
+        slow = measures['slowQueries']
+        lines.append("slow queries (over %g ms, last %d):" % (measures['slowQueryThresholdMs'], len(slow)))
+        for query in slow:
+            phases = ' '.join('%s=%.2fms' % (name, ms) for name, ms in query['phasesMs'].items())
+            lines.append("  %s keyword=%r k=%d scope=%r total=%.2fms %s list=%d scanned=%d characters=%d%s" % (
+                strftime('%Y-%m-%d %H:%M:%S', localtime(query['timestamp'])), query['keyword'], query['k'], query['scope'],
+                query['totalMs'], phases, query['listSize'], query['postingsScanned'], query['charactersRendered'],
+                '' if query['error'] is None else ' error=' + query['error']))
+        return '\n'.join(lines)
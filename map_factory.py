@@ -0,0 +1,61 @@
+"""
+Factories of the maps used by the SearchEngine and by the tries, so that their implementation can be chosen
+when they are created:
+
+- 'probe': the ProbeHashMap of TdP_collections (open addressing with linear probing, implemented in Python),
+  with the given initial capacity of its table if any;
+- 'presized': a ProbeHashMap whose table is large enough to hold the expected number of items without
+  being resized (its load factor is kept below 1/2);
+- 'dict': the built-in dictionary, whose probing is implemented in C.
+
+Each factory takes an optional capacity, which is the expected number of items of the map.
+"""
+
+from TdP_collections.hash_table.probe_hash_map import ProbeHashMap
+
+MAP_TYPES = ('probe', 'presized', 'dict')
+
+_DEFAULT_CAPACITY = 11 # capacity of a ProbeHashMap whose number of items is unknown
+
+def _probeMap(capacity = None):
+    """Returns a new ProbeHashMap whose table has the given capacity, or the default one."""
+    return ProbeHashMap() if capacity is None else ProbeHashMap(max(capacity, 1))
+
+def _presizedMap(capacity = None):
+    """Returns a new ProbeHashMap which can hold capacity items without resizing its table."""
+    if capacity is None: capacity = _DEFAULT_CAPACITY
+    return ProbeHashMap(2 * capacity + 1)
+
+def _dictMap(capacity = None):
+    """Returns a new built-in dictionary (which can not be presized)."""
+    return {}
+
+_FACTORIES = {'probe': _probeMap, 'presized': _presizedMap, 'dict': _dictMap}
+
+def mapFactory(mapType):
+    """
+    Returns the factory of the maps of the given type.
+
+    Parameters
+    ----------
+    mapType : str
+        One of MAP_TYPES.
+
+    Returns
+    -------
+    callable
+        Function which takes an optional expected number of items and returns a new empty map.
+
+    Raises
+    ------
+    ValueError
+        if the type is not one of MAP_TYPES.
+
+    TIME COMPLEXITY
+    ---------------
+    O(1)
+    """
+    try:
+        return _FACTORIES[mapType]
+    except KeyError:
+        raise ValueError("Unknown map type: %r (expected one of %s)" % (mapType, ", ".join(MAP_TYPES))) from None
@@ -0,0 +1,193 @@
+import random
+from zlib import crc32
+
+class NearDuplicateDetector:
+    """
+    A class to detect near-duplicate pages with MinHash signatures of their word shingles and
+    Locality Sensitive Hashing: each signature is split in bands, and two pages become candidates
+    if they share at least one band. The candidates are then verified by estimating the Jaccard
+    similarity of their shingle sets from their signatures.
+
+    Attributes
+    ----------
+    _shingleSize : int
+        Number of consecutive words of a shingle.
+    _rows : int
+        Number of values of the signature in each band.
+    _threshold : float
+        Minimum estimated Jaccard similarity of two near-duplicate pages.
+    _coefficients : list
+        (a, b) coefficients of the hash functions h(x) = (a*x + b) mod p used for the permutations.
+    _buckets : dictionary
+        Collection of the pages (values) sharing each (band index, band) pair (keys).
+    _signatures : dictionary
+        Collection of the signatures (values) of each page (keys).
+
+    Methods
+    -------
+    signature
+        Returns the MinHash signature of a list of words.
+    similarity
+        Estimates the Jaccard similarity of two signatures.
+    add
+        Adds a page and returns its near-duplicates already added.
+    remove
+        Removes a page.
+    getNearDuplicates
+        Returns the near-duplicates of an added page.
+    """
+
+    __slots__ = ['_shingleSize', '_rows', '_threshold', '_coefficients', '_buckets', '_signatures']
+
+    _PRIME = (1 << 61) - 1 # Mersenne prime used as modulus of the hash functions
+
+    def __init__(self, permutations = 64, bands = 16, shingleSize = 3, threshold = 0.8, seed = 0):
+        """
+        Creates a new empty detector.
+
+        Parameters
+        ----------
+        permutations : int
+            Length of the signatures, which must be a multiple of bands.
+        bands : int
+            Number of bands in which each signature is split.
+        shingleSize : int
+            Number of consecutive words of a shingle.
+        threshold : float
+            Minimum estimated Jaccard similarity of two near-duplicate pages.
+        seed : int
+            Seed of the random coefficients of the hash functions.
+        """
+        if permutations % bands != 0: raise ValueError("permutations must be a multiple of bands")
+        generator = random.Random(seed)
+        self._shingleSize = shingleSize
+        self._rows = permutations // bands
+        self._threshold = threshold
+        self._coefficients = [(generator.randrange(1, self._PRIME), generator.randrange(self._PRIME)) for _ in range(permutations)]
+        self._buckets = {}
+        self._signatures = {}
+
+    def signature(self, words):
+        """
+        Returns the MinHash signature of the set of shingles of the given words.
+
+        Parameters
+        ----------
+        words : list
+            Words of a page, in order.
+
+        Returns
+        -------
+        tuple
+            The signature, made of the minimum of each hash function over the shingles.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n•h)
+            Where n is the number of words and h the number of hash functions.
+        """
+        size = self._shingleSize
+        hashes = {crc32(' '.join(words[i:i+size]).encode('utf-8')) for i in range(max(len(words) - size + 1, 1))}
+        prime = self._PRIME
+        return tuple(min((a * x + b) % prime for x in hashes) for a, b in self._coefficients)
+
+    @staticmethod
+    def similarity(first, second):
+        """
+        Estimates the Jaccard similarity of two sets from their signatures, as the fraction of
+        equal values.
+
+        TIME COMPLEXITY
+        ---------------
+        O(h)
+        """
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+    def _bands(self, signature):
+        """Utility generator of the (band index, band) pairs of a signature."""
+        rows = self._rows
+        for i in range(0, len(signature), rows):
+            yield i, signature[i:i+rows]
+
+    def _candidates(self, page, signature):
+        """Utility method which returns the verified near-duplicates of page among the pages sharing a band."""
+        result = []
+        seen = {page}
+        for band in self._bands(signature):
+            for other in self._buckets.get(band, ()):
+                if other not in seen:
+                    seen.add(other)
+                    if self.similarity(signature, self._signatures[other]) >= self._threshold: result.append(other)
+        return result
+
+    def add(self, page, signature):
+        """
+        Adds a page with its signature to the detector.
+
+        Parameters
+        ----------
+        page : Element
+            Page to be added.
+        signature : tuple
+            Signature of the page, as returned by the signature method.
+
+        Returns
+        -------
+        list
+            The near-duplicates of the page among the pages already added.
+
+        TIME COMPLEXITY
+        ---------------
+        O(h + c•h)
+            Where c is the number of candidates sharing at least a band with the page.
+        """
+        result = self._candidates(page, signature)
+        self._signatures[page] = signature
+        for band in self._bands(signature):
+            try:
+                self._buckets[band].append(page)
+            except KeyError:
+                self._buckets[band] = [page]
+        return result
+
+    def remove(self, page):
+        """
+        Removes a page from the detector, if it has been added.
+
+        Parameters
+        ----------
+        page : Element
+            Page to be removed.
+
+        TIME COMPLEXITY
+        ---------------
+        O(h•b)
+            Where b is the largest number of pages of the buckets of the page.
+        """
+        signature = self._signatures.pop(page, None)
+        if signature is None: return
+        for band in self._bands(signature):
+            bucket = self._buckets[band]
+            bucket.remove(page)
+            if not bucket: del self._buckets[band]
+
+    def getNearDuplicates(self, page):
+        """
+        Returns the near-duplicates of an added page.
+
+        Parameters
+        ----------
+        page : Element
+            Page of which returning the near-duplicates.
+
+        Returns
+        -------
+        list
+            The pages whose estimated similarity with page is at least the threshold.
+
+        Raises
+        ------
+        KeyError
+            If the page has not been added.
+        """
+        return self._candidates(page, self._signatures[page])
@@ -0,0 +1,88 @@
+import random
+from engine import WebSite, InvertedIndex, NOOccurrenceListException
+from segmented_index import SegmentedIndex
+
+ORIGINALS = 40
+LENGTH = 150
+VOCABULARY = 1000
+SHINGLE = 3 # shingle size of the NearDuplicateDetector
+
+# original pages, near-duplicates differing by a couple of words and exact copies on other hosts (mirrors)
+generator = random.Random(0)
+words = ["w%d" % i for i in range(VOCABULARY)]
+originals = [generator.choices(words, k=LENGTH) for _ in range(ORIGINALS)]
+texts = {}
+for i, text in enumerate(originals):
+    texts["www.origin.it/page%d.html" % i] = ' '.join(text)
+    edited = list(text)
+    for position in generator.sample(range(LENGTH), 2): edited[position] = generator.choice(words)
+    texts["www.edited.it/page%d.html" % i] = ' '.join(edited)
+    texts["www.mirror.it/page%d.html" % i] = ' '.join(text)
+    texts["www.copy.it/page%d.html" % i] = ' '.join(text)
+pages = {}
+for url, text in texts.items():
+    host = url.split('/')[0]
+    site = pages.setdefault(host, WebSite(host))
+    pages[url] = site.insertPage(url, text)
+
+def jaccard(first, second):
+    """Returns the exact Jaccard similarity of the shingle sets of two texts."""
+    first, second = first.split(), second.split()
+    first = {tuple(first[i:i+SHINGLE]) for i in range(len(first) - SHINGLE + 1)}
+    second = {tuple(second[i:i+SHINGLE]) for i in range(len(second) - SHINGLE + 1)}
+    return len(first & second) / len(first | second)
+
+class CountingIndex(InvertedIndex):
+    """InvertedIndex which counts the texts it tokenizes."""
+
+    __slots__ = []
+    tokenized = 0
+
+    def _tokenize(self, text):
+        CountingIndex.tokenized += 1
+        return super()._tokenize(text)
+
+def contents(index):
+    """Returns the occurrence lists and the position lists of all the words of a positional index."""
+    vocabulary = sorted(index.getVocabulary())
+    lists = {word: dict(index.getList(word).items()) for word in vocabulary}
+    positions = {word: {page: list(positionList) for page, positionList in index.getPositionList(word).items()} for word in vocabulary}
+    return lists, positions
+
+urls = [url for url in texts]
+pageList = [pages[url] for url in urls]
+
+# the near-duplicates are found and the unrelated pages are not, for plain and segmented indexes
+for index in (InvertedIndex(nearDuplicates = True), SegmentedIndex(segmentSize = 30, positional = True, nearDuplicates = True, background = False)):
+    for page in pageList: index.addPage(page)
+    for url in urls:
+        found = {page.getUrl() for page in index.getNearDuplicates(pages[url])}
+        assert url not in found
+        for other in urls:
+            if other == url: continue
+            similarity = jaccard(texts[url], texts[other])
+            if similarity >= 0.9: assert other in found, (url, other, similarity)
+            if similarity <= 0.5: assert other not in found, (url, other, similarity)
+    # the removed pages are not near-duplicates anymore
+    removed = pages["www.mirror.it/page0.html"]
+    index.removePage(removed)
+    assert removed not in index.getNearDuplicates(pages["www.origin.it/page0.html"])
+    try:
+        index.getNearDuplicates(removed)
+    except NOOccurrenceListException:
+        pass
+    else:
+        assert False, "a removed page has no near-duplicates"
+
+# the exact duplicates are not tokenized again, and the index is the same of the one without dedup
+plain = InvertedIndex(positional = True)
+for page in pageList: plain.addPage(page)
+dedup = CountingIndex(positional = True, dedup = True)
+for page in pageList: dedup.addPage(page)
+assert CountingIndex.tokenized == len(set(texts.values())) == 2 * ORIGINALS
+assert len(dedup._contents) == 2 * ORIGINALS
+assert contents(dedup) == contents(plain)
+segmented = SegmentedIndex(segmentSize = 30, positional = True, dedup = True, background = False)
+for page in pageList: segmented.addPage(page)
+assert contents(segmented) == contents(plain)
+print("near-duplicates and exact duplicates: ok")
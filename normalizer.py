@@ -0,0 +1,154 @@
+import re
+import string
+
+class TextNormalizer:
+    """
+    A class to model the normalization of the text of the pages and of the queries, so that
+    "Algorithm", "algorithm," and "algorithm." are the same entry of the inverted index. All the
+    steps use tables and regular expressions compiled once, when the normalizer is created:
+
+    1. case folding;
+    2. punctuation stripping, translating every punctuation character to a whitespace;
+    3. optional removal of the Italian and/or English stopwords;
+    4. optional light stemming, which removes the most common inflectional suffixes.
+
+    The same normalizer must be used at index and at query time.
+
+    Attributes
+    ----------
+    _caseFold : bool
+        If True, the text is case folded.
+    _table : dictionary | None
+        Translation table mapping the punctuation characters to whitespaces, None if the
+        punctuation is not stripped.
+    _stopwords : frozenset
+        Words removed from the text.
+    _suffixes : Pattern | None
+        Regular expression matching the suffix to be removed from a word, None if the words
+        are not stemmed.
+    _configuration : dictionary
+        Parameters with which the normalizer has been created.
+
+    Methods
+    -------
+    tokenize
+        Returns the normalized words of a text.
+    normalizeWord
+        Returns the normalized form of a single word.
+    getConfiguration
+        Returns the parameters with which the normalizer has been created.
+    """
+
+    __slots__ = ['_caseFold', '_table', '_stopwords', '_suffixes', '_configuration']
+
+    STOPWORDS = {
+        'en': frozenset("""a an and are as at be but by for from has have he her his i if in into is it its
+            of on or our she so than that the their them then there these they this to was we were what
+            when which who will with you your""".split()),
+        'it': frozenset("""a ad agli ai al alla alle allo anche che chi ci come con da dagli dai dal dalla
+            dalle dallo degli dei del dell della delle dello di e ed gli i il in la le lo ma ne negli nei
+            nel nell nella nelle nello non o per più se si sia sono su sugli sui sul sull sulla sulle sullo
+            tra un una uno""".split()),
+    }
+
+    SUFFIXES = {
+        'en': ['ingly', 'edly', 'ness', 'ing', 'ies', 'ed', 'ly', 'es', 's'],
+        'it': ['amente', 'mente', 'zione', 'zioni', 'ismo', 'ista', 'iste', 'isti', 'i', 'e', 'a', 'o'],
+    }
+
+    MIN_STEM = 3 # minimum length of a stem
+
+    def __init__(self, caseFold = True, stripPunctuation = True, stopwords = (), stem = ()):
+        """
+        Creates a new normalizer.
+
+        Parameters
+        ----------
+        caseFold : bool
+            If True, the text is case folded.
+        stripPunctuation : bool
+            If True, the punctuation characters are replaced by whitespaces.
+        stopwords : iterable
+            Languages ('it', 'en') whose stopwords are removed.
+        stem : iterable
+            Languages ('it', 'en') whose suffixes are removed by the light stemmer.
+        """
+        stopwords, stem = tuple(stopwords), tuple(stem)
+        self._configuration = {'caseFold': caseFold, 'stripPunctuation': stripPunctuation, 
+                               'stopwords': list(stopwords), 'stem': list(stem)}
+        self._caseFold = caseFold
+        punctuation = string.punctuation + '«»“”‘’–—…'
+        self._table = str.maketrans(punctuation, ' ' * len(punctuation)) if stripPunctuation else None
+        self._stopwords = frozenset().union(*(self.STOPWORDS[language] for language in stopwords))
+        suffixes = sorted({suffix for language in stem for suffix in self.SUFFIXES[language]}, key=len, reverse=True)
+        if suffixes:
+            self._suffixes = re.compile('(?<=\\w{%d})(?:%s)$' % (self.MIN_STEM, '|'.join(suffixes)))
+        else:
+            self._suffixes = None
+
+    def tokenize(self, text):
+        """
+        Returns the normalized words of the given text, in order.
+
+        Parameters
+        ----------
+        text : str
+            The text to be normalized.
+
+        Returns
+        -------
+        list
+            The normalized words, without the stopwords.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(text))
+            Case folding, translation and splitting are single passes over the text, while the
+            stopwords are removed and the suffixes are matched in constant time per word.
+        """
+        if self._caseFold: text = text.casefold()
+        if self._table is not None: text = text.translate(self._table)
+        words = text.split()
+        if self._stopwords:
+            stopwords = self._stopwords
+            words = [word for word in words if word not in stopwords]
+        if self._suffixes is not None:
+            strip = self._suffixes.sub
+            words = [strip('', word) for word in words]
+        return words
+
+    def normalizeWord(self, word):
+        """
+        Returns the normalized form of a single word, as it is stored in the inverted index.
+
+        Parameters
+        ----------
+        word : str
+            The word to be normalized.
+
+        Returns
+        -------
+        str | None
+            The normalized word, or None if nothing remains of it (e.g. a stopword or a
+            punctuation mark) or it is split in more words (e.g. 'e-mail'), whose list 
+            tokenize returns.
+        """
+        words = self.tokenize(word)
+        return words[0] if len(words) == 1 else None
+
+    def getConfiguration(self):
+        """
+        Returns the parameters with which the normalizer has been created, as plain values (booleans and 
+        lists of language codes), so that an equal normalizer is created by TextNormalizer(**configuration), 
+        e.g. in another process.
+
+        Returns
+        -------
+        dictionary
+            The keyword arguments of the constructor.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1)
+        """
+        return {key: list(value) if isinstance(value, list) else value for key, value in self._configuration.items()}
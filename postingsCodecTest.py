@@ -0,0 +1,53 @@
+import random
+from postings_codec import CompressedPostings
+
+# identifiers spread so that the gaps and the counts need 1, 2 and 4 bytes
+generator = random.Random(0)
+SPREADS = [1 << 6, 1 << 14, 1 << 22] # 1000 gaps of up to 1 << 22 fit the 4-byte identifiers
+SIZES = [0, 1, 2, CompressedPostings.BLOCK - 1, CompressedPostings.BLOCK, CompressedPostings.BLOCK + 1, 1000]
+
+def randomPostings(size, gap, count):
+    """Returns the pages, their identifiers and an occurrence list of the given size, in ascending order of identifier."""
+    ids = []
+    last = -1
+    for _ in range(size):
+        last += generator.randint(1, gap)
+        ids.append(last)
+    pages = ["page%d" % id for id in ids]
+    pageIds = dict(zip(pages, ids))
+    occurrenceList = {page: generator.randint(1, count) for page in pages}
+    return pages, pageIds, occurrenceList
+
+def check(postings, pageIds, occurrenceList):
+    """Checks the length, the items and the counts of present and absent identifiers of the postings."""
+    assert len(postings) == len(occurrenceList)
+    assert list(postings.items()) == list(occurrenceList.items())
+    for page, count in occurrenceList.items():
+        assert postings.get(pageIds[page]) == count, page
+    present = set(pageIds.values())
+    last = max(present, default = 0)
+    for id in [0, 1, last, last + 1, last + 1000] + [id + 1 for id in pageIds.values()]:
+        if id not in present: assert postings.get(id) is None, id
+
+widths = set()
+for size in SIZES:
+    for gap in SPREADS:
+        for count in SPREADS:
+            pages, pageIds, occurrenceList = randomPostings(size, gap, count)
+            table = {id: page for page, id in pageIds.items()} # the pages of the identifiers, as a sparse list
+            postings = CompressedPostings(occurrenceList, pageIds, table)
+            check(postings, pageIds, occurrenceList)
+            copy = CompressedPostings.fromBytes(postings.toBytes(), table)
+            check(copy, pageIds, occurrenceList)
+            assert copy.toBytes() == postings.toBytes()
+            for offset in postings._offsets[:-1]: widths.add(postings._data[offset]) # header of each block
+assert {header >> 4 for header in widths} == {1, 2, 4} and {header & 15 for header in widths} == {1, 2, 4}
+
+# the postings of a list which is not in order of identifier are sorted
+pages, pageIds, occurrenceList = randomPostings(300, 5, 5)
+shuffled = list(occurrenceList.items())
+generator.shuffle(shuffled)
+table = {id: page for page, id in pageIds.items()}
+postings = CompressedPostings(dict(shuffled), pageIds, table)
+check(postings, pageIds, occurrenceList)
+print("compressed postings round-trips: ok")
@@ -0,0 +1,202 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+class CompressedPostings:
+    """
+    A class to model an immutable occurrence list compressed with delta encoding and frame-of-reference
+    blocks. The pages are represented by their identifiers in ascending order, split in blocks of BLOCK
+    postings: the first identifier of each block is kept in the skip list, while the others are encoded as
+    the differences (gaps) from the previous one. The gaps and the counts of each block are packed with the
+    smallest width (1, 2 or 4 bytes) which fits their maximum, so that a block is decoded by C-level array
+    conversions instead of a Python loop. The skip list of the first identifier and of the offset of each
+    block allows to decode only the block containing a given page.
+
+    The order of the postings is the same of the occurrence list they have been built from, if its pages
+    have been inserted in ascending order of identifier, as InvertedIndex does.
+
+    Attributes
+    ----------
+    _data : bytes
+        Encoded blocks.
+    _firsts : array
+        First identifier of each block (skip pointers).
+    _offsets : array
+        Offset of each block in _data, followed by the length of _data.
+    _length : int
+        Number of postings.
+    _pages : list
+        Pages of all the identifiers, shared by all the CompressedPostings of an index.
+
+    Methods
+    -------
+    items
+        Generator of the (page, count) pairs, in ascending order of identifier.
+    get
+        Returns the count of a page identifier, decoding only its block.
+    toBytes
+        Returns the serialized postings.
+    fromBytes
+        Returns the postings serialized by toBytes.
+    """
+
+    __slots__ = ['_data', '_firsts', '_offsets', '_length', '_pages']
+
+    BLOCK = 128 # number of postings of a block
+
+    _TYPECODES = {1: 'B', 2: 'H', 4: 'I'} # array typecode of each width
+
+    def __init__(self, occurrenceList, pageIds, pages):
+        """
+        Creates the compressed postings of an occurrence list.
+
+        Parameters
+        ----------
+        occurrenceList : dictionary
+            Collection of the pages (keys) and their occurrences (values).
+        pageIds : dictionary
+            Collection of the identifiers (values) of the pages (keys).
+        pages : list
+            Pages of all the identifiers, which is kept to decode the postings.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n) if the occurrence list is in order of identifier, O(n•log(n)) otherwise
+        """
+        entries = sorted((pageIds[page], count) for page, count in occurrenceList.items())
+        self._pages = pages
+        self._length = len(entries)
+        self._firsts = array('I')
+        self._offsets = array('I')
+        data = bytearray()
+        size = self.BLOCK
+        for start in range(0, len(entries), size):
+            block = entries[start:start + size]
+            ids = [id for id, _ in block]
+            gaps = [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+            counts = [count for _, count in block]
+            self._firsts.append(ids[0])
+            self._offsets.append(len(data))
+            gapWidth = self._width(gaps)
+            countWidth = self._width(counts)
+            data.append(gapWidth << 4 | countWidth) # header of the block
+            data += array(self._TYPECODES[gapWidth], gaps).tobytes()
+            data += array(self._TYPECODES[countWidth], counts).tobytes()
+        self._offsets.append(len(data))
+        self._data = bytes(data)
+
+    @staticmethod
+    def _width(values):
+        """Utility method which returns the number of bytes needed to store the largest of the values."""
+        largest = max(values, default = 0)
+        return 1 if largest < 1 << 8 else 2 if largest < 1 << 16 else 4
+
+    def __len__(self):
+        """Returns the number of postings."""
+        return self._length
+
+    def _decode(self, block):
+        """
+        Utility method which returns the identifiers and the counts of the postings of the given block.
+
+        TIME COMPLEXITY
+        ---------------
+        O(BLOCK)
+            With C-level conversions from bytes to arrays and a cumulative sum of the gaps.
+        """
+        data = self._data
+        offset = self._offsets[block]
+        length = min(self.BLOCK, self._length - block * self.BLOCK)
+        header = data[offset]
+        gapWidth, countWidth = header >> 4, header & 15
+        offset += 1
+        gaps = array(self._TYPECODES[gapWidth], data[offset:offset + gapWidth * (length - 1)])
+        offset += gapWidth * (length - 1)
+        counts = array(self._TYPECODES[countWidth], data[offset:offset + countWidth * length])
+        ids = list(accumulate(gaps, initial = self._firsts[block]))
+        return ids, counts
+
+    def items(self):
+        """
+        Generator of the (page, count) pairs of the postings, in ascending order of identifier.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+        """
+        pages = self._pages
+        for block in range(len(self._firsts)):
+            ids, counts = self._decode(block)
+            yield from zip([pages[id] for id in ids], counts)
+
+    def get(self, id):
+        """
+        Returns the count of the page with the given identifier, decoding only the block which can contain it,
+        found with a binary search in the skip list.
+
+        Parameters
+        ----------
+        id : int
+            Identifier of the page.
+
+        Returns
+        -------
+        int | None
+            The count of the page, None if the page is not in the postings.
+
+        TIME COMPLEXITY
+        ---------------
+        O(log(n) + BLOCK)
+        """
+        block = bisect_right(self._firsts, id) - 1
+        if block < 0: return None
+        ids, counts = self._decode(block)
+        i = bisect_left(ids, id)
+        return counts[i] if i < len(ids) and ids[i] == id else None
+
+    def toBytes(self):
+        """
+        Returns the serialized postings: the number of postings and of blocks, the skip list and the
+        encoded blocks, as 4-byte integers in the byte order of the machine.
+
+        Returns
+        -------
+        bytes
+            The serialized postings.
+
+        TIME COMPLEXITY
+        ---------------
+        O(size of the encoded postings)
+        """
+        header = array('I', [self._length, len(self._firsts)])
+        return header.tobytes() + self._firsts.tobytes() + self._offsets.tobytes() + self._data
+
+    @classmethod
+    def fromBytes(cls, data, pages):
+        """
+        Returns the postings serialized by toBytes.
+
+        Parameters
+        ----------
+        data : bytes
+            The serialized postings.
+        pages : list
+            Pages of all the identifiers.
+
+        Returns
+        -------
+        CompressedPostings
+            The deserialized postings.
+
+        TIME COMPLEXITY
+        ---------------
+        O(size of the serialized postings)
+        """
+        postings = cls.__new__(cls)
+        length, blocks = array('I', data[:8])
+        postings._length = length
+        postings._firsts = array('I', data[8:8 + 4 * blocks])
+        postings._offsets = array('I', data[8 + 4 * blocks:12 + 8 * blocks])
+        postings._data = bytes(data[12 + 8 * blocks:])
+        postings._pages = pages
+        return postings
@@ -0,0 +1,178 @@
+from array import array
+import heapq
+
+class Postings:
+    """
+    A class to model the postings of a word in the form needed by the multi-term ranked retrieval: the
+    identifiers of the pages containing the word, sorted in ascending order, with the number of occurrences
+    of the word in each of them. The identifiers are grouped in blocks of WINDOW consecutive identifiers,
+    and for each block the maximum number of occurrences of the word in its pages is stored: it is the
+    upper bound of the contribution of the word to the score of any page of the block.
+
+    Attributes
+    ----------
+    _ids : array
+        Sorted identifiers of the pages.
+    _pages : list
+        Pages (Element objects) of the identifiers, in the same order.
+    _scores : array
+        Number of occurrences of the word in each page, in the same order.
+    _maxScore : int
+        Maximum number of occurrences of the word in a page.
+    _blocks : dictionary
+        Collection of the (start, end, maximum score) triples (values) of the non-empty blocks (keys), where
+        start and end delimit the postings of the block.
+
+    Methods
+    -------
+    getMaxScore
+        Returns the upper bound of the score of the word.
+    """
+
+    __slots__ = ['_ids', '_pages', '_scores', '_maxScore', '_blocks']
+
+    WINDOW = 32 # number of consecutive identifiers of a block
+
+    def __init__(self, occurrenceList, pageIds):
+        """
+        Creates the postings of an occurrence list.
+
+        Parameters
+        ----------
+        occurrenceList : dictionary
+            Collection of the pages (keys) and the occurrences of the word in them (values).
+        pageIds : dictionary
+            Collection of the identifiers (values) of the pages (keys).
+
+        TIME COMPLEXITY
+        ---------------
+        O(n) if the occurrence list is in order of identifier, O(n•log(n)) otherwise
+            The pages are appended to the occurrence lists in order of insertion, so the list is usually
+            already sorted.
+        """
+        entries = sorted((pageIds[page], count, page) for page, count in occurrenceList.items())
+        self._ids = array('I', [id for id, _, _ in entries])
+        self._scores = array('I', [count for _, count, _ in entries])
+        self._pages = [page for _, _, page in entries]
+        self._maxScore = max(self._scores) if entries else 0
+        self._blocks = {}
+        window = self.WINDOW
+        start = 0
+        for i in range(1, len(entries) + 1):
+            if i == len(entries) or self._ids[i] // window != self._ids[start] // window:
+                self._blocks[self._ids[start] // window] = (start, i, max(self._scores[start:i]))
+                start = i
+
+    def __len__(self):
+        """Returns the number of pages."""
+        return len(self._ids)
+
+    def getMaxScore(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The maximum number of occurrences of the word in a page.
+        """
+        return self._maxScore
+
+#-------------------------------------------------------------------------------
+
+def blockMaxTopK(postingsLists, k):
+    """
+    Returns the k pages with the highest score, where the score of a page is the sum of the occurrences of the
+    words of the given postings in it, with the block-max dynamic pruning. The upper bound of the score of the
+    pages of each block is the sum of the maximum scores of the words in the block; the blocks are visited in
+    descending order of upper bound and the pages of each block are scored together, until the upper bound of
+    the next block is lower than the score of the k-th page found so far: the remaining blocks are skipped,
+    since none of their pages can enter the top k.
+
+    Parameters
+    ----------
+    postingsLists : list
+        Postings of the words.
+    k : int
+        Number of pages to return.
+
+    Returns
+    -------
+    list
+        (score, page) pairs in descending order of score and, for equal scores, in ascending order of
+        identifier, which are the same returned by exhaustiveTopK.
+
+    TIME COMPLEXITY
+    ---------------
+    O(b•log(b) + e + e•log(k))
+        Where b is the total number of non-empty blocks of the postings and e the number of postings of the
+        visited blocks. In the worst case e is the total size of the postings, but the blocks of the pages
+        which can enter the top k are visited first, so that usually most of the blocks are skipped.
+    """
+    if k <= 0: return []
+    bounds = {}
+    for postings in postingsLists:
+        for block, (_, _, maxScore) in postings._blocks.items():
+            try:
+                bounds[block] += maxScore
+            except KeyError:
+                bounds[block] = maxScore
+    window = Postings.WINDOW
+    top = [] # min-heap of (score, -id, page) of the best k pages found so far
+    for block, bound in sorted(bounds.items(), key=lambda item: -item[1]):
+        if len(top) == k:
+            if bound < top[0][0]: break # no page of the remaining blocks can enter the top k
+            if bound == top[0][0] and block * window > -top[0][1]: continue # it can only tie with later pages
+        scores = {}
+        pages = {}
+        for postings in postingsLists:
+            try:
+                start, end, _ = postings._blocks[block]
+            except KeyError:
+                continue
+            for id, score, page in zip(postings._ids[start:end], postings._scores[start:end], postings._pages[start:end]):
+                try:
+                    scores[id] += score
+                except KeyError:
+                    scores[id] = score
+                    pages[id] = page
+        for id, score in scores.items():
+            if len(top) < k:
+                heapq.heappush(top, (score, -id, pages[id]))
+            elif (score, -id) > top[0][:2]:
+                heapq.heapreplace(top, (score, -id, pages[id]))
+    top.sort(key=lambda item: (-item[0], -item[1]))
+    return [(score, page) for score, _, page in top]
+
+def exhaustiveTopK(postingsLists, k):
+    """
+    Returns the same pages of blockMaxTopK, scoring every page of every postings.
+
+    Parameters
+    ----------
+    postingsLists : list
+        Postings of the words.
+    k : int
+        Number of pages to return.
+
+    Returns
+    -------
+    list
+        (score, page) pairs in descending order of score and, for equal scores, in ascending order of identifier.
+
+    TIME COMPLEXITY
+    ---------------
+    O(n•log(k))
+        Where n is the total size of the postings.
+    """
+    scores = {}
+    pages = {}
+    for postings in postingsLists:
+        for id, score, page in zip(postings._ids, postings._scores, postings._pages):
+            try:
+                scores[id] += score
+            except KeyError:
+                scores[id] = score
+                pages[id] = page
+    best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, pages[id]) for id, score in best]
@@ -0,0 +1,176 @@
+import os
+import json
+import tempfile
+from engine import SearchEngine, NOOccurrenceListException
+
+DIR = "dataset"
+
+def ingestRecords(engine, records):
+    """Ingests the given (url, content) records from a temporary JSONL file."""
+    descriptor, path = tempfile.mkstemp(suffix = ".jsonl")
+    with os.fdopen(descriptor, "w") as out:
+        for url, content in records:
+            out.write(json.dumps({"url": url, "content": content}) + "\n")
+    try:
+        engine.ingest(path)
+    finally:
+        os.remove(path)
+
+# re-ingesting a page already in the occurrence list of a word must update its champion list
+REINGEST = [("www.unito.it/diem/profs/ferraioli.html", "w1 " * 50)]
+plain = SearchEngine(DIR)
+champions = SearchEngine(DIR, champions=3)
+for engine in (plain, champions):
+    # more pages than the champion list, so that the word gets one
+    ingestRecords(engine, [("www.unina.it/diem/profs/ferraioli.html", "w1 w1")] +
+                          [("www.%s.it/diem/profs/ferraioli.html" % host, "w1") for host in ("unito", "unisa", "unipa", "unimi")])
+    engine.search("w1", 2) # the champion list is computed and cached
+    ingestRecords(engine, REINGEST)
+assert champions.search("w1", 2) == plain.search("w1", 2)
+assert champions.search("w1", 2).startswith("www.unito.it")
+print("re-ingested page: ok")
+
+# a search of 0 pages returns the empty string, with or without segments
+for engine in (SearchEngine(DIR), SearchEngine(DIR, segmentSize=10)):
+    assert engine.search("algorithm", 0) == ""
+print("search of 0 pages: ok")
+
+# without champion lists (as in a SegmentedIndex), getChampions answers None before looking the keyword up
+index = SearchEngine(DIR, segmentSize=10)._generation._invertedIndex
+assert index.getSegmentSizes()[0] > 0 # the keyword is in the frozen segments
+assert index.getChampions("algorithm", 3) is None and index.getChampions("absentword", 3) is None
+print("champions without champion lists: ok")
+
+# the pruned and the exhaustive rankings read the counts of a page ingested again
+engine = SearchEngine(DIR)
+ingestRecords(engine, [("www.unina.it/diem/profs/ferraioli.html", "w1 w1"), ("www.unito.it/diem/profs/ferraioli.html", "w1")])
+index = engine._generation._invertedIndex
+index.getTopPages("w1", 2) # the postings are computed and cached
+ingestRecords(engine, REINGEST)
+expected = sorted(((count, page.getUrl()) for page, count in index.getList("w1").items()), reverse=True)
+for exhaustive in (False, True):
+    assert [(score, page.getUrl()) for score, page in index.getTopPages("w1", 2, exhaustive)] == expected
+print("ranking of a re-ingested page: ok")
+
+# the scoped searches read the counts of a page ingested again
+engine = SearchEngine(DIR)
+ingestRecords(engine, [("www.unito.it/diem/profs/ferraioli.html", "w1")])
+index = engine._generation._invertedIndex
+index.getScopedList("w1", "www.unito.it") # the postings sorted by URL are computed and cached
+ingestRecords(engine, REINGEST)
+assert list(index.getScopedList("w1", "www.unito.it").values()) == [51]
+print("scope of a re-ingested page: ok")
+
+# the words of a SegmentedIndex are found in its segments, not in its own (empty) Bloom filter and trie
+engine = SearchEngine(DIR, segmentSize=10)
+index = engine._generation._invertedIndex
+assert index.findList("algorithm") is not None and index.findList("absentword") is None
+assert engine.hasKeyword("algorithm") and not engine.hasKeyword("absentword")
+assert engine.search("algorithm", 3) == SearchEngine(DIR).search("algorithm", 3)
+print("words of the segments: ok")
+
+# the rebuilt URLs are cached by the WebSite of the pages, and a new URL replaces the cached one
+from engine import WebSite
+site = WebSite("www.cache.it")
+page = site.insertPage("www.cache.it/dir/page.html", "text")
+assert page.getUrl() == "www.cache.it/dir/page.html" and site._urls[page] == page.getUrl()
+cached = len(site._urls)
+page.setUrl("www.other.it/page.html")
+assert len(site._urls) == cached - 1 and all(key is not page for key in site._urls) # evicted, not left under its old hash
+assert page.getUrl() == "www.other.it/page.html"
+print("cache of the URLs: ok")
+
+# NEAR with the same keyword twice: an occurrence is not near to itself
+for engine in (SearchEngine(DIR, positional=True), SearchEngine(DIR, positional=True, segmentSize=10)):
+    ingestRecords(engine, [("www.unina.it/near/once.html", "w2 a b c d w3"), ("www.unina.it/near/twice.html", "w2 a w2 b c d e f w2")])
+    index = engine._generation._invertedIndex
+    near = index.getNearList("w2", "w2", 3)
+    assert near == {page: 2 for page in near} and [page.getUrl() for page in near] == ["www.unina.it/near/twice.html"]
+    assert index.getNearList("w3", "w3", 10) == {}
+    assert index.getNearList("w2", "w3", 5) == {next(iter(index.getList("w3"))): 1}
+print("NEAR of a keyword with itself: ok")
+
+# the positions of a page ingested again (into a later segment, if any) are merged sorted
+for engine in (SearchEngine(DIR, positional=True), SearchEngine(DIR, positional=True, dedup=True), 
+               SearchEngine(DIR, positional=True, memoryBudget=1 << 20), SearchEngine(DIR, positional=True, segmentSize=2)):
+    ingestRecords(engine, [("www.unina.it/order/page.html", "w4 a b w5 c d e")])
+    ingestRecords(engine, [("www.unina.it/order/other%d.html" % i, "w4") for i in range(4)]) # the page is frozen
+    ingestRecords(engine, [("www.unina.it/order/page.html", "w5 w4 w5")])
+    index = engine._generation._invertedIndex
+    if hasattr(index, "waitForMerges"): index.waitForMerges()
+    page = next(page for page in index.getList("w4") if page.getUrl() == "www.unina.it/order/page.html")
+    for word in ("w4", "w5"):
+        positions = list(index.getPositionList(word)[page])
+        assert positions == sorted(positions), (word, positions)
+    assert index.getPhraseList("w5 w4")[page] == 1 and index.getNearList("w4", "w5", 1)[page] == 2
+print("positions of a re-ingested page: ok")
+
+# the memory mappings of the contents are bounded, and they can be closed
+from ingestion import ContentReference
+directory = tempfile.mkdtemp()
+references = []
+for i in range(ContentReference._MAPPINGS_SIZE + 8):
+    path = os.path.join(directory, "content%d.txt" % i)
+    with open(path, "w") as out: out.write("text %d" % i)
+    references.append(ContentReference(path, 0, os.path.getsize(path), mapped = True))
+for i, reference in enumerate(references): assert reference.load() == "text %d" % i
+assert len(ContentReference._mappings) == ContentReference._MAPPINGS_SIZE
+assert references[0].load() == "text 0" # mapped again
+ContentReference.closeMappings()
+assert not ContentReference._mappings and references[-1].load() == "text %d" % (len(references) - 1)
+ContentReference.closeMappings()
+for name in os.listdir(directory): os.remove(os.path.join(directory, name))
+os.rmdir(directory)
+print("memory mappings of the contents: ok")
+
+# the compression of a frozen segment does not modify the nodes shared with the previous generations
+engine = SearchEngine(DIR, snapshots=True, segmentSize=4, compressPostings=True)
+ingestRecords(engine, [("www.unina.it/shared/page0.html", "w6 w7")]) # the active segment is not full
+old = engine._generation._invertedIndex._active
+ingestRecords(engine, [("www.unina.it/shared/page%d.html" % i, "w6") for i in range(1, 8)]) # a fork of it is frozen
+assert all(isinstance(node._occurrenceList, dict) for _, node in old._trie.items())
+assert sorted(page.getUrl() for page in engine._generation._invertedIndex.getList("w7")) == ["www.unina.it/shared/page0.html"]
+print("compression of a shared segment: ok")
+
+# a keyword which the normalizer splits in more words is searched as their phrase (or their conjunction)
+from normalizer import TextNormalizer
+PAGES = [("www.unina.it/mail/page.html", "Send an E-mail about the algorithm's cost"), 
+         ("www.unina.it/mail/other.html", "mail s the algorithm e")]
+for positional in (False, True):
+    for segmentSize in (None, 1):
+        engine = SearchEngine(DIR, positional=positional, segmentSize=segmentSize, normalizer=TextNormalizer(stopwords=("en",)))
+        ingestRecords(engine, PAGES)
+        index = engine._generation._invertedIndex
+        for keyword in ("e-mail", "algorithm's", "E-Mail."):
+            assert engine.hasKeyword(keyword), keyword
+            urls = sorted(page.getUrl() for page in index.getList(keyword))
+            expected = ["www.unina.it/mail/page.html"] if positional else ["www.unina.it/mail/other.html", "www.unina.it/mail/page.html"]
+            assert urls == expected, (keyword, urls)
+            assert engine.search(keyword, 1).startswith("www.unina.it")
+        assert not engine.hasKeyword("the") and index.findList("e-absentword") is None
+print("keywords of more words: ok")
+
+# the map type of the SearchEngine reaches the tries of its index and of its segments
+from map_factory import mapFactory
+KEYWORDS = ["algorithm", "design", "data", "structure"]
+for segmentSize in (None, 10):
+    default = SearchEngine(DIR, segmentSize=segmentSize)
+    for mapType in ("probe", "presized", "dict"):
+        engine = SearchEngine(DIR, segmentSize=segmentSize, mapType=mapType)
+        index = engine._generation._invertedIndex
+        tries = [index._trie] if segmentSize is None else [segment._trie for segment, _ in index._lives()]
+        expected = type(mapFactory(mapType)())
+        assert all(type(node._children) is expected for trie in tries for _, node in trie.items()), mapType
+        assert all(engine.search(keyword, 5) == default.search(keyword, 5) for keyword in KEYWORDS), mapType
+    assert type(default._generation._invertedIndex._trie._root._children) is dict # None keeps the dictionaries
+print("map type of the tries: ok")
+
+# IngestionSource is abstract: only the sources implementing _records can be created
+from ingestion import IngestionSource, DirectorySource
+try:
+    IngestionSource(DIR)
+    assert False, "IngestionSource created"
+except TypeError:
+    pass
+assert len(list(DirectorySource(DIR).records())) > 0
+print("abstract ingestion source: ok")
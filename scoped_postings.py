@@ -0,0 +1,76 @@
+from bisect import bisect_left
+
+class ScopedPostings:
+    """
+    A class to model an occurrence list sorted by the URL of its pages, so that the pages of a host or of
+    a directory, whose URLs share the same prefix, are contiguous and can be found with a binary search.
+
+    Attributes
+    ----------
+    _urls : list
+        Sorted URLs of the pages.
+    _pages : list
+        Pages of the URLs, in the same order.
+    _counts : list
+        Number of occurrences of the word in each page, in the same order.
+
+    Methods
+    -------
+    getScope
+        Returns the occurrence list restricted to the pages of a host or of a directory.
+    """
+
+    __slots__ = ['_urls', '_pages', '_counts']
+
+    def __init__(self, occurrenceList):
+        """
+        Creates the postings of an occurrence list, sorted by URL.
+
+        Parameters
+        ----------
+        occurrenceList : dictionary
+            Collection of the pages (keys) and the occurrences of the word in them (values).
+
+        TIME COMPLEXITY
+        ---------------
+        O(n•log(n))
+            Where n is the number of pages of the occurrence list.
+        """
+        entries = sorted((page.getUrl(), i, page, count) for i, (page, count) in enumerate(occurrenceList.items()))
+        self._urls = [url for url, _, _, _ in entries]
+        self._pages = [page for _, _, page, _ in entries]
+        self._counts = [count for _, _, _, count in entries]
+
+    def __range(self, low, high):
+        """Utility method which returns the (start, end) indices of the URLs u such that low <= u < high."""
+        start = bisect_left(self._urls, low)
+        return start, bisect_left(self._urls, high, start)
+
+    def getScope(self, scope):
+        """
+        Returns the occurrence list restricted to the pages in the given scope: a hostname (e.g. www.unisa.it),
+        a directory (e.g. www.unisa.it/diem/, with or without the final slash) or the URL of a single page.
+
+        Parameters
+        ----------
+        scope : str
+            Hostname or URL prefix.
+
+        Returns
+        -------
+        dictionary
+            Collection of the pages in the scope (keys) and their occurrences (values), in order of URL.
+
+        TIME COMPLEXITY
+        ---------------
+        O(log(n) + m)
+            Where m is the number of pages in the scope.
+        """
+        scope = scope.rstrip('/')
+        result = {}
+        # the page whose URL is the scope itself, then the pages below it ('0' follows '/')
+        for low, high in ((scope, scope + '\0'), (scope + '/', scope + '0')):
+            start, end = self.__range(low, high)
+            for i in range(start, end):
+                result[self._pages[i]] = self._counts[i]
+        return result
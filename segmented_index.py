@@ -0,0 +1,566 @@
+import heapq
+from array import array
+from threading import Condition, Thread
+from engine import InvertedIndex, NOOccurrenceListException
+from pruning import Postings
+from scoped_postings import ScopedPostings
+from postings_codec import CompressedPostings
+
+class SegmentedIndex(InvertedIndex):
+    """
+    A class to model an inverted index split in segments, like a Log-Structured Merge tree. The new pages
+    are added to a small active segment; when it contains segmentSize pages it is frozen and never modified
+    again, and a new active segment is created. The frozen segments are merged by size tier in a background
+    thread: as soon as tierFactor adjacent segments belong to the same tier, they are replaced by a single
+    segment, so that the number of segments stays logarithmic in the number of pages while the cost of each
+    insertion does not depend on the size of the whole index. The queries merge the postings of all the
+    live segments. The pages removed from the frozen segments are tombstones: they are skipped by the queries
+    and dropped by the merges.
+
+    Attributes
+    ----------
+    _segmentSize : int
+        Number of pages of the active segment after which it is frozen.
+    _tierFactor : int
+        Number of adjacent segments of the same tier which are merged together.
+    _active : InvertedIndex
+        Segment to which the new pages are added.
+    _activePages : int
+        Number of pages added to the active segment.
+    _segments : tuple
+        Frozen segments, as (InvertedIndex, number of pages, removed pages) triples from the oldest to the newest,
+        where the removed pages are the frozenset of the tombstones of the segment. The tuple is never modified,
+        but replaced, so that it can be read without locks.
+    _options : tuple
+        (positional, dedup, nearDuplicates, normalizer, champions, mapType) options of the segments; the 
+        near-duplicates detector is never created by the segments, since they share the one of the 
+        SegmentedIndex, and neither the champion lists.
+    _condition : Condition
+        Condition on which the merger waits for new segments, and the other threads for the merges.
+    _merging : bool
+        True while a merge is in progress.
+    _background : bool
+        If True, the merges are executed by a background thread, otherwise by the thread freezing a segment.
+    _merger : Thread | None
+        Background merger thread, started by the first freeze.
+    _retired : bool
+        True if the SegmentedIndex has been forked, so that its merger thread has to stop.
+    _compress : bool
+        If True, the occurrence lists of the frozen segments, which are never modified, are replaced by
+        CompressedPostings.
+
+    Methods
+    -------
+    addPage
+        Adds a page to the active segment, freezing it if it is full.
+    removePage
+        Removes a page from the active segment, and adds its tombstones to the frozen ones.
+    getList
+        Returns the occurrence list of a word, merging the ones of all the segments.
+    findList
+        Returns the occurrence list of a word, merging the ones of all the segments, or None.
+    getPositionList
+        Returns the position list of a word, merging the ones of all the segments.
+    getVocabularySize
+        Returns the number of distinct words of all the segments.
+    getSegmentSizes
+        Returns the number of pages of each segment.
+    waitForMerges
+        Waits until no merge is pending.
+    fork
+        Returns a copy-on-write copy of the SegmentedIndex.
+    """
+
+    __slots__ = ['_segmentSize', '_tierFactor', '_active', '_activePages', '_segments', '_options',
+                 '_condition', '_merging', '_background', '_merger', '_retired', '_compress']
+
+    def __init__(self, segmentSize = 1000, tierFactor = 4, positional = False, dedup = False, nearDuplicates = False, background = True, normalizer = None, compress = False, mapType = None):
+        """
+        Creates a new empty SegmentedIndex.
+
+        Parameters
+        ----------
+        segmentSize : int
+            Number of pages of the active segment after which it is frozen.
+        tierFactor : int
+            Number of adjacent segments of the same tier which are merged together.
+        positional : bool
+            If True, the segments are positional.
+        dedup : bool
+            If True, each segment reuses the postings of the pages with the same content.
+        nearDuplicates : bool
+            If True, the near-duplicate pages of all the segments are detected.
+        background : bool
+            If True, the merges are executed by a background thread.
+        normalizer : TextNormalizer | None
+            Normalizer of the words of the pages and of the queries.
+        compress : bool
+            If True, the occurrence lists of the frozen segments are compressed.
+        mapType : str | None
+            Implementation of the maps of the children of the nodes of the tries of the segments (see 
+            map_factory.py), None for built-in dictionaries.
+        """
+        super().__init__(positional, False, nearDuplicates, normalizer, 0, mapType)
+        self._segmentSize = segmentSize
+        self._tierFactor = tierFactor
+        self._options = (positional, dedup, False, normalizer, 0, mapType)
+        self._segments = ()
+        self._condition = Condition()
+        self._merging = False
+        self._background = background
+        self._merger = None
+        self._retired = False
+        self._compress = compress
+        self.__newActive()
+
+    def __newActive(self):
+        """Utility method which creates a new empty active segment."""
+        self._active = InvertedIndex(*self._options)
+        self._active._nearDuplicates = self._nearDuplicates # shared by all the segments
+        self._active._pageIds = self._pageIds
+        self._active._pageList = self._pageList
+        self._trie = self._active._trie
+        self._activePages = 0
+
+    def addPage(self, page, text = None):
+        """
+        Adds the page to the active segment and, if it becomes full, freezes it.
+
+        Parameters
+        ----------
+        page : Element
+            Page of which processing the words.
+        text : str | None
+            Content of the page, if it has already been loaded.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(content))
+            The same of InvertedIndex.addPage on the small active segment: the merges are not executed
+            by this method if they are in background.
+        """
+        self._active.addPage(page, text)
+        self._activePages += 1
+        if self._activePages >= self._segmentSize: self.__freeze()
+
+    def __freeze(self):
+        """Utility method which appends the active segment to the frozen ones and triggers the merges."""
+        if self._compress: self.__compressSegment(self._active)
+        with self._condition:
+            self._segments = self._segments + ((self._active, self._activePages, frozenset()),)
+            self.__newActive()
+            self._condition.notify_all()
+        if not self._background:
+            while self.__mergeOnce(): pass
+        elif self._merger is None:
+            self._merger = Thread(target=self.__mergeLoop, daemon=True)
+            self._merger.start()
+
+    def __compressSegment(self, segment):
+        """
+        Utility method which replaces each occurrence list of a segment, which will not be modified anymore,
+        with its CompressedPostings. Each occurrence list is replaced atomically, so that the segment can be
+        read in the meanwhile. The active segment is a fork, whose nodes can still be shared with the ones of
+        the previous generations: each end node is made owned by the trie of the segment before being modified.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            Where n is the total size of the trie and of the occurrence lists of the segment.
+        """
+        trie = segment._trie
+        words = [word for word, node in trie.items() if isinstance(node._occurrenceList, dict)]
+        for word in words:
+            node, _ = trie._searchNode(word + '$', True) # the end node, owned by the trie
+            node._occurrenceList = CompressedPostings(node._occurrenceList, self._pageIds, self._pageList)
+
+    def __tier(self, pages):
+        """Utility method which returns the size tier of a segment with the given number of pages."""
+        tier = 0
+        limit = self._segmentSize * self._tierFactor
+        while pages >= limit:
+            tier += 1
+            limit *= self._tierFactor
+        return tier
+
+    def __findRun(self, segments):
+        """
+        Utility method which returns the (start, end) indices of the oldest run of tierFactor adjacent
+        segments of the same tier, or None if there is no such run.
+
+        TIME COMPLEXITY
+        ---------------
+        O(s)
+            Where s is the number of segments.
+        """
+        start = 0
+        for i in range(1, len(segments) + 1):
+            if i == len(segments) or self.__tier(segments[i][1]) != self.__tier(segments[start][1]):
+                if i - start >= self._tierFactor: return start, start + self._tierFactor
+                start = i
+        return None
+
+    @staticmethod
+    def _merge(segments, positional, mapType = None):
+        """
+        Merges the given segments, from the oldest to the newest, into a new InvertedIndex. The pages of the
+        older segments come first in each occurrence list, as if they had been added to a single index. The
+        removed pages of each segment are dropped, together with the words left without pages.
+
+        Parameters
+        ----------
+        segments : list
+            (InvertedIndex, number of pages, removed pages) triples to be merged.
+        positional : bool
+            If True, the position lists are merged too.
+        mapType : str | None
+            Implementation of the maps of the children of the nodes of the trie of the merged segment.
+
+        Returns
+        -------
+        InvertedIndex
+            The merged segment.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            Where n is the total size of the tries and of the occurrence lists of the segments.
+        """
+        merged = InvertedIndex(positional, mapType = mapType)
+        for segment, _, removed in segments:
+            for word, node in segment._trie.items():
+                items = node._occurrenceList.items()
+                if removed:
+                    items = [(page, count) for page, count in items if page not in removed]
+                    if not items: continue
+                target = merged.addWord(word)
+                list = target._occurrenceList
+                for page, count in items:
+                    try:
+                        list[page] += count
+                    except KeyError:
+                        list[page] = count
+                if positional and node._positionList is not None:
+                    if target._positionList is None: target._positionList = {}
+                    for page, positions in node._positionList.items():
+                        if page in removed: continue
+                        try:
+                            # the page has been added to more than one segment: the positions are merged sorted
+                            target._positionList[page] = array('I', heapq.merge(target._positionList[page], positions))
+                        except KeyError:
+                            target._positionList[page] = array('I', positions)
+        return merged
+
+    def __mergeOnce(self):
+        """
+        Utility method which executes the merge of the oldest run of segments of the same tier, if any,
+        and returns True if a merge has been executed.
+        """
+        with self._condition:
+            segments = self._segments
+            run = self.__findRun(segments)
+            if run is None: return False
+            self._merging = True
+        start, end = run
+        merged = self._merge(segments[start:end], self._options[0], self._options[5])
+        if self._compress: self.__compressSegment(merged)
+        pages = sum(size - len(removed) for _, size, removed in segments[start:end])
+        with self._condition:
+            # only new segments can have been appended, and pages removed, in the meanwhile
+            current = self._segments
+            removed = frozenset().union(*(now[2] - then[2] for now, then in zip(current[start:end], segments[start:end])))
+            self._segments = current[:start] + ((merged, pages, removed),) + current[end:]
+            self._merging = False
+            self._condition.notify_all()
+        return True
+
+    def __mergeLoop(self):
+        """Utility method executed by the background merger thread."""
+        while True:
+            with self._condition:
+                while not self._retired and self.__findRun(self._segments) is None:
+                    self._condition.wait()
+                if self._retired: return
+            self.__mergeOnce()
+
+    def waitForMerges(self):
+        """
+        Waits until there is no merge in progress or pending.
+        """
+        with self._condition:
+            while self._merging or (self._background and self.__findRun(self._segments) is not None):
+                self._condition.wait()
+
+    def getSegmentSizes(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        list
+            The number of pages of each frozen segment, from the oldest to the newest, followed by the
+            number of pages of the active segment.
+        """
+        return [size for _, size, _ in self._segments] + [self._activePages]
+
+    def _lives(self):
+        """Utility generator of the (segment, removed pages) pairs of all the live segments, from the oldest to the newest."""
+        for segment, _, removed in self._segments:
+            yield segment, removed
+        yield self._active, frozenset()
+
+    @staticmethod
+    def _hasLivePages(list, removed):
+        """Utility method which returns True if an occurrence list has a page which has not been removed."""
+        return not removed or any(page not in removed for page, _ in list.items())
+
+    def _findList(self, word):
+        """
+        It takes in input an already normalized word, and it returns the corresponding occurrence list,
+        obtained by merging the ones of all the segments. It is used by the getList and findList methods.
+        The segments whose Bloom filter rejects the word are skipped without visiting their trie, and the
+        removed pages of each segment are skipped.
+
+        Parameters
+        ----------
+        word : str
+            The word of which return the occurrence list.
+
+        Returns
+        -------
+        dictionary | None
+            The merged occurrence list, None if no segment has a page which has not been removed in the 
+            occurrence list associated to the given word.
+
+        TIME COMPLEXITY
+        ---------------
+        O(s•len(word) + p)
+            Where s is the number of segments and p the total number of postings of the word.
+        """
+        result = None
+        for segment, removed in self._lives():
+            list = segment._findList(word)
+            if list is None: continue
+            if result is None: result = {}
+            for page, count in list.items(): # the list can be a CompressedPostings
+                if page in removed: continue
+                try:
+                    result[page] += count
+                except KeyError:
+                    result[page] = count
+        return result or None
+
+    def _getPostings(self, word):
+        """
+        Utility method which returns the postings of an already normalized word, computed from the occurrence
+        list merged from all the segments.
+
+        TIME COMPLEXITY
+        ---------------
+        O(s•len(word) + p)
+            Where s is the number of segments and p the total number of postings of the word.
+        """
+        return Postings(self._getList(word), self._pageIds)
+
+    def _getScopedList(self, word, scope):
+        """
+        Utility method which returns the occurrence list of an already normalized word in the given scope,
+        merging the ones of the segments in it.
+
+        TIME COMPLEXITY
+        ---------------
+        O(s•(len(word) + log(n)) + m•log(m))
+            Where s is the number of segments, n the number of postings of the word in the largest one and m
+            the number of pages in the scope.
+        """
+        result = None
+        for segment, removed in self._lives():
+            try:
+                list = segment._getScopedList(word, scope)
+            except NOOccurrenceListException:
+                continue
+            if result is None: result = {}
+            for page, count in list.items():
+                if page in removed: continue
+                try:
+                    result[page] += count
+                except KeyError:
+                    result[page] = count
+        if not result: raise NOOccurrenceListException("Occurrence list not found!")
+        return dict(sorted(result.items(), key=lambda item: item[0].getUrl()))
+
+    def _fuzzyWords(self, word, maxEdits):
+        """
+        Utility method which returns the words of all the segments within maxEdits from an already normalized
+        word, without duplicates and without the words having only removed pages.
+        """
+        words = {}
+        for segment, removed in self._lives():
+            for match, node, _ in segment._trie.fuzzyItems(word, maxEdits):
+                if self._hasLivePages(node._occurrenceList, removed): words[match] = None
+        return list(words)
+
+    def removePage(self, page, text = None):
+        """
+        Removes the page from the SegmentedIndex. It is removed from the active segment as from an InvertedIndex, 
+        while the frozen segments, which are never modified, get a tombstone: the page is added to the removed 
+        pages of each frozen segment containing it, whose postings of the page are skipped by the queries and 
+        dropped when the segment is merged. A page added again goes to the active segment, so that it is not 
+        hidden by its tombstones.
+
+        Parameters
+        ----------
+        page : Element
+            Page to be removed.
+        text : str | None
+            Content of the page as it has been added. If None, the content of the page is used.
+
+        Returns
+        -------
+        int
+            The number of words left without pages.
+
+        TIME COMPLEXITY
+        ---------------
+        O(s•len(content))
+            Where s is the number of segments, in which each distinct word of the content is looked up (the 
+            occurrence lists of the words are scanned until a page which has not been removed is found).
+        """
+        if text is None: text = page.getContent()
+        words = {word for word in self._tokenize(text) if self.__isLive(word)}
+        with self._condition:
+            segments = list(self._segments)
+            for i, (segment, size, removed) in enumerate(segments):
+                if page in removed: continue
+                if any(self.__hasPage(segment._findList(word), page) for word in words):
+                    segments[i] = (segment, size, removed | {page})
+            self._segments = tuple(segments)
+        self._active.removePage(page, text) # it removes the page from the near-duplicates too
+        return sum(1 for word in words if not self.__isLive(word))
+
+    def __hasPage(self, list, page):
+        """Utility method which returns True if an occurrence list, possibly compressed and possibly None, contains a page."""
+        if list is None: return False
+        if isinstance(list, CompressedPostings):
+            return page in self._pageIds and list.get(self._pageIds[page]) is not None
+        return page in list
+
+    def __isLive(self, word):
+        """Utility method which returns True if an already normalized word has a page which has not been removed."""
+        for segment, removed in self._lives():
+            list = segment._findList(word)
+            if list is not None and self._hasLivePages(list, removed): return True
+        return False
+
+    def _rangeWords(self, low, high):
+        """
+        Utility generator of the words w of all the segments such that low <= w < high, in lexicographic order 
+        and without duplicates, merging the sorted words of each segment. The words having only removed pages 
+        are skipped.
+        """
+        last = None
+        for word in heapq.merge(*(self.__liveRange(segment, removed, low, high) for segment, removed in self._lives())):
+            if word != last: yield word
+            last = word
+
+    def __liveRange(self, segment, removed, low, high):
+        """Utility generator of the words w of a segment such that low <= w < high, except the ones having only removed pages."""
+        for word, node in segment._trie.sortedItems(low, high):
+            if self._hasLivePages(node._occurrenceList, removed): yield word
+
+    def _getPositionList(self, word):
+        """
+        It takes in input an already normalized word, and it returns the corresponding position list,
+        obtained by merging the ones of all the segments. The positions of a page added to more than one 
+        segment are merged, so that they are sorted. It is used by the getPositionList method.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if no segment has an occurrence list associated to the given keyword.
+        NOPositionListException
+            if the segments are not positional.
+
+        TIME COMPLEXITY
+        ---------------
+        O(s•len(word) + p)
+            Where s is the number of segments and p the total number of positions of the word. The positions 
+            of a page added to k segments are merged k-1 times.
+        """
+        result = None
+        for segment, removed in self._lives():
+            try:
+                positions = segment._getPositionList(word)
+            except NOOccurrenceListException:
+                continue
+            if result is None: result = {}
+            for page, more in positions.items():
+                if page in removed: continue
+                try:
+                    result[page] = array('I', heapq.merge(result[page], more))
+                except KeyError:
+                    result[page] = more
+        if not result: raise NOOccurrenceListException("Occurrence list not found!")
+        return result
+
+    def getVocabularySize(self):
+        """
+        Returns the number of distinct words of all the live segments.
+
+        TIME COMPLEXITY
+        ---------------
+        O(n)
+            Where n is the total size of the tries of the segments.
+        """
+        return len(self._words())
+
+    def _words(self):
+        """Utility method which returns the set of the words of all the live segments, except the ones having only removed pages."""
+        return {word for segment, removed in self._lives() for word, node in segment._trie.items()
+                if self._hasLivePages(node._occurrenceList, removed)}
+
+    def fork(self):
+        """
+        Returns a copy-on-write copy of the SegmentedIndex, which shares the frozen segments and forks the
+        active one. The merger thread of the current SegmentedIndex is stopped, and the pending merges
+        continue on the new one.
+
+        Returns
+        -------
+        SegmentedIndex
+            The new SegmentedIndex.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1)
+        """
+        other = SegmentedIndex.__new__(SegmentedIndex)
+        other._positional = self._positional
+        other._contents = None
+        other._nearDuplicates = self._nearDuplicates
+        other._normalizer = self._normalizer
+        other._championSize = 0
+        other._stale = set()
+        other._pageIds = self._pageIds
+        other._pageList = self._pageList
+        other._compress = self._compress
+        other._vocabulary = self._vocabulary
+        other._segmentSize = self._segmentSize
+        other._tierFactor = self._tierFactor
+        other._options = self._options
+        other._condition = Condition()
+        other._merging = False
+        other._background = self._background
+        other._merger = None
+        other._retired = False
+        with self._condition:
+            self._retired = True
+            self._condition.notify_all()
+            other._segments = self._segments
+        other._active = self._active.fork()
+        other._trie = other._active._trie
+        other._activePages = self._activePages
+        if self._background and other.__findRun(other._segments) is not None:
+            other._merger = Thread(target=other.__mergeLoop, daemon=True)
+            other._merger.start()
+        return other
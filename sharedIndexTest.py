@@ -0,0 +1,49 @@
+import json
+import multiprocessing
+from engine import SearchEngine, NOOccurrenceListException
+from normalizer import TextNormalizer
+from shared_index import SharedIndex
+
+DIR = "dataset"
+KEYWORDS = ["algorithm", "design", "data", "structure", "Algorithm", "the", "absentword"]
+K = [1, 3, 10]
+
+def searchAll(searcher):
+    """Returns the results of all the searches of KEYWORDS and K, None for the absent keywords."""
+    results = []
+    for keyword in KEYWORDS:
+        for k in K:
+            try:
+                results.append(searcher.search(keyword, k))
+            except NOOccurrenceListException:
+                results.append(None)
+    return results
+
+def attachAndSearch(name):
+    """Searches in the shared index with the given name, attached by a worker process."""
+    shared = SharedIndex.attach(name)
+    try:
+        return searchAll(shared)
+    finally:
+        shared.close()
+
+if __name__ == "__main__":
+    context = multiprocessing.get_context("spawn") # the workers do not inherit the memory of the engine
+    engines = [("plain", SearchEngine(DIR)), 
+               ("segmented", SearchEngine(DIR, segmentSize=10, snapshots=True)),
+               ("normalized", SearchEngine(DIR, normalizer=TextNormalizer(stopwords=("en",), stem=("en",))))]
+    with context.Pool(2) as pool:
+        for label, engine in engines:
+            shared = engine.share()
+            try:
+                # the normalizer is stored as its configuration, in JSON, and not pickled
+                configuration = json.loads(bytes(shared._views[1]).decode('utf-8'))
+                normalizer = engine._generation._invertedIndex._normalizer
+                assert configuration == (None if normalizer is None else normalizer.getConfiguration()), label
+                expected = searchAll(engine)
+                assert searchAll(shared) == expected, label
+                assert pool.map(attachAndSearch, [shared.getName()] * 2) == [expected] * 2, label
+            finally:
+                shared.close()
+                shared.unlink()
+            print("searches of the workers attached to the", label, "index: ok")
@@ -0,0 +1,400 @@
+import json
+import mmap
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from engine import NOOccurrenceListException
+from normalizer import TextNormalizer
+
+class SharedIndex:
+    """
+    A class to model a read-only copy of the index of a SearchEngine, laid out in a single flat buffer
+    without pointers, so that it can be placed in a shared memory segment or in a file and mapped by many
+    worker processes, which serve the searches from the same physical memory without copying it.
+
+    The buffer contains, after a header of the offsets of its sections:
+    - the vocabulary, as the UTF-8 words in sorted order (a frozen, flat replacement of the trie, searched
+      with a binary search);
+    - the postings of each word, pre-ranked in the order in which SearchEngine.search extracts them from
+      the heap, so that the first k pages of a query are the first k postings of its word;
+    - the URL and the site of each page;
+    - the rendered site string of each site;
+    - the configuration of the normalizer of the keywords, as JSON (no object is unpickled from the buffer,
+      which can be written by any process that can open the segment).
+
+    Attributes
+    ----------
+    _handle : SharedMemory | mmap
+        Memory holding the buffer.
+    _owner : bool
+        True if the index has been created by this process, which has to unlink the shared memory.
+    _name : str
+        Name of the shared memory segment, or path of the file.
+    _normalizer : TextNormalizer | None
+        Normalizer of the keywords, the same of the SearchEngine.
+    _views : list
+        All the memoryviews of the buffer, released by close.
+    _wordOffsets, _listStarts, _postPages, _postCounts, _pageSites, _urlOffsets, _siteOffsets : memoryview
+        Integer sections of the buffer.
+    _wordBlob, _urlBlob, _siteBlob : memoryview
+        UTF-8 sections of the buffer.
+
+    Methods
+    -------
+    create
+        Lays out the index in a new shared memory segment or file.
+    attach
+        Attaches to the shared memory segment of an index.
+    open
+        Maps the file of an index.
+    search
+        The same of SearchEngine.search.
+    getHits
+        Returns a page of the ranked (url, occurrences) pairs of a keyword.
+    getName
+        Returns the name of the shared memory segment, or the path of the file.
+    getSize
+        Returns the size of the buffer.
+    hasKeyword
+        Returns True if a keyword occurs in some page.
+    close
+        Releases the mapping of the buffer.
+    unlink
+        Destroys the shared memory segment.
+    """
+
+    __slots__ = ['_handle', '_owner', '_name', '_normalizer', '_views', '_wordOffsets', '_wordBlob', '_listStarts',
+                 '_postPages', '_postCounts', '_pageSites', '_urlOffsets', '_urlBlob', '_siteOffsets', '_siteBlob']
+
+    _MAGIC = b'SHIX'
+    _VERSION = 2
+    _SECTIONS = ('normalizer', 'wordOffsets', 'wordBlob', 'listStarts', 'postPages', 'postCounts',
+                 'pageSites', 'urlOffsets', 'urlBlob', 'siteOffsets', 'siteBlob')
+    _TYPECODES = {'wordOffsets': 'Q', 'listStarts': 'Q', 'postPages': 'I', 'postCounts': 'I',
+                  'pageSites': 'I', 'urlOffsets': 'Q', 'siteOffsets': 'Q'}
+    _HEADER = 8 + 16 * len(_SECTIONS) # magic, version, then the (offset, length) of each section
+
+    def __init__(self, handle, buffer, name, owner):
+        """
+        Creates the index on a buffer laid out by create. Use create, attach or open instead.
+
+        Parameters
+        ----------
+        handle : SharedMemory | mmap
+            Memory holding the buffer.
+        buffer : memoryview
+            The buffer.
+        name : str
+            Name of the shared memory segment, or path of the file.
+        owner : bool
+            True if the shared memory has been created by this process.
+        """
+        self._handle = handle
+        self._owner = owner
+        self._name = name
+        if bytes(buffer[:4]) != self._MAGIC or buffer[4:8].cast('I')[0] != self._VERSION:
+            raise ValueError(name + " is not a shared index of this version")
+        header = buffer[8:self._HEADER].cast('Q')
+        self._views = [header]
+        for i, section in enumerate(self._SECTIONS):
+            view = buffer[header[2*i]:header[2*i] + header[2*i+1]]
+            if section in self._TYPECODES: view = view.cast(self._TYPECODES[section])
+            self._views.append(view)
+            if section != 'normalizer': setattr(self, '_' + section, view)
+        configuration = json.loads(bytes(self._views[1]).decode('utf-8')) # the normalizer section
+        self._normalizer = None if configuration is None else TextNormalizer(**configuration)
+        self._views.append(buffer)
+
+    @classmethod
+    def _layout(cls, words, lists, urls, pageSites, siteStrings, normalizer):
+        """
+        Utility method which returns the buffer of an index.
+
+        Parameters
+        ----------
+        words : list
+            Words of the vocabulary, sorted by their UTF-8 encoding.
+        lists : list
+            Ranked (page number, occurrences) pairs of each word.
+        urls : list
+            URL of each page number.
+        pageSites : list
+            Site number of each page number.
+        siteStrings : list
+            Site string of each site number.
+        normalizer : TextNormalizer | None
+            Normalizer of the keywords, stored as its configuration.
+
+        Returns
+        -------
+        bytearray
+            The buffer.
+
+        TIME COMPLEXITY
+        ---------------
+        O(size of the buffer)
+        """
+        def blob(strings):
+            encoded = [string.encode('utf-8') for string in strings]
+            offsets = array('Q', [0])
+            for data in encoded: offsets.append(offsets[-1] + len(data))
+            return offsets, b''.join(encoded)
+
+        configuration = None if normalizer is None else normalizer.getConfiguration()
+        sections = {'normalizer': json.dumps(configuration).encode('utf-8')}
+        sections['wordOffsets'], sections['wordBlob'] = blob(words)
+        starts = array('Q', [0])
+        pages = array('I')
+        counts = array('I')
+        for list in lists:
+            for page, count in list:
+                pages.append(page)
+                counts.append(count)
+            starts.append(len(pages))
+        sections['listStarts'], sections['postPages'], sections['postCounts'] = starts, pages, counts
+        sections['urlOffsets'], sections['urlBlob'] = blob(urls)
+        sections['pageSites'] = array('I', pageSites)
+        sections['siteOffsets'], sections['siteBlob'] = blob(siteStrings)
+        buffer = bytearray(cls._MAGIC) + array('I', [cls._VERSION]).tobytes()
+        header = array('Q')
+        body = bytearray()
+        for section in cls._SECTIONS:
+            data = sections[section]
+            data = data.tobytes() if isinstance(data, array) else data
+            body += bytes(-(cls._HEADER + len(body)) % 8) # every section is aligned to 8 bytes
+            header.extend((cls._HEADER + len(body), len(data)))
+            body += data
+        return buffer + header.tobytes() + body
+
+    @classmethod
+    def create(cls, words, lists, urls, pageSites, siteStrings, normalizer = None, name = None, path = None):
+        """
+        Lays out an index in a new shared memory segment or, if a path is given, in a new file which is
+        then mapped. It is used by SearchEngine.share, which collects its arguments.
+
+        Parameters
+        ----------
+        words, lists, urls, pageSites, siteStrings, normalizer
+            Content of the index (see _layout).
+        name : str | None
+            Name of the shared memory segment, None for a random one. It is ignored if path is given.
+        path : str | None
+            Path of the file of the index, None to use a shared memory segment.
+
+        Returns
+        -------
+        SharedIndex
+            The index, owned by this process.
+
+        TIME COMPLEXITY
+        ---------------
+        O(size of the buffer)
+        """
+        data = cls._layout(words, lists, urls, pageSites, siteStrings, normalizer)
+        if path is not None:
+            with open(path, 'wb') as file:
+                file.write(data)
+            return cls.open(path)
+        memory = SharedMemory(name, create = True, size = len(data))
+        memory.buf[:len(data)] = data
+        return cls(memory, memory.buf[:len(data)], memory.name, True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to the shared memory segment of an index created by another process. On Python 3.13 and
+        later the segment is not tracked by this process; on the previous versions a process which is not
+        started by the multiprocessing module of the creator should use a file instead, since its resource
+        tracker would destroy the segment when it exits.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory segment.
+
+        Returns
+        -------
+        SharedIndex
+            The index, read without copying it.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1)
+        """
+        try:
+            memory = SharedMemory(name, track = False)
+        except TypeError: # the parameter has been added by Python 3.13
+            memory = SharedMemory(name)
+        return cls(memory, memory.buf, memory.name, False)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Maps read-only the file of an index, so that the processes mapping it share the page cache.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file.
+
+        Returns
+        -------
+        SharedIndex
+            The index, read without copying it.
+
+        TIME COMPLEXITY
+        ---------------
+        O(1)
+        """
+        with open(path, 'rb') as file:
+            memory = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        return cls(memory, memoryview(memory), path, False)
+
+    def getName(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        str
+            The name of the shared memory segment, to be passed to attach, or the path of the file.
+        """
+        return self._name
+
+    def getSize(self):
+        """
+        Public accessor method.
+
+        Returns
+        -------
+        int
+            The size in bytes of the buffer of the index.
+        """
+        return len(self._views[-1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+        if self._owner: self.unlink()
+
+    def close(self):
+        """Releases the mapping of the buffer, after which the index can not be used anymore."""
+        for view in reversed(self._views): view.release()
+        self._views = []
+        self._handle.close()
+
+    def unlink(self):
+        """Destroys the shared memory segment (only the creator should do it), if the index is not in a file."""
+        if isinstance(self._handle, SharedMemory): self._handle.unlink()
+
+    def __word(self, i):
+        """Utility method which returns the UTF-8 encoding of the i-th word."""
+        return bytes(self._wordBlob[self._wordOffsets[i]:self._wordOffsets[i+1]])
+
+    def __find(self, keyword):
+        """
+        Utility method which returns the number of the (normalized) keyword in the vocabulary, -1 if it is absent.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword)•log(W))
+            Where W is the number of words, with a binary search.
+        """
+        if self._normalizer is not None:
+            keyword = self._normalizer.normalizeWord(keyword)
+            if keyword is None: return -1
+        word = keyword.encode('utf-8')
+        low, high = 0, len(self._wordOffsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.__word(middle) < word: low = middle + 1
+            else: high = middle
+        return low if low < len(self._wordOffsets) - 1 and self.__word(low) == word else -1
+
+    def __postings(self, keyword, offset, count):
+        """Utility method which returns the range of the postings of the keyword from offset to offset + count."""
+        i = self.__find(keyword)
+        if i < 0: raise NOOccurrenceListException("Occurrence list not found!")
+        start, end = self._listStarts[i], self._listStarts[i+1]
+        return min(start + offset, end), min(start + offset + count, end)
+
+    def hasKeyword(self, keyword):
+        """
+        Checks if the keyword occurs in some page.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword)•log(W))
+        """
+        return self.__find(keyword) >= 0
+
+    def getHits(self, keyword, offset = 0, count = 10):
+        """
+        Returns the ranked hits of the keyword from position offset (included) to position offset + count
+        (excluded), in the same order of SearchEngine.searchHits.
+
+        Returns
+        -------
+        list
+            (url, occurrences) pairs.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword)•log(W) + count)
+        """
+        start, end = self.__postings(keyword, offset, count)
+        urls, blob = self._urlOffsets, self._urlBlob
+        return [(str(blob[urls[page]:urls[page+1]], 'utf-8'), self._postCounts[i])
+                for i, page in zip(range(start, end), self._postPages[start:end])]
+
+    def search(self, keyword, k, output = None):
+        """
+        Returns the concatenation of the site strings of the sites hosting the k pages with the maximum
+        number of occurrences of the keyword, without duplicates, as SearchEngine.search does: the pages
+        are the first k postings of the keyword and the site strings are already rendered.
+
+        Parameters
+        ----------
+        keyword : str
+            word to be searched in the different pages
+        k : int
+            number of pages to search
+        output : file-like object | None
+            object with a write(str) method to which the string is written, None to return it
+
+        Returns
+        -------
+        str | None
+            The concatenation of the site strings, None if it has been written to output.
+
+        Raises
+        ------
+        NOOccurrenceListException
+            if there's no occurrence list associated to the given keyword.
+
+        TIME COMPLEXITY
+        ---------------
+        O(len(keyword)•log(W) + k + n)
+            Where n is the total size of the site strings, which are only decoded.
+        """
+        start, end = self.__postings(keyword, 0, k)
+        sites = []
+        seen = set()
+        pageSites = self._pageSites
+        for page in self._postPages[start:end]:
+            site = pageSites[page]
+            if site not in seen:
+                seen.add(site)
+                sites.append(site)
+        offsets, blob = self._siteOffsets, self._siteBlob
+        strings = [str(blob[offsets[site]:offsets[site+1]], 'utf-8') for site in sites]
+        if output is None: return ''.join(strings)[:-1]
+        for string in strings[:-1]: output.write(string)
+        if strings: output.write(strings[-1][:-1])
+        return None
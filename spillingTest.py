@@ -0,0 +1,38 @@
+import random
+from engine import WebSite, InvertedIndex
+from external_merge import SpillingIndexBuilder
+
+PAGES = 500
+VOCABULARY = 200
+
+# pages of random words, some of which are added again, so that their postings are spread over several runs
+generator = random.Random(0)
+words = ["w%d" % i for i in range(VOCABULARY)]
+site = WebSite("www.spilling.it")
+pages = [site.insertPage("www.spilling.it/page%d.html" % i, ' '.join(generator.choices(words, k=generator.randint(1, 30))))
+         for i in range(PAGES)]
+order = pages + generator.sample(pages, 50)
+
+def contents(index):
+    """Returns the occurrence lists, and the position lists of a positional index, of all the words of the index."""
+    vocabulary = list(index.getVocabulary())
+    lists = {word: dict(index.getList(word).items()) for word in vocabulary}
+    if not index._positional: return vocabulary, lists, None
+    positions = {word: {page: list(positionList) for page, positionList in index.getPositionList(word).items()} for word in vocabulary}
+    return vocabulary, lists, positions
+
+# the index built by spilling the postings to disk equals the one built in memory, for every budget
+for positional in (False, True):
+    expected = InvertedIndex(positional)
+    for page in order: expected.addPage(page)
+    expected = contents(expected)
+    for budget in (0, 1 << 12, 1 << 16, 1 << 30):
+        index = InvertedIndex(positional)
+        builder = SpillingIndexBuilder(index, budget)
+        for page in order: builder.addPage(page)
+        runs = builder.getRunsCount()
+        assert runs > 0 or budget == 1 << 30, budget
+        builder.build()
+        assert builder.getRunsCount() == 0
+        assert contents(index) == expected, (positional, budget, runs)
+print("spilled index against the in-memory index: ok")
@@ -0,0 +1,43 @@
+import random
+from engine import WebSite, InvertedIndex, NOOccurrenceListException
+from segmented_index import SegmentedIndex
+
+PAGES = 3000
+QUERIES = 150
+VOCABULARY = 60
+
+# pages with Zipf-like word frequencies, so that the postings have blocks of very different maximum scores
+generator = random.Random(0)
+words = ["w%d" % i for i in range(VOCABULARY)]
+weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+site = WebSite("www.topk.it")
+pages = [site.insertPage("www.topk.it/page%d.html" % i, ' '.join(generator.choices(words, weights, k=generator.randint(1, 40)))) 
+         for i in range(PAGES)]
+indexes = [InvertedIndex(), SegmentedIndex(segmentSize = 200, background = False)]
+for index in indexes:
+    for page in pages: index.addPage(page)
+    for page in generator.sample(pages, 100): index.addPage(page) # pages added again, whose counts change
+
+def bruteForce(index, query, k):
+    """Returns the top k (score, page) pairs of the query, sorting all the pages by score and then by identifier."""
+    scores = {}
+    for word in dict.fromkeys(query.split()):
+        list = index.findList(word)
+        if list is None: continue
+        for page, count in list.items(): scores[page] = scores.get(page, 0) + count
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], index._pageIds[item[0]]))
+    return [(score, page) for page, score in ranked[:k]]
+
+# the block-max pruning returns the same pages of the exhaustive ranking, ties included
+for index in indexes:
+    for _ in range(QUERIES):
+        query = ' '.join(generator.choices(words + ["absentword"], k=generator.randint(1, 4)))
+        for k in (0, 1, 5, 10, 50, PAGES):
+            try:
+                pruned = index.getTopPages(query, k)
+            except NOOccurrenceListException:
+                assert not bruteForce(index, query, PAGES), query
+                continue
+            assert pruned == index.getTopPages(query, k, exhaustive = True), (query, k)
+            assert pruned == bruteForce(index, query, k), (query, k)
+print("block-max top-k against the exhaustive top-k: ok")
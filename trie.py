@@ -1,4 +1,5 @@
 from TdP_collections.hash_table.probe_hash_map import ProbeHashMap
+from map_factory import mapFactory
 
 class Trie:
     """
@@ -8,6 +9,8 @@ class Trie:
     ----------
     _root : _Node
         Root of the Standard Trie.
+    _newMap : callable | None
+        Factory of the maps of the nodes, None for the default ones.
 
     Methods
     -------
@@ -21,7 +24,7 @@ class Trie:
         A public method to insert a given word into the Compressed Trie if it is not present.
     """
 
-    __slots__ = '_root' # streamline memory usage
+    __slots__ = '_root', '_newMap' # streamline memory usage
 
     #-------------------------- nested _Node class --------------------------
     
@@ -41,16 +44,25 @@ class Trie:
 
         __slots__ = '_children', '_endNode' ,'_occurrenceList' # streamline memory usage
 
-        def __init__(self, endNode = False):
-            self._children = {}
+        def __init__(self, endNode = False, newMap = None):
+            self._children = {} if newMap is None else newMap()
             self._endNode = endNode
-            if self._endNode: self._occurrenceList = ProbeHashMap()
+            if self._endNode: self._occurrenceList = ProbeHashMap() if newMap is None else newMap()
 
     #------------------------------------------------------------------------
 
-    def __init__(self):
-        """Initialize the Standard Trie, creating an empty trie with just the root."""
-        self._root = self._Node()
+    def __init__(self, mapType = None):
+        """
+        Initialize the Standard Trie, creating an empty trie with just the root.
+
+        Parameters
+        ----------
+        mapType : str | None
+            Implementation of the children and of the occurrence lists of the nodes (see map_factory.py), 
+            None for a dictionary and a ProbeHashMap respectively.
+        """
+        self._newMap = None if mapType is None else mapFactory(mapType)
+        self._root = self._Node(False, self._newMap)
 
     def _searchNode(self, word):
         """
@@ -90,7 +102,7 @@ class Trie:
                 return node, i
         if not node._endNode :
             node._endNode = True
-            node._occurrenceList = ProbeHashMap()
+            node._occurrenceList = ProbeHashMap() if self._newMap is None else self._newMap()
         return node, i
 
     def searchWord(self, word):
@@ -133,7 +145,7 @@ class Trie:
         node, index = self._searchNode(word)
         if index < len(word) :
             for c in word[index:-1]:
-                node._children[c] = self._Node()
+                node._children[c] = self._Node(False, self._newMap)
                 node = node._children[c]
             # the last node has to be a terminator
-            node._children[word[-1]] = self._Node(True)
\ No newline at end of file
+            node._children[word[-1]] = self._Node(True, self._newMap)
\ No newline at end of file
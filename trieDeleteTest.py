@@ -0,0 +1,96 @@
+import random
+from compressed_trie_4 import CompressedTrie4
+from engine import WebSite, InvertedIndex
+from segmented_index import SegmentedIndex
+
+ROUNDS = 200
+OPERATIONS = 300
+ALPHABET = "abcde"
+
+def shape(node):
+    """Returns the lables of the subtree of node, with the children in order of key."""
+    return (node._lable, node._endNode, tuple(shape(node._children[key]) for key in sorted(node._children)))
+
+def randomWord(generator):
+    return ''.join(generator.choice(ALPHABET) for _ in range(generator.randint(1, 6)))
+
+# randomized insertions and deletions against a reference set
+for round in range(ROUNDS):
+    generator = random.Random(round)
+    trie = CompressedTrie4(None if round % 2 else "dict")
+    reference = set()
+    snapshots = [] # (forked trie, its words) pairs, which must not change
+    for operation in range(OPERATIONS):
+        word = randomWord(generator)
+        if generator.random() < 0.55:
+            trie.insertWord(word)
+            reference.add(word)
+        else:
+            assert trie.deleteWord(word) == (word in reference), (round, operation, word)
+            reference.discard(word)
+        if operation % 50 == 0:
+            snapshots.append((trie, set(reference)))
+            trie = trie.fork()
+    assert {word for word, _ in trie.items()} == reference, round
+    assert all(trie.searchWord(word) is not None for word in reference), round
+    assert all(trie.searchWord(word) is None for word in {randomWord(generator) for _ in range(50)} - reference), round
+    assert [word for word, _ in trie.sortedItems()] == sorted(reference), round
+    # the trie is as compressed as one built only with the remaining words
+    fresh = CompressedTrie4()
+    for word in reference: fresh.insertWord(word)
+    assert shape(trie._root) == shape(fresh._root), round
+    for old, words in snapshots:
+        assert {word for word, _ in old.items()} == words, round
+print("deleteWord:", ROUNDS, "rounds of", OPERATIONS, "operations ok")
+
+# removal of pages from the InvertedIndex: the result is the same index built without them
+generator = random.Random(0)
+site = WebSite("www.test.it")
+pages = {}
+for i in range(200):
+    text = ' '.join(randomWord(generator) for _ in range(generator.randint(1, 20)))
+    pages[site.insertPage("www.test.it/page%d.html" % i, text)] = text
+for positional in (False, True):
+    index = InvertedIndex(positional, dedup = True, champions = 3)
+    for page, text in pages.items(): index.addPage(page, text)
+    removed = generator.sample(list(pages), 120)
+    for page in removed[:60]: index.removePage(page)
+    index = index.fork() # the removals continue on a copy-on-write fork
+    for page in removed[60:]: index.removePage(page)
+    expected = InvertedIndex(positional)
+    for page, text in pages.items():
+        if page not in removed: expected.addPage(page, text)
+    words = [word for word, _ in expected._trie.items()]
+    assert sorted(words) == sorted(word for word, _ in index._trie.items())
+    for word in words:
+        assert index.getList(word) == expected.getList(word), word
+        if positional: assert index.getPositionList(word) == expected.getPositionList(word), word
+    assert shape(index._trie._root) == shape(expected._trie._root)
+    index.updateChampions()
+print("removePage ok")
+
+# removal of pages from the SegmentedIndex: tombstones in the frozen segments, applied by the merges
+for positional, compress in ((False, False), (True, False), (False, True)):
+    index = SegmentedIndex(segmentSize = 16, tierFactor = 2, positional = positional, background = False, compress = compress)
+    items = list(pages.items())
+    for page, text in items[:150]: index.addPage(page, text)
+    reference = InvertedIndex(positional)
+    for page, text in items[:150]: reference.addPage(page, text)
+    removed = set(generator.sample([page for page, _ in items[:150]], 60))
+    for page in removed: assert index.removePage(page) == reference.removePage(page) # the words left without pages
+    for page, text in items[150:]: index.addPage(page, text)
+    readded = generator.sample(sorted(removed, key=lambda page: page.getUrl()), 10)
+    for page in readded:
+        index.addPage(page, pages[page])
+        removed.discard(page)
+    expected = InvertedIndex(positional)
+    for page, text in pages.items():
+        if page not in removed: expected.addPage(page, text)
+    words = sorted(word for word, _ in expected._trie.items())
+    assert sorted(index._words()) == words == list(index.getVocabulary())
+    for word in words:
+        assert index.getList(word) == expected.getList(word), word
+        if positional: assert index.getPositionList(word) == expected.getPositionList(word), word
+    gone = {word for text in pages.values() for word in text.split()} - set(words)
+    assert all(index.findList(word) is None for word in gone)
+print("SegmentedIndex.removePage ok")